@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+
+"""Asyncio API for testing images."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import signal
+import sys
+
+from img_proof.ipa_constants import ASYNC_CANCEL_TIMEOUT
+from img_proof.ipa_controller import get_cloud, get_error_results
+from img_proof.ipa_exceptions import IpaControllerException
+from img_proof.ipa_utils import ignored
+
+WORKER_COMMAND = [sys.executable, '-m', 'img_proof.ipa_async']
+# Results of large test runs are sent as a single json line
+STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class _Cancelled(BaseException):
+    """Raised in the worker process when the test run is cancelled."""
+
+
+class _EventLogHandler(logging.Handler):
+    """Send log records to the parent process as events."""
+
+    def __init__(self, events):
+        """Initialize handler with the event stream."""
+        super(_EventLogHandler, self).__init__()
+        self.events = events
+
+    def emit(self, record):
+        """Write the log record as a log event."""
+        with ignored(Exception):
+            _write_event(
+                self.events,
+                'log',
+                level=record.levelno,
+                message=self.format(record)
+            )
+
+
+def _write_event(events, event, **values):
+    """Write an event as a json line to the event stream."""
+    values['event'] = event
+    events.write(json.dumps(values) + '\n')
+    events.flush()
+
+
+def _cancel(signum, frame):
+    """Signal handler which interrupts preparing the instance."""
+    raise _Cancelled()
+
+
+def _cleanup_cancelled(kwargs):
+    """Return True if a cancelled run should terminate its instance."""
+    return (
+        kwargs.get('cleanup') is not False and
+        not kwargs.get('running_instance_id') and
+        kwargs.get('cloud_name', '').lower() != 'ssh'
+    )
+
+
+def _terminate_instance(kwargs, instance_id):
+    """Terminate the instance launched by a cancelled test run."""
+    kwargs = dict(kwargs, running_instance_id=instance_id)
+    cloud = get_cloud(**kwargs)
+    cloud._terminate_instance()
+
+
+def _run_worker(kwargs, events):
+    """
+    Test the image and write the events of the run.
+
+    An instance event is written as soon as the instance is
+    prepared and a result event when testing finishes. If SIGTERM
+    is received before the instance event is written and flushed
+    the instance is terminated here. Once the instance event is
+    written SIGTERM stops the process and the parent terminates
+    the instance.
+    """
+    logger = logging.getLogger('img_proof')
+    handler = _EventLogHandler(events)
+    logger.addHandler(handler)
+
+    cloud = None
+    reported = False
+    signal.signal(signal.SIGTERM, _cancel)
+
+    try:
+        cloud = get_cloud(**kwargs)
+        cloud.prepare_instance()
+
+        _write_event(events, 'instance', instance_id=cloud.running_instance_id)
+        reported = True
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+        status, results = cloud.test_image()
+    except _Cancelled:
+        if cloud and cloud.running_instance_id and not reported and \
+                _cleanup_cancelled(kwargs):
+            logger.info(
+                'Terminating instance %s' % cloud.running_instance_id
+            )
+            cloud._terminate_instance()
+
+        return
+    except Exception as error:
+        status, results = 1, get_error_results(error)
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        logger.removeHandler(handler)
+
+    _write_event(events, 'result', status=status, results=results)
+
+
+def main():
+    """
+    Entry point of the worker process.
+
+    The keyword arguments are read as json from stdin. Events are
+    written to stdout and the output of the test run to stderr.
+    """
+    events = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    _run_worker(json.load(sys.stdin), events)
+
+
+async def _read_events(stream, logger):
+    """
+    Read the remaining events of the worker.
+
+    Log events are sent to the logger. Incomplete lines written
+    while the worker was stopped are ignored.
+
+    Returns:
+        The instance id of the instance event or None.
+    """
+    instance_id = None
+
+    async for line in stream:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+
+        if event['event'] == 'log':
+            logger.log(event['level'], event['message'])
+        elif event['event'] == 'instance':
+            instance_id = event['instance_id']
+
+    return instance_id
+
+
+async def _stop_worker(process, kwargs, instance_id):
+    """
+    Stop the worker process and terminate the instance it tests.
+
+    The events still in the pipe are read while the worker stops so
+    an instance event which was not read yet is not lost.
+    """
+    logger = logging.getLogger('img_proof')
+    events = asyncio.ensure_future(_read_events(process.stdout, logger))
+
+    if process.returncode is None:
+        with ignored(ProcessLookupError):
+            process.terminate()
+
+        try:
+            await asyncio.wait_for(process.wait(), ASYNC_CANCEL_TIMEOUT)
+        except asyncio.TimeoutError:
+            with ignored(ProcessLookupError):
+                process.kill()
+
+            await process.wait()
+
+    try:
+        instance_id = await asyncio.wait_for(
+            events,
+            ASYNC_CANCEL_TIMEOUT
+        ) or instance_id
+    except Exception as error:
+        logger.debug('Unable to read worker events: {0}'.format(error))
+
+    if instance_id and _cleanup_cancelled(kwargs):
+        logger.info('Terminating instance %s' % instance_id)
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            _terminate_instance,
+            kwargs,
+            instance_id
+        )
+
+
+async def test_image_async(*args, **kwargs):
+    """
+    Test an image without blocking the event loop.
+
+    Accepts the same arguments as get_cloud except log_callback.
+    The image is tested in a separate worker process so many images
+    can be tested concurrently. Log records of the worker are sent
+    to the img_proof logger.
+
+    If the task is cancelled the worker process is stopped and an
+    instance launched for the test run is terminated, unless cleanup
+    is False.
+
+    Returns:
+        A tuple with the exit code and results json.
+    """
+    kwargs = inspect.signature(get_cloud).bind(*args, **kwargs).arguments
+
+    if kwargs.get('log_callback'):
+        raise IpaControllerException(
+            'A log callback is not supported when testing asynchronously.'
+        )
+
+    logger = logging.getLogger('img_proof')
+    process = await asyncio.create_subprocess_exec(
+        *WORKER_COMMAND,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        limit=STREAM_LIMIT
+    )
+
+    instance_id = None
+    result = None
+
+    try:
+        process.stdin.write(json.dumps(kwargs).encode())
+        await process.stdin.drain()
+        process.stdin.close()
+
+        async for line in process.stdout:
+            event = json.loads(line)
+
+            if event['event'] == 'log':
+                logger.log(event['level'], event['message'])
+            elif event['event'] == 'instance':
+                instance_id = event['instance_id']
+            elif event['event'] == 'result':
+                result = event
+
+        await process.wait()
+    except asyncio.CancelledError:
+        # Shield cleanup from being cancelled again
+        await asyncio.shield(_stop_worker(process, kwargs, instance_id))
+        raise
+
+    if result is None:
+        raise IpaControllerException(
+            'Test process exited with status {0} without results.'.format(
+                process.returncode
+            )
+        )
+
+    return result['status'], result['results']
+
+
+if __name__ == '__main__':
+    main()
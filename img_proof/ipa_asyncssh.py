@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+
+"""Asyncio SSH backend using asyncssh."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+import hashlib
+import os
+import threading
+
+from binascii import hexlify
+
+from paramiko.ssh_exception import AuthenticationException
+
+from img_proof.ipa_exceptions import IpaSSHException
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+LOOP = None
+LOOP_LOCK = threading.Lock()
+
+
+def get_loop():
+    """
+    Return the event loop shared by all blocking asyncssh clients.
+
+    The loop runs in a daemon thread which is started on first use.
+    All connections are served by this one thread.
+    """
+    global LOOP
+
+    with LOOP_LOCK:
+        if LOOP is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever,
+                name='img-proof-asyncssh',
+                daemon=True
+            )
+            thread.start()
+            LOOP = loop
+
+    return LOOP
+
+
+def run(coroutine, timeout=None):
+    """Run the coroutine in the shared loop and return the result."""
+    future = asyncio.run_coroutine_threadsafe(coroutine, get_loop())
+    return future.result(timeout)
+
+
+async def connect(ip, ssh_private_key_file, ssh_user, port=22, timeout=None):
+    """
+    Establish an asyncssh connection to the instance.
+
+    Host keys are not verified, the same as the paramiko backend.
+
+    Raises:
+        IpaSSHException: If asyncssh is not installed.
+        AuthenticationException: If authentication failed.
+    """
+    if asyncssh is None:
+        raise IpaSSHException(
+            'The asyncssh SSH backend requires the asyncssh package.'
+        )
+
+    if not os.path.isfile(ssh_private_key_file):
+        raise FileNotFoundError(ssh_private_key_file)
+
+    try:
+        return await asyncio.wait_for(
+            asyncssh.connect(
+                ip,
+                port=port,
+                username=ssh_user,
+                client_keys=[ssh_private_key_file],
+                known_hosts=None,
+                agent_path=None,
+                keepalive_interval=30
+            ),
+            timeout
+        )
+    except asyncssh.PermissionDenied as error:
+        raise AuthenticationException(str(error))
+
+
+async def execute_ssh_command(connection, cmd, timeout=None):
+    """
+    Execute given command using the asyncssh connection.
+
+    Returns:
+        String output of cmd execution.
+    Raises:
+        IpaSSHException: If stderr returns a non-empty string.
+    """
+    result = await asyncio.wait_for(
+        connection.run(cmd, check=False, encoding=None),
+        timeout
+    )
+    out = result.stdout or b''
+    err = result.stderr or b''
+
+    if err:
+        raise IpaSSHException(out.decode() + err.decode())
+
+    return out.decode()
+
+
+async def start_command(connection, cmd):
+    """
+    Start the command without waiting for it to exit.
+
+    Raises:
+        asyncssh.ChannelOpenError: If the session cannot be opened.
+    """
+    return await connection.create_process(cmd)
+
+
+async def extract_archive(connection, archive_path, extract_path=None):
+    """
+    Extract the archive in current path using the connection.
+
+    If extract_path is provided extract the archive there.
+    """
+    command = 'tar -xf {path}'.format(path=archive_path)
+
+    if extract_path:
+        command += ' -C {extract_path}'.format(extract_path=extract_path)
+
+    return await execute_ssh_command(connection, command)
+
+
+async def put_file(connection, source_file, destination_file):
+    """Copy file to instance using the asyncssh connection."""
+    async with connection.start_sftp_client() as sftp_client:
+        await sftp_client.put(source_file, destination_file)
+
+
+async def get_file(connection, source_file, destination_file):
+    """Copy file from instance using the asyncssh connection."""
+    async with connection.start_sftp_client() as sftp_client:
+        await sftp_client.get(source_file, destination_file)
+
+
+def get_host_key_fingerprint(connection):
+    """
+    Get host key fingerprint of the asyncssh connection.
+
+    The fingerprint matches the paramiko backend fingerprint.
+    """
+    key = connection.get_server_host_key()
+    return hexlify(hashlib.md5(key.public_data).digest())
+
+
+class _ChannelFile(object):
+    """Output of a command which is read once the command exits."""
+
+    def __init__(self, future, name, timeout=None):
+        self.future = future
+        self.name = name
+        self.timeout = timeout
+        self.channel = self
+
+    def read(self):
+        return getattr(self.future.result(self.timeout), self.name) or b''
+
+    def recv_exit_status(self):
+        return self.future.result(self.timeout).exit_status
+
+
+class _SFTPClient(object):
+    """Blocking SFTP client of an AsyncSSHClient."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def put(self, source_file, destination_file):
+        run(put_file(self.client.connection, source_file, destination_file))
+
+    def get(self, source_file, destination_file):
+        run(get_file(self.client.connection, source_file, destination_file))
+
+    def close(self):
+        pass
+
+
+class _HostKey(object):
+    """Host key of an AsyncSSHClient."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def get_fingerprint(self):
+        key = self.connection.get_server_host_key()
+        return hashlib.md5(key.public_data).digest()
+
+
+class _Session(object):
+    """Session which runs a command without waiting for it to exit."""
+
+    def __init__(self, client):
+        self.client = client
+        self.process = None
+
+    def exec_command(self, command):
+        """Start the command, raises if the session cannot be opened."""
+        self.process = run(start_command(self.client.connection, command))
+
+
+class _Transport(object):
+    """Transport of an AsyncSSHClient."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def set_keepalive(self, interval):
+        pass
+
+    def get_remote_server_key(self):
+        return _HostKey(self.client.connection)
+
+    def open_session(self):
+        return _Session(self.client)
+
+    def close(self):
+        self.client.close()
+
+
+class AsyncSSHClient(object):
+    """
+    Blocking SSH client backed by an asyncssh connection.
+
+    Provides the part of the paramiko SSHClient interface used by
+    img_proof so it can be used with the ipa_utils SSH functions.
+    Connections are served by the shared event loop instead of a
+    transport thread per connection. Each call still blocks the
+    calling thread, to run commands on many instances at once use
+    the coroutines of this module from an event loop.
+    """
+
+    def __init__(self, connection):
+        """Initialize client with an open connection."""
+        self.connection = connection
+
+    @classmethod
+    def connect(cls, ip, ssh_private_key_file, ssh_user, port=22,
+                timeout=None):
+        """Return a new client connected to the instance."""
+        return cls(run(connect(ip, ssh_private_key_file, ssh_user, port,
+                               timeout)))
+
+    def exec_command(self, command, timeout=None):
+        """
+        Start the command on the instance.
+
+        Returns:
+            A tuple of stdin, stdout and stderr. The output is read
+            once the command exits, stdin is not supported.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.connection.run(command, check=False, encoding=None),
+            get_loop()
+        )
+        return (
+            None,
+            _ChannelFile(future, 'stdout', timeout),
+            _ChannelFile(future, 'stderr', timeout)
+        )
+
+    def open_sftp(self):
+        """Return a blocking SFTP client."""
+        return _SFTPClient(self)
+
+    def get_transport(self):
+        """Return the transport of the client."""
+        return _Transport(self)
+
+    def close(self):
+        """Close the connection."""
+        get_loop().call_soon_threadsafe(self.connection.close)
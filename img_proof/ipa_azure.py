@@ -626,6 +626,11 @@ class AzureCloud(IpaCloud):
             else:
                 self.image_id = image_info.id.rsplit('/', maxsplit=1)[1]
 
+    def _set_running_instance(self, instance_id):
+        """Use the existing instance and its default resource names."""
+        super(AzureCloud, self)._set_running_instance(instance_id)
+        self._set_default_resource_names()
+
     def _set_instance_ip(self):
         """
         Get the IP address based on instance ID.
@@ -663,7 +668,11 @@ class AzureCloud(IpaCloud):
                 'Unable to start instance: {0}.'.format(error)
             )
 
-        vm_start.result()
+        self._wait_on_instance(
+            'VM running',
+            timeout=self.timeout,
+            waiter=lambda timeout: vm_start.result(timeout=timeout)
+        )
 
     def _stop_instance(self):
         """
@@ -678,7 +687,11 @@ class AzureCloud(IpaCloud):
                 'Unable to stop instance: {0}.'.format(error)
             )
 
-        vm_stop.result()
+        self._wait_on_instance(
+            'VM stopped',
+            timeout=self.timeout,
+            waiter=lambda timeout: vm_stop.result(timeout=timeout)
+        )
 
     def _terminate_instance(self):
         """
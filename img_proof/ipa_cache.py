@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""Cache of passing test results."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+
+from tempfile import NamedTemporaryFile
+
+from img_proof import __version__
+from img_proof.ipa_constants import IPA_CACHE_PATH, IPA_CACHE_SIZE
+from img_proof.ipa_exceptions import IpaCacheException
+from img_proof.ipa_utils import get_test_name, ignored
+
+
+def get_file_hash(path):
+    """Return the sha256 hex digest of the file contents."""
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def get_cache_key(image_id, instance_type, test_file, markers=None):
+    """
+    Return the cache key for the test file on the image.
+
+    The key is a hash of the image id, instance type, test name,
+    the pytest marker expression which selects the tests, the
+    contents of the test file and of every conftest.py in the test
+    file directory and its parents, and the img-proof version.
+    """
+    path = test_file.split('::')[0]
+    conftests = []
+
+    directory = os.path.dirname(os.path.abspath(path))
+    while True:
+        conftest = os.path.join(directory, 'conftest.py')
+        if os.path.isfile(conftest):
+            conftests.append(get_file_hash(conftest))
+
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+
+        directory = parent
+
+    parts = [
+        image_id,
+        instance_type,
+        get_test_name(test_file),
+        markers,
+        get_file_hash(path),
+        conftests,
+        __version__
+    ]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+class ResultCache(object):
+    """
+    Cache of passing test results stored as json files.
+
+    Each entry is stored in a separate file named by the cache key.
+    Reading an entry marks it as recently used. When the total size
+    of the cache exceeds max_size megabytes the least recently used
+    entries are removed.
+    """
+
+    def __init__(self, cache_dir=None, max_size=None):
+        """Initialize result cache."""
+        self.cache_dir = os.path.expanduser(cache_dir or IPA_CACHE_PATH)
+        max_size = IPA_CACHE_SIZE if max_size is None else max_size
+        self.max_size = int(float(max_size) * 1024 * 1024)
+
+    def _get_path(self, key):
+        """Return the file path of the cache entry."""
+        return os.path.join(self.cache_dir, '{0}.json'.format(key))
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits."""
+        entries = []
+        total = 0
+
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+
+            with ignored(OSError):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+                total += stat.st_size
+
+        for mtime, size, name in sorted(entries):
+            if total <= self.max_size:
+                break
+
+            with ignored(OSError):
+                os.remove(os.path.join(self.cache_dir, name))
+
+            total -= size
+
+    def get(self, key):
+        """
+        Return the cached results for key.
+
+        Returns None if there is no valid entry for key.
+        """
+        path = self._get_path(key)
+
+        try:
+            with open(path, 'r') as f:
+                results = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+        with ignored(OSError):
+            os.utime(path)
+
+        return results
+
+    def set(self, key, results):
+        """Store the results for key and evict old entries."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as error:
+            raise IpaCacheException(
+                'Unable to create cache directory: %s' % error
+            )
+
+        # Write to a temp file so concurrent readers never
+        # see a partial entry.
+        with NamedTemporaryFile(
+            'w',
+            dir=self.cache_dir,
+            suffix='.tmp',
+            delete=False
+        ) as f:
+            json.dump(results, f)
+
+        os.replace(f.name, self._get_path(key))
+        self._evict()
@@ -24,20 +24,35 @@ import json
 import logging
 import os
 import shlex
+import shutil
+import threading
+import tarfile
 import time
 
 import pytest
 
 from collections import ChainMap, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from tempfile import NamedTemporaryFile
 
-from img_proof import ipa_utils
+from img_proof import ipa_asyncssh, ipa_testinfra, ipa_utils
+from img_proof.ipa_cache import ResultCache, get_cache_key
 from img_proof.ipa_constants import (
     BASH_SSH_SCRIPT,
+    IPA_CACHE_PATH,
+    IPA_CACHE_SIZE,
+    PYTEST_WORKER_MAX_RSS,
+    PYTEST_WORKER_MAX_SESSIONS,
+    PYTEST_WORKER_TIMEOUT,
     IPA_CONFIG_FILE,
     IPA_HISTORY_FILE,
+    IPA_POOL_FILE,
     IPA_RESULTS_PATH,
     NOT_IMPLEMENTED,
+    SSH_CONTROL_PERSIST,
+    SUPPORTED_SSH_BACKENDS,
+    SUPPORTED_TEST_ORDERS,
     TEST_PATHS
 )
 from img_proof.ipa_rhel import RHEL
@@ -48,11 +63,17 @@ from img_proof.ipa_sles import SLES
 from img_proof.ipa_exceptions import (
     IpaException,
     IpaCloudException,
-    IpaSSHException
+    IpaSSHException,
+    IpaUtilsException
 )
+from img_proof.ipa_pool import InstancePool
+from img_proof.ipa_scheduler import TestScheduler, sort_test_files
+from img_proof.ipa_session import IpaSession
+from img_proof.ipa_workers import PytestWorkerPool
 from pytest_jsonreport.plugin import JSONReport
 
 default_values = {
+    'batch': False,
     'collect_vm_info': False,
     'config': IPA_CONFIG_FILE,
     'history_log': IPA_HISTORY_FILE,
@@ -61,8 +82,22 @@ default_values = {
     'test_files': set(),
     'timeout': 600,
     'no_default_test_dirs': False,
+    'use_pool': False,
+    'parallel': 1,
+    'pool_file': IPA_POOL_FILE,
     'retry_count': 3,
-    'root_disk_size': 50
+    'root_disk_size': 50,
+    'ssh_multiplex': False,
+    'remote_exec': False,
+    'order': 'default',
+    'cache': False,
+    'cache_dir': IPA_CACHE_PATH,
+    'cache_size': IPA_CACHE_SIZE,
+    'pytest_workers': False,
+    'pytest_worker_max_sessions': PYTEST_WORKER_MAX_SESSIONS,
+    'pytest_worker_max_rss': PYTEST_WORKER_MAX_RSS,
+    'pytest_worker_timeout': PYTEST_WORKER_TIMEOUT,
+    'ssh_backend': 'paramiko'
 }
 
 
@@ -109,6 +144,18 @@ class IpaCloud(object):
         beta=None,
         exclude=None,
         instance_options=None,
+        parallel=None,
+        batch=None,
+        use_pool=None,
+        pool_file=None,
+        ssh_multiplex=None,
+        remote_exec=None,
+        order=None,
+        cache=None,
+        cache_dir=None,
+        resume=None,
+        pytest_workers=None,
+        test_attributes=None,
         custom_args=None
     ):
         """Initialize base cloud framework class."""
@@ -116,21 +163,20 @@ class IpaCloud(object):
         # Get command line values that are not None
         cmd_line_values = self._get_non_null_values(locals())
 
-        ipa_utils.clear_cache()
-
         self.custom_args = custom_args if custom_args else {}
         self.host_key_fingerprint = None
         self.instance_ip = None
+        self.instance_prepared = False
+        self.instance_transitions = []
+        self.ssh_probes = []
 
         self.config = config or default_values['config']
         log_level = log_level or default_values['log_level']
 
-        if log_callback:
-            self.logger = log_callback
-        else:
-            self.logger = logging.getLogger('img_proof')
-            self.logger.setLevel(log_level)
-            self.logger.propagate = False
+        # SSH clients and logger are owned by the session of this
+        # test run and are not shared with other runs.
+        self.session = IpaSession(log_level, log_callback)
+        self.logger = self.session.logger
 
         try:
             self.ipa_config = ipa_utils.get_config_values(
@@ -145,10 +191,23 @@ class IpaCloud(object):
                 'img-proof config file not found: %s' % self.config
             )
 
-        # Chain map options in order: cmdline -> config -> defaults
+        self.checkpoint = None
+        checkpoint_values = {}
+
+        if resume:
+            self.checkpoint = self._load_checkpoint(resume)
+            checkpoint_values = self.checkpoint['options']
+
+        # Chain map options in order:
+        # cmdline -> checkpoint -> config -> defaults
         self.ipa_config = defaultdict(
             lambda: None,
-            ChainMap(cmd_line_values, self.ipa_config, default_values)
+            ChainMap(
+                cmd_line_values,
+                checkpoint_values,
+                self.ipa_config,
+                default_values
+            )
         )
 
         self.description = self.ipa_config['description']
@@ -180,6 +239,45 @@ class IpaCloud(object):
         self.beta = self.ipa_config['beta']
         self.exclude = exclude or []
         self.instance_options = instance_options or []
+        self.parallel = int(self.ipa_config['parallel'])
+        self.batch = bool(
+            ipa_utils.strtobool(str(self.ipa_config['batch']))
+        )
+        self.use_pool = bool(
+            ipa_utils.strtobool(str(self.ipa_config['use_pool']))
+        )
+        self.pool_file = self.ipa_config['pool_file']
+        self.ssh_multiplex = bool(
+            ipa_utils.strtobool(str(self.ipa_config['ssh_multiplex']))
+        )
+
+        if self.ssh_multiplex and not shutil.which('ssh'):
+            self.logger.warning(
+                'ssh client not found, SSH multiplexing is disabled.'
+            )
+            self.ssh_multiplex = False
+
+        self.remote_exec = bool(
+            ipa_utils.strtobool(str(self.ipa_config['remote_exec']))
+        )
+        self.remote_test_dir = None
+        self.order = self.ipa_config['order']
+        self.cache = bool(
+            ipa_utils.strtobool(str(self.ipa_config['cache']))
+        )
+        self.cache_dir = self.ipa_config['cache_dir']
+        self.cache_size = self.ipa_config['cache_size']
+        self.result_cache = None
+        self.pytest_workers = bool(
+            ipa_utils.strtobool(str(self.ipa_config['pytest_workers']))
+        )
+        self.pytest_worker_max_sessions = \
+            self.ipa_config['pytest_worker_max_sessions']
+        self.pytest_worker_max_rss = self.ipa_config['pytest_worker_max_rss']
+        self.pytest_worker_timeout = self.ipa_config['pytest_worker_timeout']
+        self.worker_pool = None
+        self.ssh_backend = self.ipa_config['ssh_backend']
+        self._log_lock = threading.Lock()
 
         if self.enable_secure_boot and not self.enable_uefi:
             self.enable_uefi = True
@@ -199,6 +297,23 @@ class IpaCloud(object):
         else:
             self.distro_name = self.distro_name.lower()
 
+        if self.order not in SUPPORTED_TEST_ORDERS:
+            raise IpaCloudException(
+                'Test order: %s, not supported.' % self.order
+            )
+
+        if self.ssh_backend not in SUPPORTED_SSH_BACKENDS:
+            raise IpaCloudException(
+                'SSH backend: %s, not supported.' % self.ssh_backend
+            )
+        elif self.ssh_backend == 'asyncssh' and \
+                ipa_asyncssh.asyncssh is None:
+            raise IpaCloudException(
+                'The asyncssh SSH backend requires the asyncssh package.'
+            )
+
+        self.session.ssh_backend = self.ssh_backend
+
         if self.cloud != 'ssh':
             if not self.image_id and not self.running_instance_id:
                 raise IpaCloudException(
@@ -216,8 +331,13 @@ class IpaCloud(object):
         self._parse_test_files(
             test_dirs,
             self.no_default_test_dirs,
-            self.exclude
+            self.exclude,
+            self.ipa_config['test_attributes']
         )
+
+        if self.checkpoint:
+            self._check_checkpoint_options()
+
         self.post_init()
 
     def post_init(self):
@@ -236,12 +356,153 @@ class IpaCloud(object):
         }
 
     def _get_ssh_client(self):
-        """Return a new or existing SSH client for given ip."""
-        return ipa_utils.get_ssh_client(
+        """
+        Return a new or existing SSH client for given ip.
+
+        Before a new connection is established wait for the SSH
+        banner so the handshake is not attempted while sshd is down.
+        The banner wait and the connection share the timeout.
+        """
+        timeout = self.timeout
+
+        if self.instance_ip not in self.session.clients:
+            start = time.time()
+            probe = ipa_utils.wait_for_ssh_banner(
+                self.instance_ip,
+                timeout=self.timeout
+            )
+            timeout = max(1, self.timeout - (time.time() - start))
+            self.ssh_probes.append(probe)
+            self.logger.debug(
+                'SSH banner received after {attempts} attempts in '
+                '{time_to_banner:.2f}s'.format(**probe)
+            )
+
+        return self.session.get_ssh_client(
             self.instance_ip,
             self.ssh_private_key_file,
             self.ssh_user,
-            timeout=self.timeout
+            timeout=timeout
+        )
+
+    def _get_remote_test_path(self, test):
+        """
+        Return the test files with paths in the uploaded test dirs.
+
+        Each test dir is uploaded to a numbered sub directory of
+        the remote test dir.
+        """
+        paths = []
+
+        for path in shlex.split(test):
+            for index, test_dir in enumerate(sorted(self.test_dirs)):
+                test_dir = os.path.join(test_dir, '')
+
+                if path.startswith(test_dir):
+                    path = os.path.join(
+                        'tests{0}'.format(index),
+                        path[len(test_dir):]
+                    )
+                    break
+
+            paths.append(path)
+
+        return ' '.join(shlex.quote(path) for path in paths)
+
+    def _upload_tests(self, client):
+        """
+        Upload the test dirs to the instance as a single archive.
+
+        The archive is extracted in a new directory in the
+        default SSH location of the instance.
+        """
+        self.remote_test_dir = 'img_proof-tests-{0}'.format(
+            ipa_utils.get_random_string(length=8)
+        )
+        archive = '{0}.tar.gz'.format(self.remote_test_dir)
+
+        def exclude_cache(info):
+            return None if '__pycache__' in info.name else info
+
+        with NamedTemporaryFile(suffix='.tar.gz') as local_archive:
+            with tarfile.open(local_archive.name, 'w:gz') as tar:
+                for index, test_dir in enumerate(sorted(self.test_dirs)):
+                    if os.path.isdir(test_dir):
+                        tar.add(
+                            test_dir,
+                            arcname=os.path.join(
+                                self.remote_test_dir,
+                                'tests{0}'.format(index)
+                            ),
+                            filter=exclude_cache
+                        )
+
+            try:
+                ipa_utils.put_file(client, local_archive.name, archive)
+            except Exception as error:
+                raise IpaCloudException(
+                    'Failed uploading tests to instance: {0}.'.format(error)
+                )
+
+        self.extract_archive(client, archive)
+        self.execute_ssh_command(client, 'rm -f {0}'.format(archive))
+
+    def _remove_remote_tests(self):
+        """Remove the uploaded test files from the instance if any."""
+        if not self.remote_test_dir:
+            return
+
+        try:
+            ipa_utils.execute_ssh_command(
+                self._get_ssh_client(),
+                'rm -rf {0}'.format(self.remote_test_dir)
+            )
+        except Exception as error:
+            self.logger.debug(
+                'Unable to remove tests from instance: {0}'.format(error)
+            )
+
+        self.remote_test_dir = None
+
+    def _uses_session_client(self, in_process=False):
+        """Return True if tests run on the session paramiko client."""
+        return in_process and self.ssh_backend == 'paramiko' and \
+            self.instance_ip in self.session.clients
+
+    def _get_markers(self):
+        """Return the pytest marker expression which selects tests."""
+        if self.beta:
+            return 'not skipinbeta'
+
+        return None
+
+    def _get_testinfra_host(self, in_process=False):
+        """
+        Return the testinfra host spec for the instance.
+
+        Tests run in process use the img-proof backend so commands
+        run on the paramiko client of the session. Otherwise with
+        SSH multiplexing the ssh backend is used so all test runs
+        share the master connection opened by test_image.
+        """
+        shared = self._uses_session_client(in_process)
+
+        if not (shared or self.ssh_multiplex) or not self.instance_ip:
+            return self.instance_ip
+
+        host = self.instance_ip
+        if ':' in host:
+            host = '[{0}]'.format(host)
+
+        if shared:
+            return '{backend}://{host}'.format(
+                backend=ipa_testinfra.HarnessBackend.NAME,
+                host=host
+            )
+
+        return 'ssh://{host}?controlpersist={persist}'.format(
+            host=host,
+            persist=SSH_CONTROL_PERSIST
         )
 
     def _get_user_data(self):
@@ -279,6 +540,9 @@ class IpaCloud(object):
         if self.cloud != 'ssh':
             self.results['info']['region'] = self.region
             self.results['info']['instance'] = self.running_instance_id
+            self.results['info']['transitions'] = self.instance_transitions
+
+        self.results['info']['ssh_probes'] = self.ssh_probes
 
         self._write_to_log(
             '\n'.join(
@@ -301,12 +565,64 @@ class IpaCloud(object):
         for key, value in results['summary'].items():
             self.results['summary'][key] += value
 
-    def _parse_test_files(self, test_dirs, no_default_test_dirs, exclude):
+    def _order_test_files(self, test_files):
+        """
+        Order the test files between sync points.
+
+        With the duration order the test files that took longest in
+        previous runs start first and the predicted duration is
+        logged. With the failed order test files that recently failed
+        on the image family run first. Required tests always run
+        before the tests that require them.
+        """
+        durations = None
+
+        if self.order == 'failed':
+            failures = ipa_utils.get_test_failures(
+                self.history_log,
+                self.cloud,
+                self.image_id
+            )
+            test_files = ipa_utils.sort_test_segments(
+                test_files,
+                lambda test_file: ipa_utils.get_test_failure_priority(
+                    test_file, failures
+                )
+            )
+        elif self.order == 'duration':
+            durations = ipa_utils.get_test_durations(self.history_log)
+            test_files = ipa_utils.sort_test_segments(
+                test_files,
+                lambda test_file: -ipa_utils.get_test_duration(
+                    test_file, durations
+                )
+            )
+
+        if self.test_attributes:
+            test_files = sort_test_files(test_files, self.test_attributes)
+
+        if durations:
+            predicted = ipa_utils.predict_duration(
+                test_files,
+                durations,
+                self.parallel
+            )
+            self.logger.info(
+                'Predicted test duration: {0:.2f}s'.format(predicted)
+            )
+
+        return test_files
+
+    def _parse_test_files(
+        self, test_dirs, no_default_test_dirs, exclude, test_attributes=None
+    ):
         """
         Collect all test dirs and expand test files.
 
         The test files are expanded to absolute paths given
         test names and a list of availble test dirs to use.
+        Scheduling attributes of test files already expanded by
+        another run, such as a shard, are passed in test_attributes.
         """
         self.test_dirs = set()
         if test_dirs:
@@ -332,16 +648,25 @@ class IpaCloud(object):
                 'At least one test directory is required.'
             )
 
+        self.test_attributes = {}
         self.test_files = ipa_utils.expand_test_files(
             self.test_dirs,
             self.test_files,
-            exclude
+            exclude,
+            self.test_attributes
         )
 
-    def _process_test_results(self, duration, test_name, success=0):
-        """Create result dict for sync test and merge with overall results."""
+        for test_file, test_attrs in (test_attributes or {}).items():
+            self.test_attributes.setdefault(test_file, test_attrs)
+
+        if self.test_attributes:
+            # Fail on dependency cycles before an instance is launched
+            sort_test_files(self.test_files, self.test_attributes)
+
+    def _get_test_results(self, duration, test_name, success=0):
+        """Create result dict for sync test."""
         status = 'passed' if success == 0 else 'failed'
-        result = {
+        return {
             'tests': [
                 {
                     'outcome': status,
@@ -355,26 +680,102 @@ class IpaCloud(object):
                 'total': 1
             }
         }
+
+    def _process_test_results(self, duration, test_name, success=0):
+        """Create result dict for sync test and merge with overall results."""
+        result = self._get_test_results(duration, test_name, success)
         self._merge_results(result)
 
-    def _run_test(self, test, ssh_config):
-        """Run the test on the image."""
-        self.logger.info('Running test {name}'.format(name=test))
+    def _run_pytest(self, cmds):
+        """
+        Run pytest in the current process.
+
+        Returns:
+            A tuple with the pytest exit code and json report.
+        """
+        plugin = JSONReport()
+
+        try:
+            with open(self.log_file, 'a') as log_file:
+                with self.session.redirect_output(log_file), \
+                        ipa_testinfra.shared_client(
+                            self.instance_ip,
+                            self.session.clients.get(self.instance_ip)
+                        ):
+                    result = pytest.main(
+                        cmds + ['--json-report-file=none'],
+                        plugins=[plugin]
+                    )
+        except Exception as error:
+            result = 3  # See below for pytest error codes
+            self.logger.exception(str(error))
+
+        return result, plugin.report
+
+    def _run_pytest_subprocess(self, cmds):
+        """
+        Run pytest in a child process.
+
+        pytest.main is not safe to call from multiple threads so
+        concurrent test runs are isolated in child processes. The
+        output is written to the log in one block once finished.
+
+        Returns:
+            A tuple with the pytest exit code and json report.
+        """
+        output = ''
+        report = None
+
+        try:
+            result, report, output = ipa_utils.run_pytest_subprocess(cmds)
+        except Exception as error:
+            result = 3
+            self.logger.exception(str(error))
 
+        with self._log_lock:
+            self._write_to_log(output)
+
+        return result, report
+
+    def _execute_test(self, test, ssh_config, isolated=False):
+        """
+        Run the test on the image and return the results.
+
+        The test may be a list of test files which are run
+        in a single pytest session.
+
+        Returns:
+            A tuple with the pytest exit code and results dict.
+        """
         options = []
+
+        if isinstance(test, list):
+            self.logger.info(
+                'Running tests {names}'.format(names=', '.join(test))
+            )
+            test = ' '.join(test)
+            options.append('--continue-on-collection-errors')
+        else:
+            self.logger.info('Running test {name}'.format(name=test))
+
         if self.early_exit:
             options.append('-x')
 
-        if self.beta:
-            options.append('-m "not skipinbeta"')
+        markers = self._get_markers()
+        if markers:
+            options.append('-m "{0}"'.format(markers))
 
-        args = '-v -s {} --json-report-file=none ' \
-               '--ssh-config={} --hosts={} {}'.format(
-                   ' '.join(options),
-                   ssh_config,
-                   self.instance_ip,
-                   test
-               )
+        if self.remote_exec:
+            args = '-v -s {} --hosts=local://'.format(' '.join(options))
+            test = self._get_remote_test_path(test)
+        else:
+            args = '-v -s {} --ssh-config={} --hosts={}'.format(
+                ' '.join(options),
+                ssh_config,
+                self._get_testinfra_host(
+                    in_process=not (isolated or self.worker_pool)
+                )
+            )
 
         # Print output captured to log file for test run
         self.logger.debug(
@@ -382,42 +783,352 @@ class IpaCloud(object):
                 '\n'.join(self.test_dirs)
             )
         )
-        self.logger.debug('Arguments:\n{}\n'.format(args))
+        self.logger.debug('Arguments:\n{} {}\n'.format(args, test))
 
         cmds = shlex.split(args)
-        num_retries = 0
+        result, report = self._run_pytest_session(
+            cmds + shlex.split(test),
+            isolated
+        )
 
-        while num_retries < self.retry_count:
-            plugin = JSONReport()
+        attempts = 1
+        retries = 0
+        retry_start = time.time()
 
-            try:
-                with open(self.log_file, 'a') as log_file:
-                    with ipa_utils.redirect_output(log_file):
-                        result = pytest.main(cmds, plugins=[plugin])
-            except Exception as error:
-                result = 3  # See below for pytest error codes
-                self.logger.exception(str(error))
+        while result not in (0, 5) and attempts < self.retry_count:
+            attempts += 1
+            retries += 1
+            failed = self._get_failed_nodeids(report)
+
+            if failed and not self.early_exit:
+                # Only re-run the tests which failed
+                self.logger.info(
+                    'Retrying {num} failed test(s)'.format(num=len(failed))
+                )
+                retry_result, retry_report = self._run_pytest_session(
+                    cmds + failed,
+                    isolated
+                )
 
-            if result not in (0, 5):
-                num_retries += 1
+                if retry_report:
+                    report = self._merge_retry_report(report, retry_report)
+                    result = retry_result
             else:
-                break
+                result, report = self._run_pytest_session(
+                    cmds + shlex.split(test),
+                    isolated
+                )
+
+        if report and retries:
+            report['summary']['retries'] = retries
+            report['summary']['retry_duration'] = time.time() - retry_start
 
         # If pytest has an error there will be no report but
         # we still want to process the error as a failure.
         # https://docs.pytest.org/en/latest/usage.html#possible-exit-codes
-        if result in (2, 3, 4):
-            self._process_test_results(0, 'pytest_error', 1)
+        if result in (2, 3, 4) or not report:
+            results = self._get_test_results(0, 'pytest_error', 1)
         else:
-            self._merge_results(plugin.report)
+            results = self._process_collection_errors(report)
 
         if result == 5:
             # pytest exit code 5 no tests collected.
             # Expected case when using beta flag.
             result = 0
 
+        return result, results
+
+    def _run_pytest_remote(self, cmds):
+        """
+        Run pytest on the instance using the uploaded test files.
+
+        The tests use the testinfra local backend so each check runs
+        on the instance without a round trip to the harness. The json
+        report is copied back once the session finishes.
+
+        Returns:
+            A tuple with the pytest exit code and json report.
+        """
+        output = ''
+        report = None
+        report_file = 'report-{0}.json'.format(ipa_utils.get_random_string())
+        command = (
+            'cd {test_dir} && python3 -m pytest {args} --json-report '
+            '--json-report-file={report_file} 2>&1'
+        ).format(
+            test_dir=self.remote_test_dir,
+            args=' '.join(shlex.quote(cmd) for cmd in cmds),
+            report_file=report_file
+        )
+
+        try:
+            client = self._get_ssh_client()
+            stdin, stdout, stderr = client.exec_command(command)
+            output = stdout.read().decode()
+            result = stdout.channel.recv_exit_status()
+        except Exception as error:
+            result = 3
+            self.logger.exception(str(error))
+        else:
+            with NamedTemporaryFile() as local_report:
+                try:
+                    ipa_utils.get_file(
+                        client,
+                        '/'.join([self.remote_test_dir, report_file]),
+                        local_report.name
+                    )
+                    report = ipa_utils.load_json(local_report.name)
+                except Exception as error:
+                    self.logger.debug(str(error))
+
+        with self._log_lock:
+            self._write_to_log(output)
+
+        return result, report
+
+    def _run_pytest_worker(self, cmds):
+        """
+        Run pytest in a process of the worker pool.
+
+        The output is written to the log in one block once finished.
+
+        Returns:
+            A tuple with the pytest exit code and json report.
+        """
+        output = ''
+        report = None
+
+        try:
+            result, report, output = self.worker_pool.run(cmds)
+        except Exception as error:
+            result = 3
+            self.logger.exception(str(error))
+
+        with self._log_lock:
+            self._write_to_log(output)
+
+        return result, report
+
+    def _run_pytest_session(self, cmds, isolated=False):
+        """
+        Run pytest on the instance in remote mode, in the worker pool,
+        in a child process if isolated or in process.
+        """
+        if self.remote_exec:
+            return self._run_pytest_remote(cmds)
+
+        if self.worker_pool:
+            return self._run_pytest_worker(cmds)
+
+        if isolated:
+            return self._run_pytest_subprocess(cmds)
+
+        return self._run_pytest(cmds)
+
+    @staticmethod
+    def _get_failed_nodeids(report):
+        """
+        Return the absolute node ids of failed tests in the report.
+
+        Node ids are relative to the pytest rootdir which may differ
+        from the current working directory.
+        """
+        if not report:
+            return []
+
+        root = report.get('root', '')
+        nodeids = [
+            test['nodeid'] for test in report.get('tests', [])
+            if test['outcome'] in ('failed', 'error')
+        ]
+        nodeids += [
+            collector['nodeid'] for collector in report.get('collectors', [])
+            if collector['outcome'] == 'failed' and collector['nodeid']
+        ]
+
+        return [os.path.join(root, nodeid) for nodeid in nodeids]
+
+    @staticmethod
+    def _merge_retry_report(report, retry_report):
+        """
+        Merge the outcome of re-run tests into the original report.
+
+        The retry outcome replaces the original outcome per node and
+        the test counts in the summary are recalculated.
+        """
+        retried = {test['nodeid']: test for test in retry_report['tests']}
+        tests = []
+
+        for test in report['tests']:
+            if test['nodeid'] in retried:
+                retry = retried.pop(test['nodeid'])
+                retry['retries'] = test.get('retries', 0) + 1
+                tests.append(retry)
+            else:
+                tests.append(test)
+
+        # Tests from files which previously failed collection
+        tests += retried.values()
+
+        collectors = {
+            collector['nodeid']: collector
+            for collector in report.get('collectors', [])
+        }
+        for collector in retry_report.get('collectors', []):
+            if collector['nodeid'] in collectors:
+                collectors[collector['nodeid']] = collector
+
+        summary = {
+            key: value for key, value in report['summary'].items()
+            if key in ('collected', 'deselected', 'duration')
+        }
+        summary['duration'] = summary.get('duration', 0) + \
+            retry_report['summary'].get('duration', 0)
+
+        for test in tests:
+            summary[test['outcome']] = summary.get(test['outcome'], 0) + 1
+
+        summary['total'] = len(tests)
+
+        report['tests'] = tests
+        report['collectors'] = list(collectors.values())
+        report['summary'] = summary
+        return report
+
+    def _process_collection_errors(self, report):
+        """
+        Add test files that failed collection to the report as errors.
+
+        When multiple test files run in one session a collection
+        error in one file does not prevent the others from running.
+        """
+        for collector in report.get('collectors', []):
+            if collector['outcome'] == 'failed' and collector['nodeid']:
+                report['tests'].append({
+                    'nodeid': collector['nodeid'],
+                    'outcome': 'error',
+                    'longrepr': collector.get('longrepr', '')
+                })
+
+                summary = report['summary']
+                summary['error'] = summary.get('error', 0) + 1
+                summary['total'] = summary.get('total', 0) + 1
+
+        return report
+
+    def _execute_cached_test(self, test, ssh_config, isolated=False):
+        """
+        Run the test on the image unless a cached result matches.
+
+        Results of passing test files are cached if the result cache
+        is enabled. Cached results are marked as cached and take no
+        time in the summary.
+
+        Returns:
+            A tuple with the pytest exit code and results dict.
+        """
+        key = None
+        if self.result_cache and isinstance(test, str):
+            key = get_cache_key(
+                self.image_id,
+                self.instance_type,
+                test,
+                self._get_markers()
+            )
+            results = self.result_cache.get(key)
+
+            if results:
+                self.logger.info(
+                    'Using cached results for test {name}'.format(name=test)
+                )
+
+                for item in results['tests']:
+                    item['cached'] = True
+
+                results['summary']['duration'] = 0
+                results['summary']['cached'] = len(results['tests'])
+                return 0, results
+
+        result, results = self._execute_test(test, ssh_config, isolated)
+
+        if key and result == 0:
+            with ipa_utils.ignored(IpaException, OSError):
+                self.result_cache.set(key, results)
+
+        return result, results
+
+    def _run_test(self, test, ssh_config):
+        """Run the test on the image."""
+        result, results = self._execute_cached_test(test, ssh_config)
+        self._merge_results(results)
         return result
 
+    def _run_test_batch(self, tests, ssh_config):
+        """
+        Run the test files in as few pytest sessions as possible.
+
+        If tests run in parallel the files are split into one
+        batch per concurrent session. Linked and conflicting test
+        files share a batch and exclusive test files run alone.
+        """
+        batches = ipa_utils.chunk_test_files(
+            tests,
+            self.parallel,
+            self.test_attributes
+        )
+
+        if len(batches) == 1:
+            return self._run_test(batches[0], ssh_config)
+
+        return self._run_tests_concurrently(batches, ssh_config)
+
+    def _run_tests_concurrently(self, tests, ssh_config):
+        """
+        Run the test files concurrently on the image.
+
+        The tests are run in child processes with at most parallel
+        running at once. Tests start as soon as the tests they require
+        have finished and no conflicting or exclusive test is running.
+        Results are merged in the original test order once all tests
+        finish. Each test may be a list of test files to run as a batch.
+        """
+        status = 0
+        results = {}
+        scheduler = TestScheduler(
+            tests,
+            self.test_attributes,
+            max_workers=self.parallel
+        )
+
+        with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+            futures = {}
+
+            while not scheduler.is_done():
+                if not (status and self.early_exit):
+                    for index, test in scheduler.get_ready():
+                        future = executor.submit(
+                            self._execute_cached_test, test, ssh_config, True
+                        )
+                        futures[future] = index
+
+                if not futures:
+                    # Early exit with no tests left running
+                    break
+
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    index = futures.pop(future)
+                    scheduler.finish(index)
+
+                    result, results[index] = future.result()
+                    status = status or result
+
+        for index in sorted(results):
+            self._merge_results(results[index])
+
+        return status
+
     def _save_results(self):
         """Save results dictionary to json file."""
         with open(self.results_file, 'w') as results_file:
@@ -446,21 +1157,161 @@ class IpaCloud(object):
     def _set_instance_ip(self):
         raise NotImplementedError(NOT_IMPLEMENTED)
 
-    def _set_results_dir(self):
-        """Create results directory if not exists."""
+    def _get_run_options(self):
+        """
+        Return the options of the test run saved in a checkpoint.
+
+        Every option which changes the tests run or their results is
+        included. Credentials are not saved.
+        """
+        return {
+            'cleanup': self.cleanup,
+            'description': self.description,
+            'distro_name': self.distro_name,
+            'early_exit': self.early_exit,
+            'history_log': self.history_log,
+            'image_id': self.image_id,
+            'inject': self.inject,
+            'instance_type': self.instance_type,
+            'region': self.region,
+            'running_instance_id': self.running_instance_id,
+            'ssh_private_key_file': self.ssh_private_key_file,
+            'ssh_user': self.ssh_user,
+            'test_dirs': ','.join(sorted(self.test_dirs)),
+            'no_default_test_dirs': True,
+            'test_attributes': self.test_attributes,
+            'timeout': self.timeout,
+            'collect_vm_info': self.collect_vm_info,
+            'retry_count': self.retry_count,
+            'beta': self.beta,
+            'parallel': self.parallel,
+            'batch': self.batch,
+            'ssh_multiplex': self.ssh_multiplex,
+            'remote_exec': self.remote_exec,
+            'order': self.order,
+            'cache': self.cache,
+            'cache_dir': self.cache_dir,
+            'pytest_workers': self.pytest_workers
+        }
+
+    def _check_checkpoint_options(self):
+        """
+        Confirm the options of the resumed run match the checkpoint.
+
+        Raises:
+            IpaCloudException: If an option differs from the checkpoint.
+        """
+        saved = self.checkpoint['options']
+        current = json.loads(json.dumps(self._get_run_options()))
+
+        changed = sorted(
+            key for key, value in saved.items()
+            if key in current and current[key] != value
+        )
+
+        if changed:
+            raise IpaCloudException(
+                'Options differ from the checkpoint of the test run: '
+                '{0}'.format(', '.join(changed))
+            )
+
+    def _load_checkpoint(self, path):
+        """
+        Load the checkpoint of an interrupted test run.
+
+        The path is the checkpoint, log or results file of the run.
+
+        Raises:
+            IpaCloudException: If the checkpoint cannot be loaded.
+        """
+        checkpoint_file = os.path.splitext(
+            os.path.expanduser(path)
+        )[0] + '.checkpoint'
+
+        try:
+            checkpoint = ipa_utils.load_json(checkpoint_file)
+        except (IOError, OSError, ValueError) as error:
+            raise IpaCloudException(
+                'Unable to load checkpoint for {0}: {1}'.format(path, error)
+            )
+
+        self.logger.debug('Using checkpoint file: %s' % checkpoint_file)
+        return checkpoint
+
+    def _save_checkpoint(self, test_items, position, status):
+        """
+        Save the state of the test run after each test item.
+
+        The checkpoint has the options and instance of the run, the
+        test items and the position of the next item, and the results
+        so far. The results file is updated with the same results.
+        """
+        checkpoint = {
+            'options': self._get_run_options(),
+            'instance_ip': self.instance_ip,
+            'host_key_fingerprint': self.host_key_fingerprint.decode(),
+            'time_stamp': self.time_stamp,
+            'log_file': self.log_file,
+            'results_file': self.results_file,
+            'test_items': test_items,
+            'position': position,
+            'status': status,
+            'results': self.results
+        }
+
+        with NamedTemporaryFile(
+            'w',
+            dir=self.results_dir,
+            suffix='.tmp',
+            delete=False
+        ) as f:
+            json.dump(checkpoint, f)
+
+        os.replace(f.name, self.checkpoint_file)
+        self._save_results()
+
+    def _restore_checkpoint(self):
+        """Continue the results and log files of the checkpoint."""
+        self.time_stamp = self.checkpoint['time_stamp']
+        self.log_file = self.checkpoint['log_file']
+        self.results_file = self.checkpoint['results_file']
+        self.results_dir = os.path.dirname(self.results_file)
+        self.checkpoint_file = os.path.splitext(
+            self.results_file
+        )[0] + '.checkpoint'
+
+        results = self.checkpoint['results']
+        self.results = {
+            'info': results['info'],
+            'tests': results['tests'],
+            'summary': defaultdict(int, results['summary'])
+        }
+
+        self._write_to_log(
+            'Resuming test run at test item {position}'.format(
+                position=self.checkpoint['position']
+            )
+        )
+
+    def _get_results_dir(self):
+        """Return the results directory for the instance."""
         if self.running_instance_id:
-            self.results_dir = os.path.join(
+            return os.path.join(
                 self.results_dir,
                 self.cloud,
                 self.image_id,
                 self.running_instance_id
             )
-        else:
-            self.results_dir = os.path.join(
-                self.results_dir,
-                self.cloud,
-                self.instance_ip
-            )
+
+        return os.path.join(
+            self.results_dir,
+            self.cloud,
+            self.instance_ip
+        )
+
+    def _set_results_dir(self):
+        """Create results directory if not exists."""
+        self.results_dir = self._get_results_dir()
 
         try:
             os.makedirs(self.results_dir)
@@ -481,10 +1332,23 @@ class IpaCloud(object):
         )
         self.logger.debug('Created results file %s' % self.results_file)
 
+        self.checkpoint_file = ''.join(
+            [self.results_dir, os.sep, self.time_stamp, '.checkpoint']
+        )
+
     def _start_instance(self):
         """Start the instance."""
         raise NotImplementedError(NOT_IMPLEMENTED)
 
+    def _set_running_instance(self, instance_id):
+        """
+        Use the existing instance with instance_id.
+
+        Clouds which derive resource names from the instance id
+        set them here the same way as for running_instance_id.
+        """
+        self.running_instance_id = instance_id
+
     def _start_instance_if_stopped(self):
         """Start instance if stopped."""
         if not self._is_instance_running():
@@ -517,22 +1381,55 @@ class IpaCloud(object):
             test_log=self.log_file
         )
 
-    def _wait_on_instance(self, state, timeout=600, wait_period=10):
-        """Wait until instance is in given state."""
-        current_state = 'Undefined'
+    def _get_state_waiter(self, state):
+        """
+        Return a native waiter for the given state if one exists.
+
+        The waiter is called with the timeout in seconds and blocks
+        until the cloud reports the transition is complete.
+        """
+        return None
+
+    def _wait_on_instance(self, state, timeout=600, waiter=None):
+        """
+        Wait until instance is in given state.
+
+        A native waiter for the transition is used first when available.
+        The instance state is then polled with exponential backoff
+        starting with an immediate probe. The duration of each
+        transition is recorded in instance_transitions.
+        """
         start = time.time()
-        end = start + timeout
+        waiter = waiter or self._get_state_waiter(state)
+
+        if waiter:
+            waiter(timeout)
 
-        while time.time() < end:
-            time.sleep(wait_period)
+        def in_state():
+            current_state = self._get_instance_state() or 'Undefined'
+            return state.lower() == current_state.lower()
 
-            current_state = self._get_instance_state()
-            if state.lower() == current_state.lower():
-                return
+        try:
+            ipa_utils.poll(
+                in_state,
+                timeout=max(0, timeout - (time.time() - start))
+            )
+        except IpaUtilsException:
+            raise IpaCloudException(
+                'Instance has not arrived at the given state: {state}'.format(
+                    state=state
+                )
+            )
 
-        raise IpaCloudException(
-            'Instance has not arrived at the given state: {state}'.format(
-                state=state
+        duration = time.time() - start
+        self.instance_transitions.append({
+            'state': state,
+            'duration': round(duration, 2)
+        })
+        self.logger.debug(
+            'Instance arrived at state {state} in {duration:.2f}s'.format(
+                state=state,
+                duration=duration
             )
         )
 
@@ -569,7 +1466,7 @@ class IpaCloud(object):
         self._start_instance()
         self._set_instance_ip()
         self.logger.debug('IP of instance: %s' % self.instance_ip)
-        ipa_utils.clear_cache()
+        self.session.clear_cache()
 
     def install_package(self, client, package):
         """
@@ -670,6 +1567,42 @@ class IpaCloud(object):
         else:
             return file_name
 
+    def _acquire_pool_instance(self):
+        """
+        Use a pre-launched instance from the instance pool.
+
+        Returns:
+            True if a matching instance was acquired.
+        """
+        pool = InstancePool(self.pool_file)
+        instance_id = pool.acquire(
+            self.cloud,
+            self.image_id,
+            self.instance_type,
+            self.region
+        )
+
+        if not instance_id:
+            self.logger.info('No pooled instance available')
+            return False
+
+        self._set_running_instance(instance_id)
+        self.logger.info('Using pooled instance %s' % instance_id)
+
+        try:
+            self._start_instance_if_stopped()
+        except Exception as error:
+            self.logger.warning(
+                'Pooled instance %s unavailable: %s' % (instance_id, error)
+            )
+            with ipa_utils.ignored(Exception):
+                self._terminate_instance()
+
+            self.running_instance_id = None
+            return False
+
+        return True
+
     def _cleanup_instance(self, status):
         """
         Cleanup instance based on arguments.
@@ -702,16 +1635,12 @@ class IpaCloud(object):
         """
         raise NotImplementedError(NOT_IMPLEMENTED)
 
-    def test_image(self):
+    def prepare_instance(self):
         """
-        The entry point for testing an image.
-
-        Creates new or initiates existing instance. Runs
-        test suite on instance. Collects and returns
-        results in json format.
+        Launch new or initiate existing instance for testing.
 
-        Returns:
-            A tuple with the exit code and results json.
+        This is the first step of test_image and can be run ahead
+        of time, for example while another image is being tested.
         """
         self._set_distro()
 
@@ -724,9 +1653,13 @@ class IpaCloud(object):
             self._set_image_id()
 
             # With a running instance default to no cleanup
-            # if a value has not been provided.
-            if self.cleanup is None:
+            # if a value has not been provided. A resumed run
+            # cleans up the instance it launched.
+            if self.cleanup is None and not self.checkpoint:
                 self.cleanup = False
+        elif self.use_pool and self._acquire_pool_instance():
+            # Pooled instances are cleaned up the same as new instances
+            pass
         else:
             # Launch new instance
             self.logger.info('Launching new instance')
@@ -743,9 +1676,31 @@ class IpaCloud(object):
             self._set_instance_ip()
             self.logger.debug('IP of instance: %s' % self.instance_ip)
 
-        self._set_results_dir()
-        self._update_history()
-        self._log_info()
+        self.instance_prepared = True
+
+    def test_image(self):
+        """
+        The entry point for testing an image.
+
+        Creates new or initiates existing instance. Runs
+        test suite on instance. Collects and returns
+        results in json format.
+
+        Returns:
+            A tuple with the exit code and results json.
+        """
+        if not self.instance_prepared:
+            self.prepare_instance()
+
+        # The instance is cleaned up after testing
+        self.instance_prepared = False
+
+        if self.checkpoint:
+            self._restore_checkpoint()
+        else:
+            self._set_results_dir()
+            self._update_history()
+            self._log_info()
 
         try:
             # Ensure instance running and SSH connection
@@ -773,142 +1728,236 @@ class IpaCloud(object):
 
             raise IpaCloudException(msg)
 
-        instance_reachable = True
+        try:
+            if self.checkpoint and self.host_key_fingerprint.decode() != \
+                    self.checkpoint['host_key_fingerprint']:
+                msg = (
+                    'Host key has changed since the test run '
+                    'was interrupted.'
+                )
+                self._write_to_log(msg)
+                raise IpaCloudException(msg)
 
-        if self.inject:
-            self.process_injection_file(self._get_ssh_client())
+            instance_reachable = True
 
-        status = 0
-        with ipa_utils.ssh_config(self.ssh_user, self.ssh_private_key_file)\
-                as ssh_config:
-            for item in self.test_files:
-                if item == 'test_hard_reboot' and self.cloud != 'ssh':
-                    self.logger.info('Testing hard reboot')
-                    start = time.time()
-                    result = 1
-
-                    try:
-                        self.hard_reboot_instance()
-                        client = self._get_ssh_client()
-
-                        if self.host_key_fingerprint != \
-                                ipa_utils.get_host_key_fingerprint(client):
-                            raise Exception('Host key has changed.')
-
-                        result = 0
-                    except IpaSSHException as error:
-                        self.logger.error(
-                            'Unable to connect to instance after '
-                            'hard reboot: %s' % error
-                        )
-                        instance_reachable = False
-                        break
-                    except Exception as error:
-                        self.logger.error(
-                            'Instance failed hard reboot: %s' % error
-                        )
-                        instance_reachable = False
-                        break
-                    finally:
-                        duration = time.time() - start
-                        self._process_test_results(
-                            duration, 'test_hard_reboot', result
-                        )
-                        status = status or result
+            if self.inject and not self.checkpoint:
+                # Injection already happened before the checkpoint
+                self.process_injection_file(self._get_ssh_client())
 
-                elif item == 'test_soft_reboot':
-                    self.logger.info('Testing soft reboot')
-                    start = time.time()
-                    result = 1
+            if self.remote_exec:
+                self._upload_tests(self._get_ssh_client())
 
-                    try:
-                        self.distro.reboot(self._get_ssh_client())
-                        time.sleep(3)
-                        client = self._get_ssh_client()
+            if self.cache:
+                self.result_cache = ResultCache(
+                    self.cache_dir,
+                    self.cache_size
+                )
 
-                        if self.host_key_fingerprint != \
-                                ipa_utils.get_host_key_fingerprint(client):
-                            raise Exception('Host key has changed.')
+            if self.pytest_workers and not self.remote_exec:
+                self.worker_pool = PytestWorkerPool(
+                    self.parallel,
+                    self.pytest_worker_max_sessions,
+                    self.pytest_worker_max_rss,
+                    self.pytest_worker_timeout
+                )
 
-                        result = 0
-                    except IpaSSHException as error:
-                        self.logger.error(
-                            'Unable to connect to instance after '
-                            'soft reboot: %s' % error
-                        )
-                        instance_reachable = False
-                        break
-                    except Exception as error:
-                        self.logger.error(
-                            'Instance failed soft reboot: %s' % error
-                        )
-                        instance_reachable = False
-                        break
-                    finally:
-                        duration = time.time() - start
-                        self._process_test_results(
-                            duration, 'test_soft_reboot', result
-                        )
-                        status = status or result
+            if self.checkpoint:
+                test_items = self.checkpoint['test_items']
+                start_position = self.checkpoint['position']
+                status = self.checkpoint['status']
+            else:
+                test_items = self._order_test_files(self.test_files)
+
+                if self.parallel > 1 or self.batch:
+                    test_items = ipa_utils.group_test_files(test_items)
+
+                start_position = 0
+                status = 0
+
+            # No master connection is needed if every test file runs
+            # in process on the session client
+            in_process = self.parallel <= 1 and not self.worker_pool
+            multiplex = self.ssh_multiplex and not self.remote_exec and \
+                not self._uses_session_client(in_process)
+
+            with ipa_utils.ssh_config(
+                self.ssh_user,
+                self.ssh_private_key_file,
+                multiplex=multiplex
+            ) as ssh_config:
+                if multiplex and not ipa_utils.start_ssh_master(
+                    self.instance_ip,
+                    ssh_config
+                ):
+                    self.logger.debug(
+                        'Unable to open SSH master connection, '
+                        'tests will connect individually.'
+                    )
 
-                elif item == 'test_update':
-                    self.logger.info('Testing update')
-                    start = time.time()
-                    result = 1
-
-                    try:
-                        out = self.distro.update(self._get_ssh_client())
-                        result = 0
-                    except Exception as error:
-                        self.logger.error('Instance failed to update')
-                        self.logger.debug(error)
-                    else:
-                        self._write_to_log(out)
-                    finally:
-                        duration = time.time() - start
-                        self._process_test_results(
-                            duration, 'test_update', result
-                        )
+                for position, item in enumerate(test_items):
+                    if position < start_position:
+                        # Completed before the run was interrupted
+                        continue
+
+                    if item == 'test_hard_reboot' and self.cloud != 'ssh':
+                        self.logger.info('Testing hard reboot')
+                        start = time.time()
+                        result = 1
+
+                        try:
+                            self.hard_reboot_instance()
+                            client = self._get_ssh_client()
+
+                            if self.host_key_fingerprint != \
+                                    ipa_utils.get_host_key_fingerprint(client):
+                                raise Exception('Host key has changed.')
+
+                            result = 0
+                        except IpaSSHException as error:
+                            self.logger.error(
+                                'Unable to connect to instance after '
+                                'hard reboot: %s' % error
+                            )
+                            instance_reachable = False
+                            break
+                        except Exception as error:
+                            self.logger.error(
+                                'Instance failed hard reboot: %s' % error
+                            )
+                            instance_reachable = False
+                            break
+                        finally:
+                            duration = time.time() - start
+                            self._process_test_results(
+                                duration, 'test_hard_reboot', result
+                            )
+                            status = status or result
+
+                    elif item == 'test_soft_reboot':
+                        self.logger.info('Testing soft reboot')
+                        start = time.time()
+                        result = 1
+
+                        try:
+                            self.distro.reboot(self._get_ssh_client())
+                            self.session.clear_cache(self.instance_ip)
+                            time.sleep(3)
+                            client = self._get_ssh_client()
+
+                            if self.host_key_fingerprint != \
+                                    ipa_utils.get_host_key_fingerprint(client):
+                                raise Exception('Host key has changed.')
+
+                            result = 0
+                        except IpaSSHException as error:
+                            self.logger.error(
+                                'Unable to connect to instance after '
+                                'soft reboot: %s' % error
+                            )
+                            instance_reachable = False
+                            break
+                        except Exception as error:
+                            self.logger.error(
+                                'Instance failed soft reboot: %s' % error
+                            )
+                            instance_reachable = False
+                            break
+                        finally:
+                            duration = time.time() - start
+                            self._process_test_results(
+                                duration, 'test_soft_reboot', result
+                            )
+                            status = status or result
+
+                    elif item == 'test_update':
+                        self.logger.info('Testing update')
+                        start = time.time()
+                        result = 1
+
+                        try:
+                            out = self.distro.update(self._get_ssh_client())
+                            result = 0
+                        except Exception as error:
+                            self.logger.error('Instance failed to update')
+                            self.logger.debug(error)
+                        else:
+                            self._write_to_log(out)
+                        finally:
+                            duration = time.time() - start
+                            self._process_test_results(
+                                duration, 'test_update', result
+                            )
+                            status = status or result
+
+                    elif item == 'test_refresh':
+                        self.logger.info('Testing refresh')
+                        start = time.time()
+                        result = 1
+
+                        try:
+                            out = self.distro.repo_refresh(
+                                self._get_ssh_client()
+                            )
+                            result = 0
+                        except Exception as error:
+                            self.logger.error('Instance failed to refresh')
+                            self.logger.debug(error)
+                        else:
+                            self._write_to_log(out)
+                        finally:
+                            duration = time.time() - start
+                            self._process_test_results(
+                                duration, 'test_refresh', result
+                            )
+                            status = status or result
+
+                    elif isinstance(item, str):
+                        # Run tests
+                        result = self._run_test(item, ssh_config)
+                        status = status or result
+                    elif isinstance(item, list) and self.batch:
+                        # Run group of tests between sync points in batches
+                        result = self._run_test_batch(item, ssh_config)
+                        status = status or result
+                    elif isinstance(item, list):
+                        # Run group of tests between sync points
+                        result = self._run_tests_concurrently(item, ssh_config)
                         status = status or result
-
-                elif item == 'test_refresh':
-                    self.logger.info('Testing refresh')
-                    start = time.time()
-                    result = 1
-
-                    try:
-                        out = self.distro.repo_refresh(self._get_ssh_client())
-                        result = 0
-                    except Exception as error:
-                        self.logger.error('Instance failed to refresh')
-                        self.logger.debug(error)
                     else:
-                        self._write_to_log(out)
-                    finally:
-                        duration = time.time() - start
-                        self._process_test_results(
-                            duration, 'test_refresh', result
+                        self.logger.error(
+                            'Invalid test item in list: %s' % item
                         )
-                        status = status or result
 
-                elif isinstance(item, str):
-                    # Run tests
-                    result = self._run_test(item, ssh_config)
-                    status = status or result
-                else:
-                    self.logger.error(
-                        'Invalid test item in list: %s' % item
-                    )
+                    self._save_checkpoint(test_items, position + 1, status)
 
-                if status and self.early_exit:
-                    break
+                    if status and self.early_exit:
+                        break
+
+            # flag set to collect VM info
+            if self.collect_vm_info and instance_reachable:
+                self._collect_vm_info()
+        except Exception:
+            # Do not leave the tests or the instance behind if testing
+            # fails
+            self._remove_remote_tests()
 
-        # flag set to collect VM info
-        if self.collect_vm_info and instance_reachable:
-            self._collect_vm_info()
+            with ipa_utils.ignored(Exception):
+                self._cleanup_instance(1)
+
+            raise
+        finally:
+            if self.worker_pool:
+                self.worker_pool.close()
+                self.worker_pool = None
+
+            self._remove_remote_tests()
+            self.session.close()
 
         self._cleanup_instance(status)
         self._save_results()
 
+        with ipa_utils.ignored(OSError):
+            os.remove(self.checkpoint_file)
+
         # Return status and results json
         return status, self.results
@@ -28,11 +28,14 @@ NOT_IMPLEMENTED = 'Implement method in child classes.'
 SUPPORTED_DISTROS = ('opensuse_leap', 'sles', 'sle_micro', 'rhel', 'fedora')
 SUPPORTED_CLOUDS = ('aliyun', 'azure', 'ec2', 'gce', 'ssh')
 SUPPORTED_ARCHITECTURES = ('x86_64', 'arm64')
+SUPPORTED_TEST_ORDERS = ('default', 'duration', 'failed')
+SUPPORTED_SSH_BACKENDS = ('paramiko', 'asyncssh')
 
 AZURE_DEFAULT_TYPE = 'Standard_B1ms'
 AZURE_DEFAULT_USER = 'azureuser'
 EC2_DEFAULT_TYPE = 't2.micro'
 EC2_DEFAULT_USER = 'ec2-user'
+EC2_WAITER_DELAY = 5
 GCE_DEFAULT_TYPE = 'n1-standard-1'
 GCE_DEFAULT_USER = 'gceuser'
 ALIYUN_DEFAULT_TYPE = 'ecs.t5-lc1m1.small'
@@ -43,6 +46,22 @@ IPA_CONFIG_FILE = os.path.join(HOME, '.config', 'img_proof', 'config')
 
 IPA_HISTORY_FILE = os.path.join(HOME, '.config', 'img_proof', '.history')
 IPA_RESULTS_PATH = os.path.join(HOME, 'img_proof', 'results')
+IPA_POOL_FILE = os.path.join(HOME, '.config', 'img_proof', 'pool.json')
+IPA_CACHE_PATH = os.path.join(HOME, '.cache', 'img_proof', 'results')
+IPA_CACHE_SIZE = 100
+IPA_JOB_STORE = os.path.join(HOME, '.config', 'img_proof', 'jobs.db')
+POOL_PREFIX_NAME = 'img-proof-pool'
+
+MATRIX_DEFAULT_WORKERS = 4
+TEST_IMAGES_DEFAULT_WORKERS = 4
+SERVE_DEFAULT_HOST = '127.0.0.1'
+SERVE_DEFAULT_PORT = 8390
+SERVE_DEFAULT_WORKERS = 4
+ASYNC_CANCEL_TIMEOUT = 120
+PYTEST_WORKER_MAX_SESSIONS = 20
+PYTEST_WORKER_MAX_RSS = 1024
+PYTEST_WORKER_TIMEOUT = 3600
+SSH_CONTROL_PERSIST = 600
 
 BASH_SSH_SCRIPT = '''#cloud-config
 disable_root: true
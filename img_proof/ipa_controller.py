@@ -20,23 +20,45 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import inspect
 import json
+import logging
 import os
 import pytest
 import shlex
+import time
+
+from collections import deque
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed
+)
+from datetime import datetime
 
 from img_proof.collect_items import CollectItemsPlugin
 from img_proof.ipa_azure import AzureCloud
-from img_proof.ipa_constants import TEST_PATHS
+from img_proof.ipa_constants import (
+    POOL_PREFIX_NAME,
+    TEST_IMAGES_DEFAULT_WORKERS,
+    TEST_PATHS
+)
 from img_proof.ipa_ec2 import EC2Cloud
 from img_proof.ipa_exceptions import IpaControllerException
 from img_proof.ipa_gce import GCECloud
+from img_proof.ipa_pool import InstancePool
 from img_proof.ipa_ssh import SSHCloud
 from img_proof.ipa_aliyun import AliyunCloud
-from img_proof.ipa_utils import get_test_files
+from img_proof.ipa_scheduler import sort_test_files
+from img_proof.ipa_utils import (
+    get_test_durations,
+    get_test_files,
+    ignored,
+    split_test_files
+)
 
 
-def test_image(
+def get_cloud(
     cloud_name,
     accelerated_networking=None,
     access_key_id=None,
@@ -92,8 +114,20 @@ def test_image(
     cpu_options=None,
     instance_options=None,
     include_plan_information=None,
+    parallel=None,
+    batch=None,
+    use_pool=None,
+    pool_file=None,
+    ssh_multiplex=None,
+    remote_exec=None,
+    order=None,
+    cache=None,
+    cache_dir=None,
+    resume=None,
+    pytest_workers=None,
+    test_attributes=None,
 ):
-    """Creates a cloud framework instance and initiates testing."""
+    """Creates a cloud framework instance."""
     kwargs = {
         'cleanup': cleanup,
         'config': config,
@@ -125,7 +159,19 @@ def test_image(
         'root_disk_size': root_disk_size,
         'beta': beta,
         'exclude': exclude,
-        'instance_options': instance_options
+        'instance_options': instance_options,
+        'parallel': parallel,
+        'batch': batch,
+        'use_pool': use_pool,
+        'pool_file': pool_file,
+        'ssh_multiplex': ssh_multiplex,
+        'remote_exec': remote_exec,
+        'order': order,
+        'cache': cache,
+        'cache_dir': cache_dir,
+        'resume': resume,
+        'pytest_workers': pytest_workers,
+        'test_attributes': test_attributes
     }
 
     cloud_name = cloud_name.lower()
@@ -178,9 +224,360 @@ def test_image(
             'Cloud framework: %s unavailable.' % cloud_name
         )
 
+    return cloud
+
+
+def test_image(*args, shards=None, **kwargs):
+    """
+    Creates a cloud framework instance and initiates testing.
+
+    Accepts the same arguments as get_cloud. If shards is greater
+    than one the test files are split across that many instances
+    of the image.
+    """
+    cloud = get_cloud(*args, **kwargs)
+
+    if shards and shards > 1:
+        arguments = inspect.signature(get_cloud).bind(*args, **kwargs)
+        return test_image_shards(cloud, shards, arguments.arguments)
+
     return cloud.test_image()
 
 
+def _run_test_image(kwargs):
+    """
+    Test a single image and return the status and results.
+
+    Runs in a worker process, exceptions are captured so the
+    other runs in the pool finish.
+    """
+    try:
+        return test_image(**kwargs)
+    except Exception as error:
+        return 1, get_error_results(error)
+
+
+def test_image_shards(cloud, shards, kwargs):
+    """
+    Split the test files of cloud across shards instances and merge.
+
+    The test files are balanced using the durations of previous runs
+    in the history log. Each shard launches a new instance of the
+    image in a worker process and writes the usual log and results
+    files. The merged results are written to a results file in the
+    shards directory of the image.
+
+    Returns:
+        A tuple with the exit code and merged results json.
+    """
+    if cloud.cloud == 'ssh' or cloud.running_instance_id:
+        raise IpaControllerException(
+            'Shards require launching new instances of an image.'
+        )
+
+    logger = logging.getLogger('img_proof')
+
+    test_files = cloud.test_files
+    if cloud.test_attributes:
+        test_files = sort_test_files(test_files, cloud.test_attributes)
+
+    test_shards = split_test_files(
+        test_files,
+        shards,
+        get_test_durations(cloud.history_log),
+        cloud.test_attributes
+    )
+
+    if len(test_shards) < 2:
+        return cloud.test_image()
+
+    logger.info('Testing image in {0} shards'.format(len(test_shards)))
+
+    time_stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    results_file = os.path.join(
+        cloud.results_dir,
+        cloud.cloud,
+        cloud.image_id,
+        'shards',
+        '{0}.results'.format(time_stamp)
+    )
+
+    start = time.time()
+    shard_kwargs = []
+    for test_shard in test_shards:
+        args = dict(kwargs)
+        # Full paths so each shard runs exactly the files of its split,
+        # the paths are not expanded from descriptions again so the
+        # scheduling attributes are passed along
+        args['tests'] = list(test_shard)
+        args['test_attributes'] = {
+            test: cloud.test_attributes[test] for test in test_shard
+            if test in cloud.test_attributes
+        }
+        shard_kwargs.append(args)
+
+    with ProcessPoolExecutor(max_workers=len(shard_kwargs)) as executor:
+        runs = list(executor.map(_run_test_image, shard_kwargs))
+
+    results = {
+        'info': {
+            'platform': cloud.cloud,
+            'distro': cloud.distro_name,
+            'image': cloud.image_id,
+            'region': cloud.region,
+            'timestamp': time_stamp,
+            'results_file': results_file,
+            'shards': []
+        },
+        'tests': [],
+        'summary': {}
+    }
+
+    status = 0
+    for args, (shard_status, shard_results) in zip(shard_kwargs, runs):
+        info = shard_results.get('info', {})
+        shard = {
+            'tests': args['tests'],
+            'status': shard_status,
+            'instance': info.get('instance'),
+            'log_file': info.get('log_file'),
+            'results_file': info.get('results_file'),
+            'summary': dict(shard_results.get('summary', {}))
+        }
+
+        if shard_results.get('error'):
+            shard['error'] = shard_results['error']
+
+        results['info']['shards'].append(shard)
+        results['tests'] += shard_results.get('tests', [])
+
+        for key, value in shard['summary'].items():
+            results['summary'][key] = results['summary'].get(key, 0) + value
+
+        status = status or shard_status
+
+    results['summary']['duration'] = time.time() - start
+
+    results_dir = os.path.dirname(results_file)
+    try:
+        os.makedirs(results_dir, exist_ok=True)
+    except OSError as error:
+        raise IpaControllerException(
+            'Unable to create shards results directory: %s' % error
+        )
+
+    with open(results_file, 'w') as f:
+        json.dump(results, f)
+
+    return status, results
+
+
+def get_error_results(error):
+    """Return a results dict for a test run which raised an exception."""
+    return {
+        'tests': [],
+        'summary': {'duration': 0, 'error': 1, 'total': 0},
+        'error': '{}: {}'.format(type(error).__name__, error)
+    }
+
+
+def test_images(specs, max_workers=None):
+    """
+    Test images concurrently and yield the results of each run.
+
+    Each spec is a dict of test_image keyword arguments. Every run
+    happens in a separate worker process so the SSH client cache
+    and logger are not shared between runs. An exception raised by
+    a run is returned as error results.
+
+    Yields:
+        A tuple of (spec, status, results) in the order the runs
+        finish.
+    """
+    specs = list(specs)
+    max_workers = max_workers or TEST_IMAGES_DEFAULT_WORKERS
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_run_test_image, spec): spec for spec in specs
+        }
+
+        try:
+            for future in as_completed(futures):
+                try:
+                    status, results = future.result()
+                except Exception as error:
+                    status, results = 1, get_error_results(error)
+
+                yield futures[future], status, results
+        finally:
+            # Runs which have not started are dropped if the
+            # caller stops iterating early.
+            for future in futures:
+                future.cancel()
+
+
+def test_images_pipelined(specs, max_in_flight=2):
+    """
+    Test a queue of images while launching upcoming instances.
+
+    Each spec is a dict of get_cloud keyword arguments. Images are
+    tested one after another but the instances for the next specs
+    are launched in the background while the current image is
+    tested. At most max_in_flight instances exist at any time.
+
+    Yields:
+        A tuple of (spec, status, results) for each spec in order.
+    """
+    if max_in_flight < 1:
+        raise IpaControllerException(
+            'At least one instance must be allowed in flight.'
+        )
+
+    # All clouds are created up front so invalid specs are
+    # found before any instance is launched.
+    queue = deque()
+    for spec in specs:
+        try:
+            queue.append((spec, get_cloud(**spec), None))
+        except Exception as error:
+            queue.append((spec, None, error))
+
+    pending = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            while queue or pending:
+                while queue and len(pending) < max_in_flight:
+                    spec, cloud, error = queue.popleft()
+                    future = None
+
+                    if cloud:
+                        future = executor.submit(cloud.prepare_instance)
+
+                    pending.append((spec, cloud, error, future))
+
+                spec, cloud, error, future = pending.popleft()
+                try:
+                    if error:
+                        raise error
+
+                    future.result()
+                    status, results = cloud.test_image()
+                except Exception as error:
+                    status, results = 1, get_error_results(error)
+
+                yield spec, status, results
+    finally:
+        # Terminate launched instances if the queue is abandoned
+        for spec, cloud, error, future in pending:
+            if not future:
+                continue
+
+            with ignored(Exception):
+                future.result()
+
+                if cloud.instance_prepared and cloud.cleanup is not False:
+                    cloud._terminate_instance()
+
+
+def fill_pool(size, ttl=None, pool_file=None, **kwargs):
+    """
+    Launch instances until the pool has size matching instances.
+
+    The kwargs are the same as get_cloud and describe the image,
+    instance type and region of the pooled instances. Instances
+    are named with the pool prefix to identify them in the cloud.
+
+    Returns:
+        A list of the launched instance ids.
+    """
+    logger = logging.getLogger('img_proof')
+    pool = InstancePool(pool_file)
+    kwargs.setdefault('prefix_name', POOL_PREFIX_NAME)
+
+    cloud = get_cloud(**kwargs)
+    available = pool.count(
+        cloud.cloud,
+        cloud.image_id,
+        cloud.instance_type,
+        cloud.region
+    )
+
+    launched = []
+    for index in range(size - available):
+        if index:
+            cloud = get_cloud(**kwargs)
+
+        logger.info('Launching pool instance')
+        try:
+            cloud._launch_instance()
+        except Exception:
+            with ignored(Exception):
+                cloud._terminate_instance()
+            raise
+
+        pool.add(
+            cloud.cloud,
+            cloud.image_id,
+            cloud.instance_type,
+            cloud.region,
+            cloud.running_instance_id,
+            distro=cloud.distro_name,
+            ttl=ttl
+        )
+        launched.append(cloud.running_instance_id)
+
+    return launched
+
+
+def reap_pool(cloud_name, pool_file=None, reap_all=False, **kwargs):
+    """
+    Terminate expired instances in the pool.
+
+    If reap_all is True all instances for the cloud are terminated.
+    The kwargs are the same as get_cloud and provide the credentials
+    used to terminate the instances.
+
+    Returns:
+        A list of the terminated instance ids.
+    """
+    logger = logging.getLogger('img_proof')
+    pool = InstancePool(pool_file)
+
+    if reap_all:
+        entries = [
+            entry for entry in pool.list_entries()
+            if entry['cloud'] == cloud_name.lower()
+        ]
+    else:
+        entries = pool.get_expired(cloud_name.lower())
+
+    terminated = []
+    for entry in entries:
+        args = dict(kwargs)
+        args.update({
+            'distro': entry['distro'] or args.get('distro'),
+            'region': entry['region'],
+            'running_instance_id': entry['instance_id']
+        })
+
+        try:
+            cloud = get_cloud(cloud_name, **args)
+            cloud._terminate_instance()
+        except Exception as error:
+            logger.error(
+                'Unable to terminate pool instance {id}: {error}'.format(
+                    id=entry['instance_id'],
+                    error=error
+                )
+            )
+        else:
+            pool.remove(entry['instance_id'])
+            terminated.append(entry['instance_id'])
+
+    return terminated
+
+
 def collect_results(results_file):
     """Return the result (pass/fail) for json file."""
     with open(results_file, 'r') as results:
@@ -161,7 +161,6 @@ class Distro(object):
             raise IpaDistroException(
                 'An error occurred rebooting instance: %s' % error
             )
-        ipa_utils.clear_cache()
 
     def update(self, client):
         """Execute update command on instance."""
@@ -24,17 +24,24 @@ import boto3
 import os
 import time
 
+from botocore.exceptions import WaiterError
 from collections import ChainMap, defaultdict
 
 from img_proof import ipa_utils
 from img_proof.ipa_constants import (
     EC2_CONFIG_FILE,
     EC2_DEFAULT_TYPE,
-    EC2_DEFAULT_USER
+    EC2_DEFAULT_USER,
+    EC2_WAITER_DELAY
 )
 from img_proof.ipa_exceptions import EC2CloudException
 from img_proof.ipa_cloud import IpaCloud
 
+STATE_WAITERS = {
+    'running': 'instance_running',
+    'stopped': 'instance_stopped'
+}
+
 
 class EC2Cloud(IpaCloud):
     """Cloud framework class for testing AWS EC2 images."""
@@ -118,12 +125,14 @@ class EC2Cloud(IpaCloud):
         """Connect to ec2 resource."""
         resource = None
         try:
-            resource = boto3.resource(
-                'ec2',
+            # A session per connection is thread safe unlike the
+            # default session used by boto3.resource.
+            session = boto3.session.Session(
                 aws_access_key_id=self.access_key_id,
                 aws_secret_access_key=self.secret_access_key,
                 region_name=self.region
             )
+            resource = session.resource('ec2')
             # boto3 resource is lazy so attempt method to test connection
             resource.meta.client.describe_account_attributes()
         except Exception:
@@ -181,6 +190,37 @@ class EC2Cloud(IpaCloud):
 
         return state
 
+    def _get_state_waiter(self, state):
+        """
+        Return a boto3 waiter function for the given instance state.
+
+        The waiter probes immediately and then at a fixed short delay
+        which avoids overshooting the transition by a full poll period.
+        """
+        waiter_name = STATE_WAITERS.get(state)
+
+        if not waiter_name:
+            return None
+
+        def wait(timeout):
+            waiter = self._connect().meta.client.get_waiter(waiter_name)
+
+            try:
+                waiter.wait(
+                    InstanceIds=[self.running_instance_id],
+                    WaiterConfig={
+                        'Delay': EC2_WAITER_DELAY,
+                        'MaxAttempts': max(1, timeout // EC2_WAITER_DELAY)
+                    }
+                )
+            except WaiterError as error:
+                raise EC2CloudException(
+                    'Instance has not arrived at the given state: '
+                    '{state}: {error}'.format(state=state, error=error)
+                )
+
+        return wait
+
     def _is_instance_running(self):
         """
         Return True if instance is in running state.
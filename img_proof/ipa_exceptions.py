@@ -95,3 +95,31 @@ class LibcloudException(IpaCloudException):
 
 class AliyunCloudException(IpaCloudException):
     """Generic Aliyun exception."""
+
+
+class IpaMatrixException(IpaException):
+    """Generic exception for img_proof matrix module."""
+
+
+class IpaPoolException(IpaException):
+    """Generic exception for img_proof instance pool."""
+
+
+class IpaSchedulerException(IpaException):
+    """Generic exception for img_proof test scheduler."""
+
+
+class IpaCacheException(IpaException):
+    """Generic exception for img_proof result cache."""
+
+
+class IpaServerException(IpaException):
+    """Generic exception for img_proof service."""
+
+
+class IpaJobStoreException(IpaException):
+    """Generic exception for img_proof job store."""
+
+
+class IpaWorkerException(IpaException):
+    """Generic exception for img_proof pytest workers."""
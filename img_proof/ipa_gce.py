@@ -489,11 +489,12 @@ class GCECloud(IpaCloud):
                 )
             ) from error
 
-        self.wait_for_extended_operation(operation, 'instance creation')
-
         self._wait_on_instance(
             'RUNNING',
-            timeout=self.timeout
+            timeout=self.timeout,
+            waiter=lambda timeout: self.wait_for_extended_operation(
+                operation, 'instance creation', timeout
+            )
         )
 
     def _set_image_id(self):
@@ -566,7 +567,7 @@ class GCECloud(IpaCloud):
 
     def _start_instance(self):
         """Start the instance."""
-        self.instances_client.start(
+        operation = self.instances_client.start(
             project=self.service_account_project,
             zone=self.region,
             instance=self.running_instance_id
@@ -574,7 +575,10 @@ class GCECloud(IpaCloud):
 
         self._wait_on_instance(
             'RUNNING',
-            timeout=self.timeout
+            timeout=self.timeout,
+            waiter=lambda timeout: self.wait_for_extended_operation(
+                operation, 'instance start', timeout
+            )
         )
 
     def _stop_instance(self):
@@ -585,13 +589,16 @@ class GCECloud(IpaCloud):
             zone=self.region,
             instance=self.running_instance_id
         )
-        self.instances_client.stop(request)
+        operation = self.instances_client.stop(request)
 
         # In GCE an instance that is stopped has a state of TERMINATED:
         # https://cloud.google.com/compute/docs/instances/instance-life-cycle
         self._wait_on_instance(
             'TERMINATED',
-            timeout=self.timeout
+            timeout=self.timeout,
+            waiter=lambda timeout: self.wait_for_extended_operation(
+                operation, 'instance stop', timeout
+            )
         )
 
     def _terminate_instance(self):
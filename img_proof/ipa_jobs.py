@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+"""Persistent store of test jobs."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import json
+import os
+import sqlite3
+
+from contextlib import contextmanager
+
+from img_proof.ipa_constants import IPA_JOB_STORE
+from img_proof.ipa_exceptions import IpaJobStoreException
+
+JOB_COLUMNS = (
+    'id',
+    'status',
+    'options',
+    'submitted',
+    'started',
+    'finished',
+    'attempts',
+    'instance_id',
+    'results_dir',
+    'log_file',
+    'results_file',
+    'exit_status',
+    'error',
+    'results'
+)
+JSON_COLUMNS = ('options', 'results')
+
+
+class JobStore(object):
+    """
+    Store of test jobs in a sqlite database.
+
+    Records the status and options of each job, the instance it
+    tests and the location of its results. The database can be
+    updated from multiple processes so worker processes record
+    the instance of a job as soon as it is launched.
+    """
+
+    def __init__(self, store_file=None):
+        """Initialize job store and create the jobs table."""
+        self.store_file = os.path.expanduser(store_file or IPA_JOB_STORE)
+
+        store_dir = os.path.dirname(self.store_file)
+        if store_dir and not os.path.isdir(store_dir):
+            try:
+                os.makedirs(store_dir)
+            except OSError as error:
+                raise IpaJobStoreException(
+                    'Unable to create job store directory: %s' % error
+                )
+
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id TEXT PRIMARY KEY, '
+                'status TEXT NOT NULL, '
+                'options TEXT NOT NULL, '
+                'submitted REAL, '
+                'started REAL, '
+                'finished REAL, '
+                'attempts INTEGER DEFAULT 0, '
+                'instance_id TEXT, '
+                'results_dir TEXT, '
+                'log_file TEXT, '
+                'results_file TEXT, '
+                'exit_status INTEGER, '
+                'error TEXT, '
+                'results TEXT)'
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Yield a connection and commit the transaction on exit."""
+        try:
+            connection = sqlite3.connect(self.store_file, timeout=30)
+        except sqlite3.Error as error:
+            raise IpaJobStoreException(
+                'Unable to open job store: %s' % error
+            )
+
+        connection.row_factory = sqlite3.Row
+
+        try:
+            with connection:
+                yield connection
+        except sqlite3.Error as error:
+            raise IpaJobStoreException('Job store error: %s' % error)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _to_job(row):
+        """Return the job dict for a database row."""
+        job = dict(row)
+
+        for column in JSON_COLUMNS:
+            if job[column] is not None:
+                job[column] = json.loads(job[column])
+
+        return job
+
+    @staticmethod
+    def _to_values(values):
+        """Return the values with json columns serialized."""
+        invalid = set(values) - set(JOB_COLUMNS)
+        if invalid:
+            raise IpaJobStoreException(
+                'Invalid job columns: %s' % ', '.join(sorted(invalid))
+            )
+
+        return {
+            key: json.dumps(value)
+            if key in JSON_COLUMNS and value is not None else value
+            for key, value in values.items()
+        }
+
+    def add(self, job):
+        """Insert a new job, job is a dict with an id and status."""
+        values = self._to_values(job)
+
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT INTO jobs ({columns}) VALUES ({params})'.format(
+                    columns=', '.join(values),
+                    params=', '.join('?' * len(values))
+                ),
+                list(values.values())
+            )
+
+    def update(self, job_id, **values):
+        """Update the columns of the job with job_id."""
+        values = self._to_values(values)
+
+        with self._connect() as connection:
+            connection.execute(
+                'UPDATE jobs SET {columns} WHERE id = ?'.format(
+                    columns=', '.join('%s = ?' % key for key in values)
+                ),
+                list(values.values()) + [job_id]
+            )
+
+    def get(self, job_id):
+        """Return the job with job_id or None if it does not exist."""
+        with self._connect() as connection:
+            row = connection.execute(
+                'SELECT * FROM jobs WHERE id = ?',
+                (job_id,)
+            ).fetchone()
+
+        return self._to_job(row) if row else None
+
+    def list_jobs(self, status=None):
+        """Return all jobs, or jobs with status, in submitted order."""
+        query = 'SELECT * FROM jobs'
+        params = []
+
+        if status:
+            query += ' WHERE status = ?'
+            params.append(status)
+
+        with self._connect() as connection:
+            rows = connection.execute(
+                query + ' ORDER BY submitted, rowid',
+                params
+            ).fetchall()
+
+        return [self._to_job(row) for row in rows]
+
+
+def get_job_checkpoint(job):
+    """
+    Return the newest checkpoint file of the job or None.
+
+    Only checkpoints in the results directory of the job written
+    after the job was submitted are considered.
+    """
+    results_dir = job.get('results_dir')
+    if not results_dir or not os.path.isdir(results_dir):
+        return None
+
+    checkpoints = []
+    for name in os.listdir(results_dir):
+        if not name.endswith('.checkpoint'):
+            continue
+
+        path = os.path.join(results_dir, name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+
+        if mtime >= (job.get('submitted') or 0):
+            checkpoints.append((mtime, path))
+
+    return max(checkpoints)[1] if checkpoints else None
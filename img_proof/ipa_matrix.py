@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+"""Matrix runner for testing many image combinations concurrently."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import inspect
+import itertools
+import json
+import logging
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from img_proof import ipa_utils
+from img_proof.ipa_constants import IPA_RESULTS_PATH, MATRIX_DEFAULT_WORKERS
+from img_proof.ipa_controller import get_cloud, test_image
+from img_proof.ipa_exceptions import IpaMatrixException
+
+MATRIX_KEYS = ('cloud', 'matrix', 'exclude', 'max_workers')
+TEST_IMAGE_ARGS = tuple(inspect.signature(get_cloud).parameters)
+
+
+def expand_matrix(spec):
+    """
+    Expand the matrix spec into a list of test_image keyword dicts.
+
+    The top level keys of the spec are shared by all runs. Each key
+    in the matrix section is a list of values and the cartesian
+    product of all lists provides the individual combinations.
+    Combinations matching any entry in exclude are dropped.
+
+    Returns:
+        A list of test_image keyword dictionaries.
+    Raises:
+        IpaMatrixException: If the spec is invalid.
+    """
+    if not isinstance(spec, dict):
+        raise IpaMatrixException('Matrix spec must be a mapping.')
+
+    if not spec.get('cloud'):
+        raise IpaMatrixException('Matrix spec requires a cloud.')
+
+    common = {'cloud_name': spec['cloud']}
+
+    for key, value in spec.items():
+        if key in MATRIX_KEYS:
+            continue
+        elif key not in TEST_IMAGE_ARGS:
+            raise IpaMatrixException(
+                'Invalid matrix spec option: %s' % key
+            )
+
+        common[key] = value
+
+    matrix = spec.get('matrix') or {}
+    if not isinstance(matrix, dict):
+        raise IpaMatrixException(
+            'Matrix section must be a mapping of option to values.'
+        )
+
+    for key in matrix:
+        if key not in TEST_IMAGE_ARGS or key == 'cloud_name':
+            raise IpaMatrixException(
+                'Invalid matrix option: %s' % key
+            )
+
+    exclude = spec.get('exclude') or []
+    keys = list(matrix.keys())
+    values = [
+        value if isinstance(value, list) else [value]
+        for value in matrix.values()
+    ]
+
+    combinations = []
+    for combination in itertools.product(*values):
+        params = dict(zip(keys, combination))
+
+        if any(
+            all(params.get(key) == val for key, val in item.items())
+            for item in exclude
+        ):
+            continue
+
+        kwargs = dict(common)
+        kwargs.update(params)
+        combinations.append(kwargs)
+
+    return combinations
+
+
+def _run_combination(index, kwargs):
+    """
+    Test a single matrix combination and return a summary dict.
+
+    Runs in a worker process, exceptions are captured so one
+    broken combination does not abort the matrix.
+    """
+    start = time.time()
+    run = {
+        'index': index,
+        'cloud': kwargs.get('cloud_name'),
+        'image_id': kwargs.get('image_id'),
+        'region': kwargs.get('region'),
+        'instance_type': kwargs.get('instance_type'),
+        'status': 1
+    }
+
+    try:
+        status, results = test_image(**kwargs)
+    except Exception as error:
+        run['error'] = '{}: {}'.format(type(error).__name__, error)
+    else:
+        run['status'] = status
+        run['summary'] = dict(results.get('summary', {}))
+
+        info = results.get('info', {})
+        run['instance'] = info.get('instance')
+        run['log_file'] = info.get('log_file')
+        run['results_file'] = info.get('results_file')
+
+    run['duration'] = time.time() - start
+    return run
+
+
+def test_matrix(matrix_file,
+                max_workers=None,
+                results_file=None,
+                log_level=None):
+    """
+    Test all combinations in the matrix file using a worker pool.
+
+    Each combination runs in a separate process and writes the usual
+    log and results files. An aggregated results file is written
+    once all combinations finish.
+
+    Returns:
+        A tuple with the exit code and aggregated results json.
+    """
+    spec = ipa_utils.get_yaml_config(matrix_file)
+    combinations = expand_matrix(spec)
+
+    if not combinations:
+        raise IpaMatrixException(
+            'Matrix spec does not contain any combinations.'
+        )
+
+    logger = logging.getLogger('img_proof')
+    max_workers = int(
+        max_workers or spec.get('max_workers') or MATRIX_DEFAULT_WORKERS
+    )
+
+    for kwargs in combinations:
+        if log_level and 'log_level' not in kwargs:
+            kwargs['log_level'] = log_level
+
+    time_stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    if not results_file:
+        results_dir = os.path.expanduser(
+            spec.get('results_dir') or IPA_RESULTS_PATH
+        )
+        results_file = os.path.join(
+            results_dir,
+            'matrix',
+            '{}.results'.format(time_stamp)
+        )
+
+    start = time.time()
+    runs = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_run_combination, index, kwargs)
+            for index, kwargs in enumerate(combinations)
+        ]
+
+        for future in as_completed(futures):
+            run = future.result()
+            runs.append(run)
+            logger.info(
+                'Finished {num}/{total}: {image} {region} {type} '
+                '{status}'.format(
+                    num=len(runs),
+                    total=len(combinations),
+                    image=run['image_id'],
+                    region=run['region'] or '',
+                    type=run['instance_type'] or '',
+                    status='PASSED' if run['status'] == 0 else 'FAILED'
+                )
+            )
+
+    runs.sort(key=lambda run: run['index'])
+    for run in runs:
+        del run['index']
+
+    passed = len([run for run in runs if run['status'] == 0])
+
+    results = {
+        'info': {
+            'matrix_file': matrix_file,
+            'timestamp': time_stamp,
+            'max_workers': max_workers,
+            'results_file': results_file
+        },
+        'runs': runs,
+        'summary': {
+            'duration': time.time() - start,
+            'total': len(runs),
+            'passed': passed,
+            'failed': len(runs) - passed
+        }
+    }
+
+    results_dir = os.path.dirname(results_file)
+    if results_dir and not os.path.isdir(results_dir):
+        try:
+            os.makedirs(results_dir)
+        except OSError as error:
+            raise IpaMatrixException(
+                'Unable to create matrix results directory: %s' % error
+            )
+
+    with open(results_file, 'w') as f:
+        json.dump(results, f)
+
+    status = 0 if passed == len(runs) else 1
+    return status, results
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+"""Pool of pre-launched instances for repeated image testing."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import fcntl
+import json
+import os
+import time
+
+from contextlib import contextmanager
+
+from img_proof.ipa_constants import IPA_POOL_FILE
+from img_proof.ipa_exceptions import IpaPoolException
+
+
+class InstancePool(object):
+    """
+    Pool of pre-launched instances stored in a json file.
+
+    Each entry records the cloud, image, instance type and region
+    the instance was launched with and when it expires. The file
+    is locked while it is read and updated so the pool can be
+    shared by concurrent test runs.
+    """
+
+    def __init__(self, pool_file=None):
+        """Initialize instance pool."""
+        self.pool_file = os.path.expanduser(pool_file or IPA_POOL_FILE)
+
+    @contextmanager
+    def _locked_entries(self):
+        """Yield the list of pool entries and save it on exit."""
+        pool_dir = os.path.dirname(self.pool_file)
+        if pool_dir and not os.path.isdir(pool_dir):
+            try:
+                os.makedirs(pool_dir)
+            except OSError as error:
+                raise IpaPoolException(
+                    'Unable to create pool directory: %s' % error
+                )
+
+        with open(self.pool_file, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+
+            try:
+                f.seek(0)
+                data = f.read()
+
+                try:
+                    entries = json.loads(data) if data.strip() else []
+                except ValueError:
+                    raise IpaPoolException(
+                        'Pool file format invalid: %s' % self.pool_file
+                    )
+
+                yield entries
+
+                f.seek(0)
+                f.truncate()
+                json.dump(entries, f)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _matches(entry, cloud, image_id, instance_type, region):
+        """Return True if entry matches the provided values."""
+        return (
+            entry['cloud'] == cloud and
+            entry['image_id'] == image_id and
+            entry['instance_type'] == instance_type and
+            entry['region'] == region
+        )
+
+    def add(self,
+            cloud,
+            image_id,
+            instance_type,
+            region,
+            instance_id,
+            distro=None,
+            ttl=None):
+        """Add a launched instance to the pool."""
+        now = time.time()
+        entry = {
+            'cloud': cloud,
+            'image_id': image_id,
+            'instance_type': instance_type,
+            'region': region,
+            'instance_id': instance_id,
+            'distro': distro,
+            'created': now,
+            'expires': now + ttl if ttl else None
+        }
+
+        with self._locked_entries() as entries:
+            entries.append(entry)
+
+        return entry
+
+    def acquire(self, cloud, image_id, instance_type, region):
+        """
+        Remove and return the oldest matching unexpired instance id.
+
+        Returns None if there is no matching instance in the pool.
+        """
+        now = time.time()
+
+        with self._locked_entries() as entries:
+            for entry in entries:
+                expired = entry['expires'] and entry['expires'] < now
+
+                if not expired and self._matches(
+                    entry, cloud, image_id, instance_type, region
+                ):
+                    entries.remove(entry)
+                    return entry['instance_id']
+
+        return None
+
+    def count(self, cloud, image_id, instance_type, region):
+        """Return the number of matching unexpired instances."""
+        return len([
+            entry for entry in self.list_entries()
+            if self._matches(entry, cloud, image_id, instance_type, region)
+            and not (entry['expires'] and entry['expires'] < time.time())
+        ])
+
+    def list_entries(self):
+        """Return a list of all pool entries."""
+        with self._locked_entries() as entries:
+            return list(entries)
+
+    def remove(self, instance_id):
+        """Remove the instance from the pool."""
+        with self._locked_entries() as entries:
+            entries[:] = [
+                entry for entry in entries
+                if entry['instance_id'] != instance_id
+            ]
+
+    def get_expired(self, cloud=None):
+        """Return the pool entries which have expired."""
+        now = time.time()
+        return [
+            entry for entry in self.list_entries()
+            if entry['expires'] and entry['expires'] < now
+            and (cloud is None or entry['cloud'] == cloud)
+        ]
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+"""Dependency aware scheduling of test files."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+from img_proof.ipa_constants import SYNC_POINTS
+from img_proof.ipa_exceptions import IpaSchedulerException
+
+
+class TestScheduler(object):
+    """
+    Schedule test files using the attributes from test descriptions.
+
+    A test is ready once all required tests in the same group have
+    finished. Ready tests start in the listed order as long as fewer
+    than max_workers tests are running, no running test shares a
+    conflicting resource and no exclusive test is running. An
+    exclusive test that is ready waits for running tests to finish
+    and no later test starts before it.
+
+    Tests are tracked by index so a test may also be a list of test
+    files run in one session. A list has the combined attributes of
+    its test files.
+    """
+
+    __test__ = False
+
+    def __init__(self, tests, attributes=None, max_workers=1):
+        """Initialize test scheduler."""
+        self.tests = list(tests)
+        self.attributes = attributes or {}
+        self.max_workers = max(1, max_workers)
+
+        indexes = {}
+        for index, test in enumerate(self.tests):
+            for test_file in self._get_files(test):
+                indexes.setdefault(test_file, index)
+
+        self.requires = []
+        self.conflicts = []
+        self.exclusive = []
+
+        for index, test in enumerate(self.tests):
+            requires = set()
+            conflicts = set()
+            exclusive = False
+
+            for test_file in self._get_files(test):
+                test_attrs = self.attributes.get(test_file) or {}
+
+                # Required tests outside of the group run before or
+                # after it and cannot be waited on.
+                requires.update(
+                    indexes[required]
+                    for required in test_attrs.get('requires', [])
+                    if required in indexes and indexes[required] != index
+                )
+                conflicts.update(test_attrs.get('conflicts', []))
+                exclusive = exclusive or test_attrs.get('exclusive', False)
+
+            self.requires.append(requires)
+            self.conflicts.append(conflicts)
+            self.exclusive.append(exclusive)
+
+        self.pending = list(range(len(self.tests)))
+        self.running = set()
+        self.finished = set()
+
+        self._check_cycles()
+
+    @staticmethod
+    def _get_files(test):
+        """Return the test files of a test or list of test files."""
+        return test if isinstance(test, list) else [test]
+
+    def _check_cycles(self):
+        """
+        Raise an exception if the required tests form a cycle.
+
+        Raises:
+            IpaSchedulerException: If a dependency cycle is found.
+        """
+        visited = set()
+
+        def visit(index, path):
+            if index in path:
+                cycle = path[path.index(index):] + [index]
+                raise IpaSchedulerException(
+                    'Test dependency cycle: {0}'.format(
+                        ' -> '.join(
+                            os.path.basename(str(self.tests[item]))
+                            for item in cycle
+                        )
+                    )
+                )
+
+            if index in visited:
+                return
+
+            for required in self.requires[index]:
+                visit(required, path + [index])
+
+            visited.add(index)
+
+        for index in range(len(self.tests)):
+            visit(index, [])
+
+    def _can_start(self, index):
+        """Return True if no running test conflicts with the test."""
+        if self.exclusive[index] and self.running:
+            return False
+
+        return not any(
+            self.exclusive[running] or
+            self.conflicts[index] & self.conflicts[running]
+            for running in self.running
+        )
+
+    def get_ready(self):
+        """
+        Return the tests which can start now and mark them running.
+
+        Returns:
+            A list of tuples with the test index and test.
+        """
+        started = []
+
+        for index in list(self.pending):
+            if len(self.running) >= self.max_workers:
+                break
+
+            if not self.requires[index] <= self.finished:
+                continue
+
+            if not self._can_start(index):
+                if self.exclusive[index]:
+                    # Wait for running tests to drain
+                    break
+
+                continue
+
+            self.pending.remove(index)
+            self.running.add(index)
+            started.append((index, self.tests[index]))
+
+        return started
+
+    def finish(self, index):
+        """Mark the test with index as finished."""
+        self.running.discard(index)
+        self.finished.add(index)
+
+    def is_done(self):
+        """Return True if all tests have finished."""
+        return not self.pending and not self.running
+
+    def get_order(self):
+        """Return the tests in the order they run one at a time."""
+        scheduler = TestScheduler(self.tests, self.attributes)
+
+        order = []
+        while not scheduler.is_done():
+            for index, test in scheduler.get_ready():
+                order.append(test)
+                scheduler.finish(index)
+
+        return order
+
+
+def sort_test_files(test_files, attributes):
+    """
+    Sort the test files between sync points by required tests.
+
+    Tests keep the listed order unless a required test is listed
+    later in which case the required test runs first.
+    """
+    items = []
+    group = []
+
+    for item in test_files + [None]:
+        if item is None or item in SYNC_POINTS:
+            items += TestScheduler(group, attributes).get_order()
+            group = []
+
+            if item is not None:
+                items.append(item)
+        else:
+            group.append(item)
+
+    return items
@@ -0,0 +1,630 @@
+# -*- coding: utf-8 -*-
+
+"""Long running img_proof service with a job queue."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hmac
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingUnixStreamServer
+from urllib.parse import parse_qs, urlparse
+
+from img_proof.ipa_constants import SERVE_DEFAULT_WORKERS
+from img_proof.ipa_controller import get_cloud, get_error_results, test_image
+from img_proof.ipa_exceptions import IpaServerException
+from img_proof.ipa_jobs import JobStore, get_job_checkpoint
+from img_proof.ipa_utils import ignored
+
+JOB_OPTIONS = (
+    set(inspect.signature(get_cloud).parameters) - {'log_callback'}
+) | {'shards'}
+FINISHED_STATES = ('passed', 'failed', 'error', 'cancelled')
+
+_events = None
+
+
+def _init_worker(log_level, events=None):
+    """
+    Configure logging in a new worker process.
+
+    The worker reports the jobs it starts to the events queue.
+    """
+    global _events
+    _events = events
+
+    logger = logging.getLogger('img_proof')
+    logger.setLevel(log_level)
+
+
+def _run_job(kwargs, job_id=None, store_file=None):
+    """
+    Test the image for a job in a worker process.
+
+    The job manager is notified when the job starts. If a store file
+    is provided the job is marked running and the instance and
+    results files are recorded in the job store.
+
+    Returns:
+        A tuple with the exit code and results json.
+    """
+    started = time.time()
+
+    if _events is not None and job_id:
+        _events.put((job_id, started))
+
+    try:
+        if not store_file:
+            return test_image(**kwargs)
+
+        store = JobStore(store_file)
+        store.update(job_id, status='running', started=started)
+
+        if kwargs.get('shards'):
+            # Shard instances are launched by the controller
+            return test_image(**kwargs)
+
+        cloud = get_cloud(**kwargs)
+        cloud.prepare_instance()
+
+        if cloud.checkpoint:
+            results_dir = os.path.dirname(cloud.checkpoint['results_file'])
+        else:
+            results_dir = cloud._get_results_dir()
+
+        store.update(
+            job_id,
+            instance_id=cloud.running_instance_id,
+            results_dir=results_dir
+        )
+
+        status, results = cloud.test_image()
+
+        store.update(
+            job_id,
+            log_file=cloud.log_file,
+            results_file=cloud.results_file
+        )
+        return status, results
+    except Exception as error:
+        return 1, get_error_results(error)
+
+
+def _terminate_job_instance(job):
+    """Terminate the instance of an interrupted job."""
+    kwargs = {
+        key: value for key, value in job['options'].items()
+        if key not in ('resume', 'shards')
+    }
+    kwargs['running_instance_id'] = job['instance_id']
+
+    cloud = get_cloud(**kwargs)
+    cloud._terminate_instance()
+
+
+class JobManager(object):
+    """
+    Queue of test jobs run by a pool of worker processes.
+
+    Worker processes are reused between jobs so the cloud SDKs are
+    only imported once per worker. Cloud clients and credentials are
+    not shared, each job creates its own. Jobs are identified by a
+    random id and kept in memory. If a job store is provided jobs are
+    also saved in the store and jobs interrupted by a restart are
+    recovered.
+    """
+
+    def __init__(self, max_workers=None, log_level=logging.INFO, store=None):
+        """Initialize job manager."""
+        self.max_workers = max_workers or SERVE_DEFAULT_WORKERS
+        self.events = multiprocessing.SimpleQueue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(log_level, self.events)
+        )
+        self.jobs = {}
+        self.futures = {}
+        self.condition = threading.Condition()
+        self.logger = logging.getLogger('img_proof')
+        self.store = store
+        self.closing = False
+
+        self.events_thread = threading.Thread(
+            target=self._read_events,
+            daemon=True
+        )
+        self.events_thread.start()
+
+        if self.store:
+            self._recover()
+
+    def _read_events(self):
+        """Mark jobs running when a worker reports it started them."""
+        while True:
+            event = self.events.get()
+
+            if event is None:
+                break
+
+            job_id, started = event
+
+            with self.condition:
+                job = self.jobs.get(job_id)
+
+                if job and job['status'] == 'queued':
+                    job['status'] = 'running'
+                    job['started'] = started
+                    self.condition.notify_all()
+
+    def _queue(self, job):
+        """Submit the job to the worker pool."""
+        job_id = job['id']
+
+        with self.condition:
+            self.jobs[job_id] = job
+            future = self.executor.submit(
+                _run_job,
+                job['options'],
+                job_id,
+                self.store.store_file if self.store else None
+            )
+            self.futures[job_id] = future
+
+        future.add_done_callback(
+            lambda future: self._finish(job_id, future)
+        )
+
+    def _recover(self):
+        """
+        Load the jobs in the store and recover interrupted jobs.
+
+        Queued jobs are queued again. Running jobs with a checkpoint
+        are resumed on the same instance. Running jobs without a
+        checkpoint fail and the instance launched for the job is
+        terminated unless cleanup is disabled.
+        """
+        for job in self.store.list_jobs():
+            if job['status'] in FINISHED_STATES:
+                self.jobs[job['id']] = job
+            elif job['status'] == 'queued':
+                self.logger.info('Queueing job %s' % job['id'])
+                self._queue(job)
+            else:
+                self._recover_job(job)
+
+    def _recover_job(self, job):
+        """Resume or clean up a job that was running."""
+        checkpoint = get_job_checkpoint(job)
+
+        if checkpoint and not job['options'].get('shards'):
+            self.logger.info(
+                'Resuming job {id} from {checkpoint}'.format(
+                    id=job['id'],
+                    checkpoint=checkpoint
+                )
+            )
+            job['options'] = dict(job['options'], resume=checkpoint)
+            job['status'] = 'queued'
+            job['attempts'] = (job['attempts'] or 0) + 1
+            self.store.update(
+                job['id'],
+                status=job['status'],
+                options=job['options'],
+                attempts=job['attempts']
+            )
+            self._queue(job)
+            return
+
+        error = 'Job interrupted before a checkpoint was saved.'
+        options = job['options']
+        launched = not options.get('running_instance_id') or \
+            options.get('resume')
+
+        if job['instance_id'] and launched and \
+                options.get('cleanup') is not False:
+            self.logger.info(
+                'Terminating instance {instance} of job {id}'.format(
+                    instance=job['instance_id'],
+                    id=job['id']
+                )
+            )
+
+            try:
+                _terminate_job_instance(job)
+            except Exception as terminate_error:
+                error = '{0} Unable to terminate instance {1}: {2}'.format(
+                    error,
+                    job['instance_id'],
+                    terminate_error
+                )
+        elif job['instance_id']:
+            error = '{0} Instance {1} is still running.'.format(
+                error,
+                job['instance_id']
+            )
+
+        job.update({
+            'status': 'error',
+            'error': error,
+            'finished': time.time()
+        })
+        self.store.update(
+            job['id'],
+            status=job['status'],
+            error=job['error'],
+            finished=job['finished']
+        )
+        self.jobs[job['id']] = job
+
+    def _finish(self, job_id, future):
+        """Record the outcome of the job when its future is done."""
+        with self.condition:
+            job = self.jobs[job_id]
+            job['finished'] = time.time()
+
+            if future.cancelled():
+                job['status'] = 'cancelled'
+            elif future.exception():
+                job['status'] = 'error'
+                job['error'] = str(future.exception())
+            else:
+                status, results = future.result()
+                job['exit_status'] = status
+                job['results'] = results
+                job['status'] = 'passed' if status == 0 else 'failed'
+
+                if results.get('error'):
+                    job['status'] = 'error'
+                    job['error'] = results['error']
+
+            if self.store and not (self.closing and future.cancelled()):
+                # Jobs cancelled by shutdown stay queued in the store
+                with ignored(Exception):
+                    self.store.update(job_id, **{
+                        key: job.get(key) for key in (
+                            'status',
+                            'finished',
+                            'exit_status',
+                            'error',
+                            'results'
+                        )
+                    })
+
+            self.condition.notify_all()
+
+    def _update(self, job_id):
+        """Add the instance a worker recorded for a running job."""
+        job = self.jobs[job_id]
+
+        if self.store and job['status'] == 'running' and \
+                not job.get('instance_id'):
+            # The worker records the instance in the store
+            with ignored(Exception):
+                stored = self.store.get(job_id)
+                job['instance_id'] = stored['instance_id']
+                job['results_dir'] = stored['results_dir']
+
+        return job
+
+    def submit(self, kwargs):
+        """
+        Queue a test job with the keyword arguments of test_image.
+
+        Returns:
+            The job dict.
+        Raises:
+            IpaServerException: If the arguments are invalid.
+        """
+        if not isinstance(kwargs, dict):
+            raise IpaServerException('Job must be a json object.')
+
+        invalid = set(kwargs) - JOB_OPTIONS
+        if invalid:
+            raise IpaServerException(
+                'Invalid job options: %s' % ', '.join(sorted(invalid))
+            )
+
+        if not kwargs.get('cloud_name'):
+            raise IpaServerException('Job requires a cloud_name.')
+
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': 'queued',
+            'options': kwargs,
+            'submitted': time.time()
+        }
+
+        if self.store:
+            self.store.add(job)
+
+        self._queue(job)
+        return dict(job)
+
+    def get(self, job_id, wait=None):
+        """
+        Return the job with job_id.
+
+        If wait is provided block up to wait seconds for the
+        job to finish.
+
+        Raises:
+            IpaServerException: If the job does not exist.
+        """
+        with self.condition:
+            if job_id not in self.jobs:
+                raise IpaServerException('Job not found: %s' % job_id)
+
+            if wait:
+                self.condition.wait_for(
+                    lambda: self.jobs[job_id]['status'] in FINISHED_STATES,
+                    timeout=wait
+                )
+
+            return dict(self._update(job_id))
+
+    def watch(self, job_id, timeout=None):
+        """
+        Yield the job status each time it changes until it finishes.
+
+        Raises:
+            IpaServerException: If the job does not exist.
+        """
+        status = None
+        end = time.time() + timeout if timeout else None
+
+        while True:
+            job = self.get(job_id, wait=1)
+
+            if job['status'] != status:
+                status = job['status']
+                yield job
+
+            if status in FINISHED_STATES:
+                break
+
+            if end and time.time() >= end:
+                break
+
+    def list_jobs(self):
+        """Return a list of all jobs without results."""
+        with self.condition:
+            return [
+                {
+                    key: value for key, value in self._update(job_id).items()
+                    if key != 'results'
+                } for job_id in self.jobs
+            ]
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued job.
+
+        Returns:
+            True if the job was cancelled.
+        Raises:
+            IpaServerException: If the job does not exist.
+        """
+        with self.condition:
+            if job_id not in self.jobs:
+                raise IpaServerException('Job not found: %s' % job_id)
+
+            future = self.futures.get(job_id)
+            return bool(future and future.cancel())
+
+    def shutdown(self, wait=True):
+        """
+        Stop the worker pool, queued jobs are cancelled.
+
+        With a job store the queued jobs are queued again when the
+        next job manager using the store starts.
+        """
+        with self.condition:
+            self.closing = True
+
+            for future in self.futures.values():
+                future.cancel()
+
+        self.executor.shutdown(wait=wait)
+        self.events.put(None)
+
+        if wait:
+            self.events_thread.join()
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    REST API for the job manager.
+
+    POST /jobs                 Submit a job, the body is a json object.
+    GET /jobs                  List jobs.
+    GET /jobs/{id}?wait=N      Get a job, wait up to N seconds to finish.
+    GET /jobs/{id}?stream=1    Stream json lines on each status change.
+    DELETE /jobs/{id}          Cancel a queued job.
+
+    If the server has a token requests require an
+    Authorization: Bearer {token} header.
+    """
+
+    job_path = re.compile(r'^/jobs/(?P<job_id>[0-9a-f]+)$')
+
+    def _authorize(self):
+        """Return True if the request has the server token."""
+        if not self.server.token:
+            return True
+
+        header = self.headers.get('Authorization', '')
+        expected = 'Bearer {0}'.format(self.server.token)
+
+        if hmac.compare_digest(header.encode(), expected.encode()):
+            return True
+
+        self._send_json(401, {'error': 'Unauthorized.'})
+        return False
+
+    def _send_json(self, code, data):
+        """Send a json response."""
+        body = json.dumps(data).encode()
+
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _get_job_id(self, path):
+        """Return the job id in path or None."""
+        match = self.job_path.match(path)
+        return match.group('job_id') if match else None
+
+    def do_GET(self):
+        """List, get or stream jobs."""
+        if not self._authorize():
+            return
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == '/jobs':
+            self._send_json(200, self.server.manager.list_jobs())
+            return
+
+        job_id = self._get_job_id(url.path)
+        if not job_id:
+            self._send_json(404, {'error': 'Not found.'})
+            return
+
+        try:
+            if query.get('stream'):
+                # Raises before the response starts if job not found
+                self.server.manager.get(job_id)
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.end_headers()
+
+                for job in self.server.manager.watch(job_id):
+                    self.wfile.write(json.dumps(job).encode() + b'\n')
+                    self.wfile.flush()
+            else:
+                wait = float(query.get('wait', [0])[0])
+                self._send_json(200, self.server.manager.get(job_id, wait))
+        except IpaServerException as error:
+            self._send_json(404, {'error': str(error)})
+        except ValueError as error:
+            self._send_json(400, {'error': str(error)})
+
+    def do_POST(self):
+        """Submit a job."""
+        if not self._authorize():
+            return
+
+        if urlparse(self.path).path != '/jobs':
+            self._send_json(404, {'error': 'Not found.'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+
+        try:
+            kwargs = json.loads(self.rfile.read(length) or b'{}')
+            job = self.server.manager.submit(kwargs)
+        except (IpaServerException, ValueError) as error:
+            self._send_json(400, {'error': str(error)})
+        else:
+            self._send_json(201, job)
+
+    def do_DELETE(self):
+        """Cancel a queued job."""
+        if not self._authorize():
+            return
+
+        job_id = self._get_job_id(urlparse(self.path).path)
+        if not job_id:
+            self._send_json(404, {'error': 'Not found.'})
+            return
+
+        try:
+            cancelled = self.server.manager.cancel(job_id)
+        except IpaServerException as error:
+            self._send_json(404, {'error': str(error)})
+        else:
+            self._send_json(200, {'id': job_id, 'cancelled': cancelled})
+
+    def log_message(self, format, *args):
+        """Log requests with the img_proof logger."""
+        logging.getLogger('img_proof').debug(format % args)
+
+
+class JobServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a job manager."""
+
+    daemon_threads = True
+
+    def __init__(self, address, manager, token=None):
+        """Initialize job server."""
+        super(JobServer, self).__init__(address, JobRequestHandler)
+        self.manager = manager
+        self.token = token
+
+
+class JobUnixServer(ThreadingUnixStreamServer):
+    """
+    Threaded HTTP server with a job manager on a Unix socket.
+
+    The socket file is only accessible to the user running the
+    server and it is removed when the server is closed.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, manager, token=None):
+        """Initialize job server."""
+        self.manager = manager
+        self.token = token
+        self.bound = False
+        super(JobUnixServer, self).__init__(path, JobRequestHandler)
+
+    def server_bind(self):
+        """Create the socket file with owner only permissions."""
+        umask = os.umask(0o177)
+
+        try:
+            super(JobUnixServer, self).server_bind()
+        finally:
+            os.umask(umask)
+
+        self.bound = True
+
+    def server_close(self):
+        """Close the server and remove the socket file."""
+        super(JobUnixServer, self).server_close()
+
+        if self.bound:
+            with ignored(OSError):
+                os.remove(self.server_address)
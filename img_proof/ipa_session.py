@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""State of a single img_proof test run."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import logging
+
+from img_proof import ipa_utils
+
+
+class IpaSession(object):
+    """
+    State of a single img_proof test run.
+
+    Owns the SSH clients and the logger of the run so multiple runs
+    in the same process do not close each other's connections or
+    change each other's log level. The session logger is not
+    registered with the logging module, it is released with the
+    session and sends records to the handlers of the img_proof
+    logger, which does not propagate them to the root logger.
+    """
+
+    def __init__(self, log_level=logging.INFO, log_callback=None,
+                 ssh_backend='paramiko'):
+        """Initialize session."""
+        self.clients = {}
+        self.ssh_backend = ssh_backend
+
+        if log_callback:
+            self.logger = log_callback
+        else:
+            self.logger = logging.Logger('img_proof', log_level)
+            self.logger.parent = logging.getLogger('img_proof')
+
+            # Records are handled by the img_proof logger only and
+            # not again by handlers of the root logger.
+            self.logger.parent.propagate = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_ssh_client(self, ip, ssh_private_key_file, ssh_user, timeout):
+        """Return a new or existing SSH client of the session for ip."""
+        return ipa_utils.get_ssh_client(
+            ip,
+            ssh_private_key_file,
+            ssh_user,
+            timeout=timeout,
+            cache=self.clients,
+            backend=self.ssh_backend
+        )
+
+    def clear_cache(self, ip=None):
+        """Close the SSH clients of the session or the client for ip."""
+        ipa_utils.clear_cache(ip, cache=self.clients)
+
+    def redirect_output(self, fileobj):
+        """Redirect standard out of the calling thread to fileobj."""
+        return ipa_utils.redirect_output(fileobj)
+
+    def close(self):
+        """Close all SSH clients of the session."""
+        self.clear_cache()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+"""Testinfra backend using the SSH client of the test run."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import threading
+
+from contextlib import contextmanager
+
+import paramiko
+
+from testinfra.backend import BACKENDS
+from testinfra.backend.paramiko import ParamikoBackend
+
+CLIENTS = {}
+CLIENTS_LOCK = threading.Lock()
+
+
+@contextmanager
+def shared_client(host, client):
+    """
+    Share the SSH client for host with testinfra in the block.
+
+    Only paramiko clients are shared, testinfra hosts using the
+    img-proof backend open their own connection otherwise.
+    """
+    if not isinstance(client, paramiko.SSHClient):
+        yield
+        return
+
+    with CLIENTS_LOCK:
+        CLIENTS[host] = client
+
+    try:
+        yield
+    finally:
+        with CLIENTS_LOCK:
+            if CLIENTS.get(host) is client:
+                del CLIENTS[host]
+
+
+def get_shared_client(host):
+    """Return the shared client for host if the transport is active."""
+    with CLIENTS_LOCK:
+        client = CLIENTS.get(host)
+
+    if client:
+        transport = client.get_transport()
+
+        if transport and transport.is_active():
+            return client
+
+    return None
+
+
+class HarnessBackend(ParamikoBackend):
+    """
+    Testinfra paramiko backend which runs commands on the transport
+    img-proof has already authenticated.
+
+    Commands run over new channels of the shared client so a test
+    session needs no new SSH handshake and the host key verified by
+    img-proof applies to the test commands. Without a shared client
+    for the host the backend connects like the paramiko backend.
+    """
+
+    NAME = 'img-proof'
+
+    def __init__(self, *args, **kwargs):
+        """Initialize backend."""
+        self._client = None
+        super(HarnessBackend, self).__init__(*args, **kwargs)
+
+    @property
+    def client(self):
+        """Return the shared client or the backend client."""
+        client = get_shared_client(self.host.name)
+
+        if client:
+            return client
+
+        if self._client is None:
+            self._client = ParamikoBackend.client.func(self)
+
+        return self._client
+
+    @client.deleter
+    def client(self):
+        """
+        Drop the backend client.
+
+        Called by the paramiko backend to reconnect once the
+        transport is closed. A shared client is never closed
+        by testinfra.
+        """
+        self._client = None
+
+
+BACKENDS.setdefault(
+    HarnessBackend.NAME,
+    'img_proof.ipa_testinfra.HarnessBackend'
+)
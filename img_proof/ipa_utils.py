@@ -26,7 +26,13 @@ import json
 import logging
 import os
 import random
+import re
+import shlex
+import shutil
+import socket
+import subprocess
 import sys
+import threading
 import time
 
 import paramiko
@@ -35,31 +41,111 @@ import yaml
 from binascii import hexlify
 from contextlib import contextmanager
 from string import ascii_lowercase
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, mkdtemp
 from paramiko.ssh_exception import AuthenticationException, SSHException
 
-from img_proof.ipa_constants import SYNC_POINTS
+from img_proof import ipa_asyncssh
+from img_proof.ipa_constants import SSH_CONTROL_PERSIST, SYNC_POINTS
 from img_proof.ipa_exceptions import IpaSSHException, IpaUtilsException
 
 CLIENT_CACHE = {}
+OUTPUT_LOCK = threading.Lock()
 unrecoverable_errors = (
     'No existing session',
     'key cannot be used for signing'
 )
 
 
-def clear_cache(ip=None):
-    """Clear the client cache or remove key matching the given ip."""
+def chunk_test_files(test_files, count, attributes=None):
+    """
+    Split the test files into at most count contiguous chunks.
+
+    Chunk sizes differ by at most one and the original
+    order of test files is preserved.
+
+    If attributes are provided test files linked by required tests
+    or a shared conflicting resource are kept in the same chunk so
+    they run one after the other. Exclusive test files are put in a
+    chunk of their own which is not counted.
+    """
+    attributes = attributes or {}
+
+    # Link test files with required and conflicting test files
+    unit_of = list(range(len(test_files)))
+    resources = {}
+
+    def find(index):
+        while unit_of[index] != index:
+            index = unit_of[index]
+        return index
+
+    def link(first, second):
+        first, second = find(first), find(second)
+        unit_of[max(first, second)] = min(first, second)
+
+    for index, test_file in enumerate(test_files):
+        test_attrs = attributes.get(test_file) or {}
+
+        for required in test_attrs.get('requires', []):
+            if required in test_files:
+                link(index, test_files.index(required))
+
+        for resource in test_attrs.get('conflicts', []):
+            link(index, resources.setdefault(resource, index))
+
+    units = {}
+    for index in range(len(test_files)):
+        units.setdefault(find(index), []).append(index)
+
+    exclusive = []
+    shared = []
+    for unit in units.values():
+        if any(
+            (attributes.get(test_files[index]) or {}).get('exclusive')
+            for index in unit
+        ):
+            exclusive.append(unit)
+        else:
+            shared.append(unit)
+
+    count = max(1, min(count, len(shared)))
+    size, remainder = divmod(sum(len(unit) for unit in shared), count)
+
+    chunks = [[] for _ in range(count)]
+    chunk = 0
+    for unit in shared:
+        target = size + (1 if chunk < remainder else 0)
+        if chunks[chunk] and len(chunks[chunk]) + len(unit) > target and \
+                chunk < count - 1:
+            chunk += 1
+
+        chunks[chunk] += unit
+
+    chunks = sorted(
+        (sorted(chunk) for chunk in chunks + exclusive if chunk),
+        key=min
+    )
+    return [[test_files[index] for index in chunk] for chunk in chunks]
+
+
+def clear_cache(ip=None, cache=None):
+    """
+    Clear the client cache or remove key matching the given ip.
+
+    The module client cache is used if cache is not provided.
+    """
+    cache = CLIENT_CACHE if cache is None else cache
+
     if ip:
         with ignored(Exception):
-            client = CLIENT_CACHE[ip]
-            del CLIENT_CACHE[ip]
+            client = cache[ip]
+            del cache[ip]
             client.close()
     else:
-        for client in CLIENT_CACHE.values():
+        for client in cache.values():
             with ignored(Exception):
                 client.close()
-        CLIENT_CACHE.clear()
+        cache.clear()
 
 
 def establish_ssh_connection(ip,
@@ -67,21 +153,40 @@ def establish_ssh_connection(ip,
                              ssh_user,
                              port,
                              attempts=5,
-                             timeout=None):
+                             timeout=None,
+                             backend='paramiko'):
     """
-    Establish ssh connection and return paramiko client.
+    Establish ssh connection and return client.
+
+    The client is a paramiko client, or an AsyncSSHClient with the
+    same interface if backend is asyncssh.
 
     Raises:
         IpaSSHException: If connection cannot be established
             in given number of attempts.
     """
-    client = paramiko.SSHClient()
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    if backend == 'asyncssh':
+        if ipa_asyncssh.asyncssh is None:
+            raise IpaSSHException(
+                'The asyncssh SSH backend requires the asyncssh package.'
+            )
+    else:
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
     SECONDS_BETWEEN_REATTEMPTS = 10
     authentication_failed_already = False
     while attempts:
         try:
+            if backend == 'asyncssh':
+                return ipa_asyncssh.AsyncSSHClient.connect(
+                    ip,
+                    ssh_private_key_file,
+                    ssh_user,
+                    port=port,
+                    timeout=timeout
+                )
+
             client.connect(
                 ip,
                 port=port,
@@ -140,10 +245,14 @@ def execute_ssh_command(client, cmd, timeout=None):
     return out.decode()
 
 
-def expand_test_files(test_dirs, names, exclude):
+def expand_test_files(test_dirs, names, exclude, attributes=None):
     """
     Expand the list of test files and test descriptions.
 
+    If an attributes dict is provided it is updated with the
+    scheduling attributes declared in test descriptions keyed
+    by test file path. Required tests are also expanded to paths.
+
     Returns:
         List of test files and sync points.
     Raises:
@@ -161,16 +270,31 @@ def expand_test_files(test_dirs, names, exclude):
     tests, descriptions = get_test_files(test_dirs)
 
     expanded_names = []
+    test_attributes = {}
     for name in names:
         if name in descriptions:
             expanded_names += get_tests_from_description(
                 name,
-                descriptions
+                descriptions,
+                attributes=test_attributes
             )
         else:
             expanded_names.append(name)
 
-    return parse_sync_points(expanded_names, tests, exclude)
+    test_files = parse_sync_points(expanded_names, tests, exclude)
+
+    if attributes is not None:
+        for name, test_attrs in test_attributes.items():
+            if name in exclude:
+                continue
+
+            test_attrs['requires'] = [
+                find_test_file(required, tests)
+                for required in test_attrs['requires']
+            ]
+            attributes[find_test_file(name, tests)] = test_attrs
+
+    return test_files
 
 
 def extract_archive(client, archive_path, extract_path=None):
@@ -192,8 +316,9 @@ def find_test_file(name, tests):
     """
     Find test file by name, given a list of tests.
 
-    If a specific test case is appended to test
-    name, split the case and append to path.
+    The name may also be the path of one of the tests. If a
+    specific test case is appended to test name, split the case
+    and append to path.
 
     Raises:
         IpaUtilsException: If test file not found.
@@ -204,6 +329,9 @@ def find_test_file(name, tests):
         test_name, test_case = name, None
 
     path = tests.get(test_name, None)
+    if not path and test_name in tests.values():
+        path = test_name
+
     if not path:
         raise IpaUtilsException(
             'Test file with name: %s cannot be found.' % test_name
@@ -271,6 +399,22 @@ def get_config_values(config_path, section, default='default'):
     return values
 
 
+def get_file(client, source_file, destination_file):
+    """
+    Copy file from instance using Paramiko client connection.
+    """
+    try:
+        sftp_client = client.open_sftp()
+        sftp_client.get(source_file, destination_file)
+    except Exception as error:
+        raise IpaUtilsException(
+            'Error copying file from instance: {0}.'.format(error)
+        )
+    finally:
+        with ignored(Exception):
+            sftp_client.close()
+
+
 def get_host_key_fingerprint(client):
     """Get host key fingerprint of SSH client."""
     return hexlify(
@@ -288,15 +432,25 @@ def get_ssh_client(ip,
                    ssh_user='root',
                    port=22,
                    timeout=600,
-                   wait_period=10):
-    """Attempt to establish and test ssh connection."""
-    if CLIENT_CACHE.get(ip):
+                   wait_period=10,
+                   cache=None,
+                   backend='paramiko'):
+    """
+    Attempt to establish and test ssh connection.
+
+    The client is stored in cache, or the module client cache
+    if cache is not provided, and reused by later calls. The
+    backend is paramiko or asyncssh.
+    """
+    cache = CLIENT_CACHE if cache is None else cache
+
+    if cache.get(ip):
         try:
-            execute_ssh_command(CLIENT_CACHE[ip], 'ls', timeout=timeout)
+            execute_ssh_command(cache[ip], 'ls', timeout=timeout)
         except Exception:
-            clear_cache(ip)
+            clear_cache(ip, cache)
         else:
-            return CLIENT_CACHE[ip]
+            return cache[ip]
 
     start = time.time()
     end = start + timeout
@@ -309,7 +463,8 @@ def get_ssh_client(ip,
                 ssh_private_key_file,
                 ssh_user,
                 port,
-                timeout=wait_period
+                timeout=wait_period,
+                backend=backend
             )
             execute_ssh_command(client, 'ls', timeout=timeout)
         except FileNotFoundError:
@@ -339,7 +494,7 @@ def get_ssh_client(ip,
                 client.close()
             wait_period += wait_period
         else:
-            CLIENT_CACHE[ip] = client
+            cache[ip] = client
             return client
 
     raise IpaSSHException(
@@ -399,9 +554,256 @@ def get_test_files(test_dirs):
     return tests, descriptions
 
 
+def get_history_results(history_log, limit=None, match=None):
+    """
+    Return the results of the most recent test runs in the history log.
+
+    The results file of each history item is next to the log file.
+    Items without a readable results file are skipped. If match is
+    provided only results for which match returns True are used.
+
+    Returns:
+        A list of results dicts starting with the most recent run.
+    """
+    try:
+        with open(history_log, 'r') as f:
+            items = f.readlines()
+    except (IOError, OSError):
+        return []
+
+    results = []
+    for item in reversed(items):
+        if limit and len(results) >= limit:
+            break
+
+        try:
+            log_file = shlex.split(item)[0]
+        except (IndexError, ValueError):
+            continue
+
+        results_file = os.path.splitext(log_file)[0] + '.results'
+        try:
+            data = load_json(results_file)
+        except (IOError, OSError, ValueError):
+            continue
+
+        if match is None or match(data):
+            results.append(data)
+
+    return results
+
+
+def get_image_family(image):
+    """
+    Return the image family of the image name.
+
+    The family is the image name without build dates so images
+    from different builds of the same product match.
+
+    Examples:
+        suse-sles-15-sp5-v20231206-hvm-ssd-x86_64
+        -> suse-sles-15-sp5-hvm-ssd-x86_64
+
+        SUSE:sles-15-sp5:gen2:2023.12.06 -> SUSE:sles-15-sp5:gen2
+    """
+    family = re.sub(
+        r'[-_.:]?v?(\d{8}|\d{4}\.\d{2}\.\d{2})(?=$|[-_.:])',
+        '',
+        image or ''
+    )
+    return family
+
+
+def get_test_durations(history_log, limit=20):
+    """
+    Return the average duration of each test file in recent test runs.
+
+    The setup, call and teardown durations of all test cases are
+    summed per test file for each run in the history log and
+    averaged across the runs which include the test file.
+
+    Returns:
+        A dict mapping test file names to the duration in seconds.
+    """
+    durations = {}
+
+    for results in get_history_results(history_log, limit):
+        run = {}
+        for test in results.get('tests', []):
+            if test['nodeid'] in SYNC_POINTS:
+                continue
+
+            name = get_test_name(test['nodeid']).split('::')[0]
+            run[name] = run.get(name, 0) + sum(
+                test.get(stage, {}).get('duration', 0)
+                for stage in ('setup', 'call', 'teardown')
+            )
+
+        for name, duration in run.items():
+            durations.setdefault(name, []).append(duration)
+
+    return {
+        name: sum(values) / len(values)
+        for name, values in durations.items()
+    }
+
+
+def get_test_failures(history_log, platform, image, limit=10):
+    """
+    Return the outcomes of each test file in recent runs of the image family.
+
+    A test file failed in a run if any of its tests failed or
+    errored.
+
+    Returns:
+        A dict mapping test file names to a list of booleans which
+        are True if the test file failed, starting with the most
+        recent run.
+    """
+    family = get_image_family(image)
+
+    def match(results):
+        info = results.get('info', {})
+        return info.get('platform') == platform and \
+            get_image_family(info.get('image')) == family
+
+    failures = {}
+    for results in get_history_results(history_log, limit, match):
+        run = {}
+        for test in results.get('tests', []):
+            name = get_test_name(test['nodeid']).split('::')[0]
+            run[name] = run.get(name, False) or \
+                test.get('outcome') in ('failed', 'error')
+
+        for name, failed in run.items():
+            failures.setdefault(name, []).append(failed)
+
+    return failures
+
+
+def get_test_failure_priority(test_file, failures):
+    """
+    Return the sort key of the test file for fail first ordering.
+
+    Test files that failed in the most recent run of the image
+    family come first followed by flaky test files which failed
+    in earlier runs. Ties are broken by the failure rate.
+    """
+    outcomes = failures.get(get_test_name(test_file).split('::')[0])
+
+    if not outcomes or not any(outcomes):
+        return 2, 0
+
+    rate = -sum(outcomes) / len(outcomes)
+    return (0 if outcomes[0] else 1), rate
+
+
+def get_test_duration(test_file, durations):
+    """
+    Return the expected duration of the test file in seconds.
+
+    Test files without a known duration are expected to take
+    the average duration of the known test files.
+    """
+    name = get_test_name(test_file).split('::')[0]
+
+    if name in durations:
+        return durations[name]
+    elif durations:
+        return sum(durations.values()) / len(durations)
+    else:
+        return 1
+
+
+def get_test_name(test_file):
+    """
+    Return the test name for a test file path.
+
+    Examples:
+        /path/to/test_sles.py -> test_sles
+        /path/to/test_sles.py::test_sles_motd -> test_sles::test_sles_motd
+    """
+    path, separator, test_case = test_file.partition('::')
+    name = os.path.splitext(os.path.basename(path))[0]
+    return ''.join([name, separator, test_case])
+
+
+def get_test_segments(test_files):
+    """
+    Split the test files at sync points.
+
+    Examples:
+        ['/path/to/test1', 'test_soft_reboot', '/path/to/test2']
+        [(None, ['/path/to/test1']), ('test_soft_reboot', ['/path/to/test2'])]
+
+    Returns:
+        A list of tuples with the sync point which starts the
+        segment and the test files in the segment.
+    """
+    segments = []
+    sync_point = None
+    group = []
+
+    for item in test_files + [None]:
+        if item is None or item in SYNC_POINTS:
+            segments.append((sync_point, group))
+            sync_point = item
+            group = []
+        else:
+            group.append(item)
+
+    return segments
+
+
+def get_test_attributes(test):
+    """
+    Split a test description entry into the test name and attributes.
+
+    An entry is either a test name or a mapping with the test name
+    and the scheduling attributes of the test:
+
+    :requires: a test name or list of test names which run first.
+    :conflicts: a resource or list of resources the test modifies.
+                Tests sharing a resource never run at the same time.
+    :exclusive: if true the test never runs with any other test.
+
+    Returns:
+        A tuple with the test name and attributes dict.
+    Raises:
+        IpaUtilsException: If the entry is invalid.
+    """
+    if not isinstance(test, dict):
+        return test, None
+
+    if not test.get('name'):
+        raise IpaUtilsException(
+            'Test description entry requires a name: %s' % test
+        )
+
+    invalid = set(test) - {'name', 'requires', 'conflicts', 'exclusive'}
+    if invalid:
+        raise IpaUtilsException(
+            'Invalid attributes for test {0}: {1}'.format(
+                test['name'], ', '.join(sorted(invalid))
+            )
+        )
+
+    attributes = {}
+    for key in ('requires', 'conflicts'):
+        value = test.get(key) or []
+        attributes[key] = [value] if isinstance(value, str) else list(value)
+
+    attributes['exclusive'] = bool(
+        strtobool(str(test.get('exclusive', False)))
+    )
+
+    return test['name'], attributes
+
+
 def get_tests_from_description(name,
                                descriptions,
-                               parsed=None):
+                               parsed=None,
+                               attributes=None):
     """
     Recursively collect all tests in test description.
 
@@ -413,6 +815,9 @@ def get_tests_from_description(name,
         parsed (list): List of description paths which have
                        already been parsed to prevent infinte
                        recursion.
+        attributes (dict): Dict updated with the scheduling
+                           attributes (value) of each test
+                           name (key) which declares them.
     Returns:
         A list of expanded test files.
     """
@@ -433,15 +838,20 @@ def get_tests_from_description(name,
     parsed.append(description)
     test_data = get_yaml_config(description)
 
-    if 'tests' in test_data:
-        tests += test_data.get('tests')
+    for test in test_data.get('tests') or []:
+        test_name, test_attributes = get_test_attributes(test)
+        tests.append(test_name)
+
+        if test_attributes and attributes is not None:
+            attributes[test_name] = test_attributes
 
     if 'include' in test_data:
         for description_name in test_data.get('include'):
             tests += get_tests_from_description(
                 description_name,
                 descriptions,
-                parsed
+                parsed,
+                attributes
             )
 
     return tests
@@ -474,6 +884,42 @@ def ignored(*exceptions):
         pass
 
 
+def group_test_files(test_files):
+    """
+    Group the test files between sync points.
+
+    Consecutive test files are grouped in a list which can be run
+    concurrently. Sync points and test files that are not adjacent
+    to another test file are left as is.
+
+    Examples:
+        >>> group_test_files([  # doctest: +NORMALIZE_WHITESPACE
+        ...     '/path/to/test1', '/path/to/test2', 'test_soft_reboot',
+        ...     '/path/to/test3'
+        ... ])
+        [['/path/to/test1', '/path/to/test2'], 'test_soft_reboot',
+         '/path/to/test3']
+    """
+    items = []
+    group = []
+
+    for item in test_files + [None]:
+        if item is None or item in SYNC_POINTS:
+            if len(group) > 1:
+                items.append(group)
+            else:
+                items.extend(group)
+
+            group = []
+
+            if item is not None:
+                items.append(item)
+        else:
+            group.append(item)
+
+    return items
+
+
 def parse_sync_points(names, tests, exclude):
     """
     If test is test file find full path to file.
@@ -515,6 +961,111 @@ def parse_test_name(name):
         return name
 
 
+def poll(check,
+         timeout=600,
+         first_delay=0,
+         wait_period=1,
+         max_wait_period=15,
+         backoff=2,
+         jitter=0.2):
+    """
+    Call check until it returns a truthy value or the timeout expires.
+
+    The first probe happens after first_delay seconds. Following
+    probes back off exponentially from wait_period up to
+    max_wait_period. Each delay is reduced by a random fraction
+    up to jitter so concurrent pollers do not probe in lock step.
+
+    Returns:
+        The first truthy value returned by check.
+    Raises:
+        IpaUtilsException: If the timeout expires.
+    """
+    end = time.time() + timeout
+    delay = first_delay
+    period = wait_period
+
+    while True:
+        if delay:
+            time.sleep(max(0, min(delay, end - time.time())))
+
+        result = check()
+        if result:
+            return result
+
+        if time.time() >= end:
+            raise IpaUtilsException(
+                'Timed out after {0} seconds.'.format(timeout)
+            )
+
+        delay = period * (1 - random.uniform(0, jitter))
+        period = min(period * backoff, max_wait_period)
+
+
+def run_pytest_subprocess(args):
+    """
+    Run pytest with the given args in a child process.
+
+    Returns:
+        A tuple with the exit code, the json report dictionary
+        (None if no report was generated) and the combined output.
+    """
+    report_file = NamedTemporaryFile(delete=False, suffix='.json')
+    report_file.close()
+
+    cmd = [
+        sys.executable,
+        '-m',
+        'pytest',
+        '--json-report',
+        '--json-report-file={}'.format(report_file.name)
+    ] + args
+
+    try:
+        process = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True
+        )
+
+        try:
+            report = load_json(report_file.name)
+        except ValueError:
+            report = None
+    finally:
+        with ignored(OSError):
+            os.remove(report_file.name)
+
+    return process.returncode, report, process.stdout
+
+
+def predict_duration(test_files, durations, workers=1):
+    """
+    Predict the wall clock duration of the test files in seconds.
+
+    Test files between sync points are expected to start in order
+    on the first free worker. Sync points are not included.
+
+    Returns:
+        The predicted duration or None if no durations are known.
+    """
+    if not durations:
+        return None
+
+    total = 0
+    for sync_point, group in get_test_segments(test_files):
+        finish = [0] * max(1, workers)
+
+        for test_file in group:
+            worker = finish.index(min(finish))
+            finish[worker] += get_test_duration(test_file, durations)
+
+        total += max(finish)
+
+    return total
+
+
 def put_file(client, source_file, destination_file):
     """
     Copy file to instance using Paramiko client connection.
@@ -531,32 +1082,253 @@ def put_file(client, source_file, destination_file):
             sftp_client.close()
 
 
+class ThreadLocalOutput(object):
+    """
+    Standard out replacement which writes to a target per thread.
+
+    Threads without a target write to the original stream.
+    """
+
+    def __init__(self, stream):
+        """Initialize output with the original stream."""
+        self.stream = stream
+        self.local = threading.local()
+        self.count = 0
+
+    def _get_target(self):
+        return getattr(self.local, 'target', None) or self.stream
+
+    def write(self, data):
+        return self._get_target().write(data)
+
+    def flush(self):
+        self._get_target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._get_target(), name)
+
+
 @contextmanager
 def redirect_output(fileobj):
-    """Redirect standard out to file."""
-    old = sys.stdout
-    sys.stdout = fileobj
+    """
+    Redirect standard out of the calling thread to file.
+
+    Output of other threads is not redirected so concurrent
+    test runs in the same process do not capture each other.
+    """
+    with OUTPUT_LOCK:
+        if not isinstance(sys.stdout, ThreadLocalOutput):
+            sys.stdout = ThreadLocalOutput(sys.stdout)
+
+        output = sys.stdout
+        output.count += 1
+
+    old = getattr(output.local, 'target', None)
+    output.local.target = fileobj
+
     try:
         yield fileobj
     finally:
-        sys.stdout = old
+        output.local.target = old
+
+        with OUTPUT_LOCK:
+            output.count -= 1
+
+            if not output.count and sys.stdout is output:
+                sys.stdout = output.stream
+
+
+def sort_test_segments(test_files, key):
+    """
+    Sort the test files between sync points using key.
+
+    The sort is stable and sync points are not moved.
+    """
+    items = []
+
+    for sync_point, group in get_test_segments(test_files):
+        if sync_point:
+            items.append(sync_point)
+
+        items += sorted(group, key=key)
+
+    return items
+
+
+def split_test_files(test_files, count, durations=None, attributes=None):
+    """
+    Split the test files into at most count balanced shards.
+
+    Between sync points each test file is assigned to the shard with
+    the lowest expected total duration, longest test files first.
+    Test files without a known duration are expected to take the
+    average duration. Test files linked by required tests are kept
+    in the same shard. Each shard keeps the original order of test
+    files and runs a sync point only if it has test files after it.
+
+    Returns:
+        A list of non empty shards.
+    """
+    durations = durations or {}
+    attributes = attributes or {}
+
+    def get_duration(test_file):
+        return get_test_duration(test_file, durations)
+
+    segments = get_test_segments(test_files)
+    count = max(1, count)
+    loads = [0] * count
+    assigned = []
+
+    for sync_point, group in segments:
+        # Link test files with the required test files in the group
+        units = {index: [index] for index in range(len(group))}
+        unit_of = list(range(len(group)))
+
+        for index, test_file in enumerate(group):
+            test_attrs = attributes.get(test_file) or {}
+
+            for required in test_attrs.get('requires', []):
+                if required not in group:
+                    continue
+
+                first = unit_of[index]
+                second = unit_of[group.index(required)]
+                if first != second:
+                    units[first] += units.pop(second)
+                    for member in units[first]:
+                        unit_of[member] = first
+
+        units = sorted(
+            units.values(),
+            key=lambda unit: (
+                -sum(get_duration(group[index]) for index in unit),
+                min(unit)
+            )
+        )
+
+        shards = [[] for _ in range(count)]
+        for unit in units:
+            shard = loads.index(min(loads))
+            loads[shard] += sum(get_duration(group[index]) for index in unit)
+            shards[shard] += unit
+
+        assigned.append((
+            sync_point,
+            [[group[index] for index in sorted(shard)] for shard in shards]
+        ))
+
+    shards = [[] for _ in range(count)]
+    for position, (sync_point, groups) in enumerate(assigned):
+        if sync_point:
+            remaining = [
+                any(later[shard] for _, later in assigned[position:])
+                for shard in range(count)
+            ]
+
+            if not any(remaining):
+                # Nothing runs after the sync point, run it once
+                remaining[0] = True
+
+            for shard in range(count):
+                if remaining[shard]:
+                    shards[shard].append(sync_point)
+
+        for shard in range(count):
+            shards[shard] += groups[shard]
+
+    return [shard for shard in shards if shard]
 
 
 @contextmanager
-def ssh_config(ssh_user, ssh_private_key_file):
-    """Create temporary ssh config file."""
+def ssh_config(ssh_user,
+               ssh_private_key_file,
+               multiplex=False,
+               control_persist=SSH_CONTROL_PERSIST):
+    """
+    Create temporary ssh config file.
+
+    If multiplex is True the config enables ControlMaster sockets
+    in a temporary directory. Connections using the config share a
+    single master connection per host which stays open for
+    control_persist seconds when idle. All masters are closed and
+    the directory is removed on exit.
+    """
+    control_dir = None
+
     try:
         ssh_file = NamedTemporaryFile(delete=False, mode='w+')
         ssh_file.write('Host *\n')
         ssh_file.write('    IdentityFile %s\n' % ssh_private_key_file)
         ssh_file.write('    User %s' % ssh_user)
+
+        if multiplex:
+            control_dir = mkdtemp(prefix='img-proof-ssh-')
+            ssh_file.write('\n    ControlMaster auto')
+            ssh_file.write(
+                '\n    ControlPath %s' % os.path.join(control_dir, '%C')
+            )
+            ssh_file.write('\n    ControlPersist %s' % control_persist)
+            ssh_file.write('\n    StrictHostKeyChecking no')
+            ssh_file.write('\n    UserKnownHostsFile /dev/null')
+            ssh_file.write('\n    LogLevel ERROR')
+
         ssh_file.close()
         yield ssh_file.name
     finally:
+        if control_dir:
+            stop_ssh_masters(control_dir)
+            shutil.rmtree(control_dir, ignore_errors=True)
+
         with ignored(OSError):
             os.remove(ssh_file.name)
 
 
+def start_ssh_master(ip, config_file, timeout=10):
+    """
+    Open a master connection to ip using the multiplexed ssh config.
+
+    The master moves to the background and is reused by following
+    ssh commands using the same config.
+
+    Returns:
+        True if the master connection was established.
+    """
+    try:
+        result = subprocess.run(
+            [
+                'ssh', '-F', config_file,
+                '-o', 'ConnectTimeout={0}'.format(timeout),
+                ip, 'true'
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout * 2
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+    return result.returncode == 0
+
+
+def stop_ssh_masters(control_dir):
+    """Close all ssh master connections with sockets in control_dir."""
+    for name in os.listdir(control_dir):
+        with ignored(OSError, subprocess.TimeoutExpired):
+            subprocess.run(
+                [
+                    'ssh', '-o',
+                    'ControlPath={0}'.format(os.path.join(control_dir, name)),
+                    '-O', 'exit', 'img-proof'
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=10
+            )
+
+
 def update_history_log(history_log,
                        clear=False,
                        description=None,
@@ -596,18 +1368,80 @@ def update_history_log(history_log,
             f.write(out.strip() + '\n')
 
 
+def wait_for_ssh_banner(ip,
+                        port=22,
+                        timeout=600,
+                        wait_period=1,
+                        max_wait_period=5):
+    """
+    Wait until the SSH daemon on the instance sends a banner.
+
+    Probes the port with short TCP connections at a bounded interval
+    which is much cheaper than a full paramiko handshake while the
+    instance is still booting.
+
+    Returns:
+        A dictionary with the banner, number of attempts
+        and seconds until the banner was received.
+    Raises:
+        IpaSSHException: If no banner is received before the timeout.
+    """
+    probe = {'attempts': 0}
+    start = time.time()
+
+    def read_banner():
+        probe['attempts'] += 1
+
+        try:
+            with socket.create_connection(
+                (ip, port),
+                timeout=max_wait_period
+            ) as sock:
+                banner = sock.recv(256)
+        except OSError:
+            return None
+
+        if banner.startswith(b'SSH-'):
+            return banner.decode(errors='replace').strip()
+
+    try:
+        probe['banner'] = poll(
+            read_banner,
+            timeout=timeout,
+            wait_period=wait_period,
+            max_wait_period=max_wait_period
+        )
+    except IpaUtilsException:
+        raise IpaSSHException(
+            'SSH banner not received from {ip}:{port} after {attempts} '
+            'attempts.'.format(ip=ip, port=port, attempts=probe['attempts'])
+        )
+
+    probe['time_to_banner'] = round(time.time() - start, 2)
+    return probe
+
+
 def get_logger(log_level):
     """
-    Return new console logger at provided log level.
+    Return console logger at provided log level.
+
+    The console handler is added once and reused by later calls
+    so log messages are not duplicated.
     """
     logger = logging.getLogger('img_proof')
     logger.setLevel(log_level)
 
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(log_level)
-    console_handler.setFormatter(logging.Formatter('%(message)s'))
+    for handler in logger.handlers:
+        if getattr(handler, 'img_proof_console', False):
+            console_handler = handler
+            break
+    else:
+        console_handler = logging.StreamHandler()
+        console_handler.img_proof_console = True
+        console_handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(console_handler)
 
-    logger.addHandler(console_handler)
+    console_handler.setLevel(log_level)
     return logger
 
 
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+"""Pool of pre-forked pytest worker processes."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import io
+import multiprocessing
+import queue
+import resource
+import threading
+
+import pytest
+
+from pytest_jsonreport.plugin import JSONReport
+
+from img_proof import ipa_utils
+from img_proof.ipa_constants import (
+    PYTEST_WORKER_MAX_RSS,
+    PYTEST_WORKER_MAX_SESSIONS,
+    PYTEST_WORKER_TIMEOUT
+)
+from img_proof.ipa_exceptions import IpaWorkerException
+
+# Imported once by the fork server and shared by all workers
+PRELOAD_MODULES = [
+    'paramiko',
+    'pytest',
+    'pytest_jsonreport.plugin',
+    'testinfra',
+    'img_proof.ipa_workers'
+]
+
+
+def _get_context():
+    """
+    Return the multiprocessing context for workers.
+
+    Workers are forked from a fork server which has the pytest
+    modules imported, so a worker starts without importing them.
+    """
+    try:
+        context = multiprocessing.get_context('forkserver')
+    except ValueError:
+        return multiprocessing.get_context('spawn')
+
+    context.set_forkserver_preload(PRELOAD_MODULES)
+    return context
+
+
+def get_rss():
+    """Return the resident set size of the current process in bytes."""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        # Peak size in kilobytes where /proc is not available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return pages * resource.getpagesize()
+
+
+def _run_worker(connection):
+    """
+    Run pytest sessions received on the connection.
+
+    For each list of pytest arguments the exit code, json report,
+    output and resident set size of the worker are sent back. The
+    worker exits when None is received or the connection closes.
+    """
+    while True:
+        try:
+            args = connection.recv()
+        except EOFError:
+            break
+
+        if args is None:
+            break
+
+        plugin = JSONReport()
+        output = io.StringIO()
+
+        try:
+            with ipa_utils.redirect_output(output):
+                result = pytest.main(
+                    args + ['--json-report-file=none'],
+                    plugins=[plugin]
+                )
+        except Exception as error:
+            result = 3
+            output.write(str(error))
+
+        connection.send(
+            (int(result), plugin.report, output.getvalue(), get_rss())
+        )
+
+    connection.close()
+
+
+class PytestWorker(object):
+    """A worker process and the connection to it."""
+
+    def __init__(self, context):
+        """Start the worker process."""
+        self.connection, child = context.Pipe()
+        self.process = context.Process(
+            target=_run_worker,
+            args=(child,),
+            daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.sessions = 0
+
+    def run(self, args, timeout=None):
+        """
+        Run a pytest session in the worker.
+
+        Returns:
+            A tuple with the exit code, json report, output and the
+            resident set size of the worker.
+        Raises:
+            TimeoutError: If the session does not finish in timeout
+                seconds.
+        """
+        self.connection.send(list(args))
+        self.sessions += 1
+
+        if not self.connection.poll(timeout):
+            raise TimeoutError()
+
+        return self.connection.recv()
+
+    def stop(self, timeout=10):
+        """Stop the worker process."""
+        with ipa_utils.ignored(Exception):
+            self.connection.send(None)
+
+        self.process.join(timeout)
+
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+        self.connection.close()
+
+
+class PytestWorkerPool(object):
+    """
+    Pool of pre-forked processes which run pytest sessions.
+
+    Each session runs in a separate process from the harness so
+    conftest modules, testinfra hosts and plugin state do not build
+    up in the harness. A worker is replaced once it ran max_sessions
+    sessions or its resident set size exceeds max_rss megabytes.
+    Replacement workers are started right away so a session does
+    not wait for a worker to start, the old worker is stopped in the
+    background. A worker which does not finish a session in timeout
+    seconds is killed and replaced.
+    """
+
+    def __init__(self, size=1, max_sessions=None, max_rss=None,
+                 timeout=None):
+        """Initialize pool and start the workers."""
+        self.size = max(1, size)
+        self.max_sessions = int(max_sessions or PYTEST_WORKER_MAX_SESSIONS)
+        max_rss = PYTEST_WORKER_MAX_RSS if max_rss is None else max_rss
+        self.max_rss = int(float(max_rss) * 1024 * 1024)
+        self.timeout = float(timeout or PYTEST_WORKER_TIMEOUT)
+
+        self.context = _get_context()
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.workers = set()
+        self.reapers = []
+        self.recycled = 0
+        self.closed = False
+
+        for index in range(self.size):
+            self._start()
+
+    def _start(self):
+        """Start a new worker and add it to the idle workers."""
+        worker = PytestWorker(self.context)
+        self.workers.add(worker)
+        self.idle.put(worker)
+
+    def _replace(self, worker, timeout=10):
+        """Add a new worker to the pool and stop the worker."""
+        with self.lock:
+            self.workers.discard(worker)
+            self.recycled += 1
+
+            if not self.closed:
+                self._start()
+
+            reaper = threading.Thread(
+                target=worker.stop,
+                args=(timeout,),
+                daemon=True
+            )
+            reaper.start()
+            self.reapers = [
+                thread for thread in self.reapers if thread.is_alive()
+            ] + [reaper]
+
+    def run(self, args):
+        """
+        Run a pytest session in the next idle worker.
+
+        Returns:
+            A tuple with the exit code, json report (None if no
+            report was generated) and the output of the session.
+        Raises:
+            IpaWorkerException: If the pool is closed.
+        """
+        worker = self.idle.get()
+
+        if worker is None:
+            # Wake up the next session waiting on a closed pool
+            self.idle.put(None)
+            raise IpaWorkerException('Pytest worker pool is closed.')
+
+        try:
+            result, report, output, rss = worker.run(args, self.timeout)
+        except TimeoutError:
+            self._replace(worker, timeout=0)
+            return 3, None, 'Pytest session timed out after {0:g}s.'.format(
+                self.timeout
+            )
+        except (EOFError, OSError):
+            # The worker closed the connection when it exited
+            worker.process.join(1)
+            self._replace(worker)
+            return 3, None, 'Pytest worker exited with code {0}.'.format(
+                worker.process.exitcode
+            )
+
+        if worker.sessions >= self.max_sessions or rss > self.max_rss:
+            self._replace(worker)
+        else:
+            with self.lock:
+                if not self.closed:
+                    self.idle.put(worker)
+
+        return result, report, output
+
+    def close(self):
+        """Stop all workers, including workers running a session."""
+        with self.lock:
+            self.closed = True
+            workers = list(self.workers)
+            self.workers.clear()
+            reapers = self.reapers
+            self.reapers = []
+
+        while True:
+            try:
+                self.idle.get_nowait()
+            except queue.Empty:
+                break
+
+        # Sessions waiting for a worker raise instead of blocking
+        self.idle.put(None)
+
+        for worker in workers:
+            worker.stop()
+
+        for reaper in reapers:
+            reaper.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
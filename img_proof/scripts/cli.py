@@ -22,6 +22,7 @@
 
 import logging
 import os
+import secrets
 import sys
 import tarfile
 import tempfile
@@ -30,17 +31,31 @@ import click
 
 from img_proof.ipa_constants import (
     IPA_HISTORY_FILE,
+    IPA_POOL_FILE,
+    SERVE_DEFAULT_HOST,
+    SERVE_DEFAULT_PORT,
     SUPPORTED_DISTROS,
     SUPPORTED_CLOUDS,
-    SUPPORTED_ARCHITECTURES
+    SUPPORTED_ARCHITECTURES,
+    SUPPORTED_TEST_ORDERS
 )
 from img_proof import ipa_utils
 from img_proof.ipa_constants import TEST_PATHS
-from img_proof.ipa_controller import collect_tests, test_image
+from img_proof.ipa_controller import (
+    collect_tests,
+    fill_pool,
+    reap_pool,
+    test_image
+)
+from img_proof.ipa_pool import InstancePool
+from img_proof.ipa_matrix import test_matrix
+from img_proof.ipa_jobs import JobStore
+from img_proof.ipa_server import JobManager, JobServer, JobUnixServer
 from img_proof.scripts.cli_utils import (
     archive_history_item,
     cli_process_cpu_options,
     echo_log,
+    echo_matrix_results,
     echo_results,
     echo_results_file,
     echo_style,
@@ -313,6 +328,7 @@ def main(context, no_color):
     '--retry-count',
     help='The number of times a test should be re-run if it fails. '
          'The default is 3 times before the test is marked as failed. '
+         'Only the failed tests are re-run unless --early-exit is used. '
          'This is helpful due to the possibility for flaky SSH sessions '
          'and/or network connections.',
     type=click.IntRange(min=0)
@@ -383,6 +399,84 @@ def main(context, no_color):
     help='Include the plan information in the Azure instance which '
          'is required for certain images in the Azure marketplace.'
 )
+@click.option(
+    '--parallel',
+    help='The number of test files to run concurrently between sync '
+         'points. Default: 1',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--batch',
+    is_flag=True,
+    default=None,
+    help='Run the test files between sync points in a single Pytest '
+         'session (one session per concurrent worker with --parallel).'
+)
+@click.option(
+    '--use-pool',
+    is_flag=True,
+    default=None,
+    help='Use a matching pre-launched instance from the instance pool '
+         'if one is available.'
+)
+@click.option(
+    '--pool-file',
+    type=click.Path(),
+    help='Instance pool file location. '
+         'Default: ~/.config/img_proof/pool.json'
+)
+@click.option(
+    '--ssh-multiplex/--no-ssh-multiplex',
+    default=None,
+    help='Share a single SSH master connection between test runs in '
+         'separate processes. Disabled by default.'
+)
+@click.option(
+    '--remote-exec',
+    is_flag=True,
+    default=None,
+    help='Upload the tests and run Pytest on the instance. Requires '
+         'pytest, pytest-testinfra and pytest-json-report on the instance.'
+)
+@click.option(
+    '--order',
+    type=click.Choice(SUPPORTED_TEST_ORDERS),
+    help='The order of test files between sync points. "duration" runs '
+         'the longest test files in previous runs first. "failed" runs '
+         'test files which recently failed on the image family first. '
+         'Default: default (the listed order).'
+)
+@click.option(
+    '--cache/--no-cache',
+    default=None,
+    help='Reuse the results of test files which passed on the same image '
+         'and instance type if the test files have not changed. '
+         'Disabled by default.'
+)
+@click.option(
+    '--cache-dir',
+    type=click.Path(),
+    help='Result cache directory. Default: ~/.cache/img_proof/results'
+)
+@click.option(
+    '--resume',
+    type=click.Path(),
+    help='Continue an interrupted test run on the same instance given '
+         'the log or results file of the run.'
+)
+@click.option(
+    '--pytest-workers/--no-pytest-workers',
+    default=None,
+    help='Run each pytest session in a pre-forked worker process '
+         'instead of the img-proof process. Workers are replaced after '
+         'a number of sessions or once they use too much memory.'
+)
+@click.option(
+    '--shards',
+    type=click.IntRange(min=1),
+    help='Split the test files across the given number of instances '
+         'of the image and merge the results.'
+)
 @click.argument('tests', nargs=-1)
 @click.pass_context
 def test(context,
@@ -439,6 +533,18 @@ def test(context,
          beta,
          exclude,
          include_plan_information,
+         parallel,
+         batch,
+         use_pool,
+         pool_file,
+         ssh_multiplex,
+         remote_exec,
+         order,
+         cache,
+         cache_dir,
+         resume,
+         pytest_workers,
+         shards,
          tests):
     """Test image in the given framework using the supplied test files."""
     no_color = context.obj['no_color']
@@ -532,6 +638,18 @@ def test(context,
             cpu_options,
             instance_options,
             include_plan_information,
+            parallel,
+            batch,
+            use_pool,
+            pool_file,
+            ssh_multiplex,
+            remote_exec,
+            order,
+            cache,
+            cache_dir,
+            resume,
+            pytest_workers,
+            shards=shards
         )
         echo_results(results, no_color)
         sys.exit(status)
@@ -849,11 +967,460 @@ def list_tests(context, verbose, test_dirs):
         click.echo('\n'.join(results))
 
 
+@click.command()
+@click.option(
+    '-w',
+    '--max-workers',
+    help='The number of combinations to test concurrently. '
+         'Default: 4 or max_workers in the matrix file.',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--results-file',
+    type=click.Path(),
+    help='Location of the aggregated matrix results file. '
+         'Default: ~/img_proof/results/matrix/{timestamp}.results'
+)
+@click.option(
+    '--debug',
+    'log_level',
+    flag_value=logging.DEBUG,
+    help='Display debug level logging to console.'
+)
+@click.option(
+    '--verbose',
+    'log_level',
+    flag_value=logging.INFO,
+    help='(Default) Display logging info to console.'
+)
+@click.option(
+    '--quiet',
+    'log_level',
+    flag_value=logging.WARNING,
+    help='Silence logging information on test run.'
+)
+@click.argument(
+    'matrix_file',
+    type=click.Path(exists=True)
+)
+@click.pass_context
+def matrix(context, max_workers, results_file, log_level, matrix_file):
+    """
+    Test all image combinations in the given matrix file.
+
+    Each combination is tested in a bounded worker pool. The usual
+    log and results files are written per combination along with an
+    aggregated results file for the matrix.
+    """
+    no_color = context.obj['no_color']
+
+    if not log_level:
+        log_level = logging.INFO
+
+    ipa_utils.get_logger(log_level)
+
+    try:
+        status, results = test_matrix(
+            matrix_file,
+            max_workers=max_workers,
+            results_file=results_file,
+            log_level=log_level
+        )
+        echo_matrix_results(results, no_color)
+        sys.exit(status)
+    except Exception as error:
+        if log_level == logging.DEBUG:
+            raise
+
+        echo_style(
+            "{}: {}".format(type(error).__name__, error),
+            no_color,
+            fg='red'
+        )
+        sys.exit(1)
+
+
+@click.command()
+@click.option(
+    '--host',
+    default=SERVE_DEFAULT_HOST,
+    help='The address to listen on. Default: 127.0.0.1'
+)
+@click.option(
+    '--port',
+    default=SERVE_DEFAULT_PORT,
+    type=click.IntRange(min=0),
+    help='The port to listen on. Default: 8390'
+)
+@click.option(
+    '--socket',
+    'socket_path',
+    type=click.Path(dir_okay=False),
+    help='Listen on a Unix socket only accessible to the current user '
+         'instead of a TCP port.'
+)
+@click.option(
+    '--token',
+    envvar='IMG_PROOF_SERVE_TOKEN',
+    help='The token clients send in an Authorization: Bearer header. '
+         'A random token is generated when listening on a TCP port '
+         'without a token.'
+)
+@click.option(
+    '-w',
+    '--max-workers',
+    help='The number of jobs to run concurrently. Default: 4',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--job-store',
+    type=click.Path(dir_okay=False),
+    help='The sqlite file where jobs are stored. '
+         'Default: ~/.config/img_proof/jobs.db'
+)
+@click.option(
+    '--debug',
+    'log_level',
+    flag_value=logging.DEBUG,
+    help='Display debug level logging to console.'
+)
+@click.option(
+    '--verbose',
+    'log_level',
+    flag_value=logging.INFO,
+    help='(Default) Display logging info to console.'
+)
+@click.option(
+    '--quiet',
+    'log_level',
+    flag_value=logging.WARNING,
+    help='Silence logging information on test run.'
+)
+@click.pass_context
+def serve(
+    context, host, port, socket_path, token, max_workers, job_store,
+    log_level
+):
+    """
+    Run a service which tests images submitted as jobs.
+
+    Jobs are submitted to a REST API with the same options as
+    the test_image function and run in a pool of worker processes.
+    """
+    no_color = context.obj['no_color']
+
+    if not log_level:
+        log_level = logging.INFO
+
+    logger = ipa_utils.get_logger(log_level)
+
+    try:
+        manager = JobManager(max_workers, log_level, JobStore(job_store))
+    except Exception as error:
+        if log_level == logging.DEBUG:
+            raise
+
+        echo_style(
+            "{}: {}".format(type(error).__name__, error),
+            no_color,
+            fg='red'
+        )
+        sys.exit(1)
+
+    if not (token or socket_path):
+        token = secrets.token_urlsafe(32)
+        logger.info('Generated API token: {}'.format(token))
+
+    try:
+        if socket_path:
+            server = JobUnixServer(socket_path, manager, token)
+        else:
+            server = JobServer((host, port), manager, token)
+    except OSError as error:
+        manager.shutdown(wait=False)
+        echo_style(
+            'Unable to start server: {}'.format(error),
+            no_color,
+            fg='red'
+        )
+        sys.exit(1)
+
+    if socket_path:
+        logger.info(
+            'Serving img-proof jobs on unix socket {}'.format(socket_path)
+        )
+    else:
+        logger.info(
+            'Serving img-proof jobs on http://{}:{}'.format(
+                *server.server_address[:2]
+            )
+        )
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        manager.shutdown()
+
+
+@click.group()
+@click.option(
+    '--pool-file',
+    default=IPA_POOL_FILE,
+    type=click.Path(),
+    help='Instance pool file location.'
+)
+@click.pass_context
+def pool(context, pool_file):
+    """Manage the pool of pre-launched test instances."""
+    if context.obj is None:
+        context.obj = {}
+    context.obj['pool_file'] = pool_file
+
+
+@click.command()
+@click.option(
+    '-a',
+    '--account',
+    help='Settings account to provide connection information.'
+)
+@click.option(
+    '-C',
+    '--config',
+    type=click.Path(exists=True),
+    help='img_proof config file location. Default: ~/.config/img_proof/config'
+)
+@click.option(
+    '--cloud-config',
+    help='The cloud specific config file location.'
+)
+@click.option(
+    '-d',
+    '--distro',
+    type=click.Choice(SUPPORTED_DISTROS),
+    help='The distribution of the image.'
+)
+@click.option(
+    '-i',
+    '--image-id',
+    help='The ID of the image used for instance.'
+)
+@click.option(
+    '-t',
+    '--instance-type',
+    help='Instance type to use for launching machine.'
+)
+@click.option(
+    '--region',
+    '--zone',
+    'region',
+    help='Cloud region to launch instances.'
+)
+@click.option(
+    '--service-account-file',
+    help='GCE service account file for login credentials.'
+)
+@click.option(
+    '--ssh-private-key-file',
+    type=click.Path(exists=True),
+    help='SSH private key file for accessing instance.'
+)
+@click.option(
+    '-u',
+    '--ssh-user',
+    help='SSH user for accessing instance.'
+)
+@click.option(
+    '--subnet-id',
+    help='Subnet to launch the new instance into.'
+)
+@click.option(
+    '--security-group-id',
+    help='Security group id to assign to instances.'
+)
+@click.option(
+    '-s',
+    '--size',
+    default=1,
+    type=click.IntRange(min=1),
+    help='The number of matching instances to keep in the pool.'
+)
+@click.option(
+    '--ttl',
+    type=click.IntRange(min=1),
+    help='Seconds until a pooled instance expires and can be reaped.'
+)
+@click.argument(
+    'cloud',
+    type=click.Choice(SUPPORTED_CLOUDS)
+)
+@click.pass_context
+def fill(context,
+         account,
+         config,
+         cloud_config,
+         distro,
+         image_id,
+         instance_type,
+         region,
+         service_account_file,
+         ssh_private_key_file,
+         ssh_user,
+         subnet_id,
+         security_group_id,
+         size,
+         ttl,
+         cloud):
+    """
+    Launch instances until the pool has the requested size.
+
+    Instances in the pool are matched by cloud, image, instance
+    type and region.
+    """
+    no_color = context.obj['no_color']
+    ipa_utils.get_logger(logging.INFO)
+
+    try:
+        launched = fill_pool(
+            size,
+            ttl=ttl,
+            pool_file=context.obj['pool_file'],
+            cloud_name=cloud,
+            account=account,
+            config=config,
+            cloud_config=cloud_config,
+            distro=distro,
+            image_id=image_id,
+            instance_type=instance_type,
+            region=region,
+            service_account_file=service_account_file,
+            ssh_private_key_file=ssh_private_key_file,
+            ssh_user=ssh_user,
+            subnet_id=subnet_id,
+            security_group_id=security_group_id
+        )
+    except Exception as error:
+        echo_style(
+            "{}: {}".format(type(error).__name__, error),
+            no_color,
+            fg='red'
+        )
+        sys.exit(1)
+
+    for instance_id in launched:
+        click.echo('Launched pool instance: {}'.format(instance_id))
+
+
+@click.command()
+@click.option(
+    '-a',
+    '--account',
+    help='Settings account to provide connection information.'
+)
+@click.option(
+    '-C',
+    '--config',
+    type=click.Path(exists=True),
+    help='img_proof config file location. Default: ~/.config/img_proof/config'
+)
+@click.option(
+    '--cloud-config',
+    help='The cloud specific config file location.'
+)
+@click.option(
+    '--service-account-file',
+    help='GCE service account file for login credentials.'
+)
+@click.option(
+    '--ssh-private-key-file',
+    type=click.Path(exists=True),
+    help='SSH private key file for accessing instance.'
+)
+@click.option(
+    '--all',
+    'reap_all',
+    is_flag=True,
+    help='Terminate all pooled instances for the cloud, '
+         'not only expired instances.'
+)
+@click.argument(
+    'cloud',
+    type=click.Choice(SUPPORTED_CLOUDS)
+)
+@click.pass_context
+def reap(context,
+         account,
+         config,
+         cloud_config,
+         service_account_file,
+         ssh_private_key_file,
+         reap_all,
+         cloud):
+    """
+    Terminate expired instances in the pool.
+    """
+    ipa_utils.get_logger(logging.INFO)
+
+    terminated = reap_pool(
+        cloud,
+        pool_file=context.obj['pool_file'],
+        reap_all=reap_all,
+        account=account,
+        config=config,
+        cloud_config=cloud_config,
+        service_account_file=service_account_file,
+        ssh_private_key_file=ssh_private_key_file
+    )
+
+    for instance_id in terminated:
+        click.echo('Terminated pool instance: {}'.format(instance_id))
+
+
+@click.command(name='list')
+@click.pass_context
+def list_pool(context):
+    """
+    Display the instances in the pool.
+    """
+    no_color = context.obj['no_color']
+
+    try:
+        entries = InstancePool(context.obj['pool_file']).list_entries()
+    except Exception as error:
+        echo_style(
+            'Unable to read instance pool: %s' % error,
+            no_color,
+            fg='red'
+        )
+        sys.exit(1)
+
+    for entry in entries:
+        click.echo(
+            ' '.join(
+                str(entry[key]) for key in (
+                    'cloud',
+                    'instance_id',
+                    'image_id',
+                    'instance_type',
+                    'region'
+                )
+            )
+        )
+
+
 main.add_command(list_tests)
+main.add_command(matrix)
+pool.add_command(fill)
+pool.add_command(list_pool)
+pool.add_command(reap)
+main.add_command(pool)
 results.add_command(archive)
 results.add_command(clear)
 results.add_command(delete)
 results.add_command(list_results)
 results.add_command(show)
 main.add_command(results)
+main.add_command(serve)
 main.add_command(test)
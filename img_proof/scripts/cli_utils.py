@@ -103,6 +103,44 @@ def echo_log(log_file, no_color):
     click.echo(log_output)
 
 
+def echo_matrix_results(data, no_color):
+    """Print matrix results with one line per combination."""
+    for run in data['runs']:
+        if run['status'] == 0:
+            fg = 'green'
+            status = 'PASSED'
+        else:
+            fg = 'red'
+            status = 'FAILED'
+
+        line = ' '.join(
+            str(item) for item in (
+                status,
+                run['image_id'],
+                run['region'],
+                run['instance_type']
+            ) if item
+        )
+
+        if run.get('error'):
+            line = '{} ({})'.format(line, run['error'])
+
+        echo_style(line, no_color, fg=fg)
+
+    summary = data['summary']
+    fg = 'red' if summary['failed'] else 'green'
+    echo_style(
+        'Matrix runs={}|pass={}|fail={}'.format(
+            summary['total'],
+            summary['passed'],
+            summary['failed']
+        ),
+        no_color,
+        fg=fg
+    )
+    click.echo('Results file: {}'.format(data['info']['results_file']))
+
+
 def echo_results(data, no_color, verbose=False):
     """Print test results in nagios style format."""
     try:
@@ -129,6 +167,16 @@ def echo_results(data, no_color, verbose=False):
         str(summary.get('failed', 0)),
         str(summary.get('error', 0))
     )
+
+    if summary.get('retries'):
+        results += '|retries={}|retry_duration={:.2f}s'.format(
+            summary['retries'],
+            summary.get('retry_duration', 0)
+        )
+
+    if summary.get('cached'):
+        results += '|cached={}'.format(summary['cached'])
+
     echo_style(results, no_color, fg=fg)
 
     if verbose:
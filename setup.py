@@ -63,6 +63,7 @@ setup(
     python_requires='>=3.7',
     install_requires=requirements,
     extras_require={
+        'asyncssh': ['asyncssh'],
         'dev': dev_requirements,
         'test': test_requirements,
         'tox': tox_requirements
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Benchmark the paramiko and asyncssh SSH backends."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Run against a local sshd, for example:
+#
+#   python tests/benchmarks/benchmark_ssh_backends.py \
+#       --ssh-private-key-file ~/.ssh/id_rsa --connections 100
+#
+# The paramiko backend uses one thread per connection, the asyncssh
+# coroutines drive all connections from a single event loop. The
+# blocking AsyncSSHClient used by test runs is not benchmarked.
+
+import argparse
+import asyncio
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import NamedTemporaryFile
+
+from img_proof import ipa_asyncssh, ipa_utils
+
+
+def run_paramiko(args, source_file):
+    """Connect, run commands and copy a file with paramiko threads."""
+    def run_connection(index):
+        client = ipa_utils.establish_ssh_connection(
+            args.host,
+            args.ssh_private_key_file,
+            args.ssh_user,
+            args.port,
+            attempts=1
+        )
+
+        try:
+            for _ in range(args.commands):
+                ipa_utils.execute_ssh_command(client, 'true')
+
+            ipa_utils.put_file(
+                client,
+                source_file,
+                '/tmp/img_proof_benchmark_{0}'.format(index)
+            )
+        finally:
+            client.close()
+
+    with ThreadPoolExecutor(max_workers=args.connections) as executor:
+        list(executor.map(run_connection, range(args.connections)))
+
+
+async def run_asyncssh(args, source_file):
+    """Connect, run commands and copy a file with one event loop."""
+    async def run_connection(index):
+        connection = await ipa_asyncssh.connect(
+            args.host,
+            args.ssh_private_key_file,
+            args.ssh_user,
+            port=args.port
+        )
+
+        try:
+            for _ in range(args.commands):
+                await ipa_asyncssh.execute_ssh_command(connection, 'true')
+
+            await ipa_asyncssh.put_file(
+                connection,
+                source_file,
+                '/tmp/img_proof_benchmark_{0}'.format(index)
+            )
+        finally:
+            connection.close()
+            await connection.wait_closed()
+
+    await asyncio.gather(
+        *(run_connection(index) for index in range(args.connections))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', default=22, type=int)
+    parser.add_argument('--ssh-user', default=os.environ.get('USER'))
+    parser.add_argument(
+        '--ssh-private-key-file',
+        default=os.path.expanduser('~/.ssh/id_rsa')
+    )
+    parser.add_argument('--connections', default=50, type=int)
+    parser.add_argument('--commands', default=10, type=int)
+    parser.add_argument('--file-size', default=64, type=int, help='KiB')
+    args = parser.parse_args()
+
+    with NamedTemporaryFile() as source_file:
+        source_file.write(os.urandom(args.file_size * 1024))
+        source_file.flush()
+
+        start = time.perf_counter()
+        run_paramiko(args, source_file.name)
+        paramiko_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        asyncio.run(run_asyncssh(args, source_file.name))
+        asyncssh_time = time.perf_counter() - start
+
+    print(
+        '{0} connections, {1} commands each'.format(
+            args.connections,
+            args.commands
+        )
+    )
+    print('paramiko: {0:.2f}s'.format(paramiko_time))
+    print('asyncssh: {0:.2f}s'.format(asyncssh_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -26,6 +26,7 @@ import pytest
 
 from img_proof.ipa_aliyun import AliyunCloud
 from img_proof.ipa_exceptions import AliyunCloudException
+from img_proof.ipa_pool import InstancePool
 
 from unittest.mock import MagicMock, patch
 
@@ -140,6 +141,33 @@ class TestAliyunProvider(object):
         provider = AliyunCloud(**self.kwargs)
         assert not provider._is_instance_running()
 
+    @patch.object(AliyunCloud, '_start_instance_if_stopped')
+    @patch.object(AliyunCloud, '_get_instance')
+    def test_acquire_pool_instance(
+        self, mock_get_instance, mock_start_instance, tmpdir
+    ):
+        """Test setting the IP of a pooled instance."""
+        self.kwargs['use_pool'] = True
+        self.kwargs['pool_file'] = str(tmpdir.join('pool.json'))
+        provider = AliyunCloud(**self.kwargs)
+
+        InstancePool(self.kwargs['pool_file']).add(
+            'aliyun',
+            provider.image_id,
+            provider.instance_type,
+            provider.region,
+            'i-pooled'
+        )
+        assert provider._acquire_pool_instance() is True
+        assert provider.running_instance_id == 'i-pooled'
+
+        mock_get_instance.return_value = {
+            'PublicIpAddress': {'IpAddress': []},
+            'InnerIpAddress': {'IpAddress': ['10.0.0.5']}
+        }
+        provider._set_instance_ip()
+        assert provider.instance_ip == '10.0.0.5'
+
     @patch.object(AliyunCloud, '_wait_on_instance')
     @patch.object(AliyunCloud, '_connect')
     def test_launch_instance(self, mock_connect, mock_wait_on_instance):
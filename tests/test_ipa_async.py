@@ -0,0 +1,224 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""img_proof asyncio api unit tests."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import io
+import json
+import logging
+import sys
+
+import pytest
+
+from unittest.mock import MagicMock, patch
+
+from img_proof.ipa_async import _Cancelled, _run_worker
+from img_proof.ipa_async import test_image_async as async_test_image
+from img_proof.ipa_exceptions import IpaControllerException
+
+FAKE_COMMAND = [sys.executable, '-c', '''
+import json
+import signal
+import sys
+import time
+
+kwargs = json.load(sys.stdin)
+
+if kwargs.get('image_id') == 'preparing':
+    # The instance is reported while the worker is stopped
+    def stop(signum, frame):
+        print(json.dumps({'event': 'instance', 'instance_id': 'i-456'}))
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    time.sleep(60)
+
+print(json.dumps({'event': 'log', 'level': 30, 'message': 'Testing'}))
+print(json.dumps({'event': 'instance', 'instance_id': 'i-123'}))
+sys.stdout.flush()
+
+if kwargs.get('image_id') == 'slow':
+    time.sleep(60)
+
+print(json.dumps({
+    'event': 'result',
+    'status': 0,
+    'results': {'summary': {'passed': 1}, 'options': kwargs}
+}))
+''']
+
+
+def get_events(events):
+    """Return the events written to the stream."""
+    return [json.loads(line) for line in events.getvalue().splitlines()]
+
+
+@patch('img_proof.ipa_async.get_cloud')
+def test_run_worker(mock_get_cloud):
+    """Test the worker writes instance, log and result events."""
+    def run():
+        logging.getLogger('img_proof').warning('Testing image')
+        return 0, {'summary': {'passed': 1}}
+
+    cloud = MagicMock()
+    cloud.running_instance_id = 'i-123'
+    cloud.test_image.side_effect = run
+    mock_get_cloud.return_value = cloud
+
+    events = io.StringIO()
+    _run_worker({'cloud_name': 'ec2'}, events)
+
+    assert get_events(events) == [
+        {'event': 'instance', 'instance_id': 'i-123'},
+        {'event': 'log', 'level': logging.WARNING, 'message': 'Testing image'},
+        {'event': 'result', 'status': 0, 'results': {'summary': {'passed': 1}}}
+    ]
+
+    mock_get_cloud.side_effect = Exception('Broken!')
+    events = io.StringIO()
+    _run_worker({'cloud_name': 'ec2'}, events)
+
+    event = get_events(events)[-1]
+    assert event['status'] == 1
+    assert event['results']['error'] == 'Exception: Broken!'
+
+
+@patch('img_proof.ipa_async.get_cloud')
+def test_run_worker_cancelled(mock_get_cloud):
+    """Test the worker terminates the instance if cancelled."""
+    cloud = MagicMock()
+
+    def prepare():
+        cloud.running_instance_id = 'i-123'
+        raise _Cancelled()
+
+    cloud.prepare_instance.side_effect = prepare
+    mock_get_cloud.return_value = cloud
+
+    events = io.StringIO()
+    _run_worker({'cloud_name': 'ec2'}, events)
+
+    cloud._terminate_instance.assert_called_once_with()
+    assert 'result' not in [event['event'] for event in get_events(events)]
+
+    cloud.reset_mock()
+    _run_worker({'cloud_name': 'ec2', 'cleanup': False}, events)
+    assert cloud._terminate_instance.call_count == 0
+
+
+@patch('img_proof.ipa_async.get_cloud')
+def test_run_worker_cancelled_reporting(mock_get_cloud):
+    """Test the worker terminates the instance it did not report."""
+    cloud = MagicMock()
+    cloud.running_instance_id = 'i-123'
+    mock_get_cloud.return_value = cloud
+
+    events = MagicMock()
+    events.flush.side_effect = _Cancelled()
+    _run_worker({'cloud_name': 'ec2'}, events)
+
+    cloud._terminate_instance.assert_called_once_with()
+
+    # Once reported the parent terminates the instance
+    cloud.reset_mock()
+    cloud.test_image.side_effect = _Cancelled()
+    _run_worker({'cloud_name': 'ec2'}, io.StringIO())
+
+    assert cloud._terminate_instance.call_count == 0
+
+
+@patch('img_proof.ipa_async.WORKER_COMMAND', FAKE_COMMAND)
+def test_image_async():
+    """Test an image asynchronously in a worker process."""
+    async def run():
+        return await asyncio.gather(*[
+            async_test_image('ec2', image_id=image_id, distro='sles')
+            for image_id in ('ami-1', 'ami-2')
+        ])
+
+    results = asyncio.run(run())
+
+    for (status, result), image_id in zip(results, ('ami-1', 'ami-2')):
+        assert status == 0
+        assert result['options'] == {
+            'cloud_name': 'ec2',
+            'image_id': image_id,
+            'distro': 'sles'
+        }
+
+    with pytest.raises(IpaControllerException) as error:
+        asyncio.run(async_test_image('ec2', log_callback=MagicMock()))
+
+    assert str(error.value) == \
+        'A log callback is not supported when testing asynchronously.'
+
+
+@patch('img_proof.ipa_async._terminate_instance')
+@patch('img_proof.ipa_async.WORKER_COMMAND', FAKE_COMMAND)
+def test_image_async_cancel(mock_terminate_instance):
+    """Test cancelling an async test run terminates the instance."""
+    async def run():
+        task = asyncio.ensure_future(
+            async_test_image('ec2', image_id='slow')
+        )
+        await asyncio.sleep(1)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(run())
+
+    mock_terminate_instance.assert_called_once_with(
+        {'cloud_name': 'ec2', 'image_id': 'slow'},
+        'i-123'
+    )
+
+
+@patch('img_proof.ipa_async._terminate_instance')
+@patch('img_proof.ipa_async.WORKER_COMMAND', FAKE_COMMAND)
+def test_image_async_cancel_preparing(mock_terminate_instance):
+    """Test cancelling before the instance event is read."""
+    async def run():
+        task = asyncio.ensure_future(
+            async_test_image('ec2', image_id='preparing')
+        )
+        await asyncio.sleep(1)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(run())
+
+    mock_terminate_instance.assert_called_once_with(
+        {'cloud_name': 'ec2', 'image_id': 'preparing'},
+        'i-456'
+    )
+
+
+@patch('img_proof.ipa_async.WORKER_COMMAND', [sys.executable, '-c', 'pass'])
+def test_image_async_no_results():
+    """Test a worker which exits without results."""
+    with pytest.raises(IpaControllerException) as error:
+        asyncio.run(async_test_image('ec2', image_id='ami-1'))
+
+    assert str(error.value) == \
+        'Test process exited with status 0 without results.'
@@ -0,0 +1,226 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""img_proof asyncssh backend unit tests."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from tempfile import NamedTemporaryFile
+from unittest.mock import MagicMock, patch
+
+from paramiko.ssh_exception import AuthenticationException
+
+from img_proof import ipa_utils
+from img_proof.ipa_cloud import IpaCloud
+from img_proof.ipa_exceptions import IpaCloudException, IpaSSHException
+
+
+class PermissionDenied(Exception):
+    pass
+
+
+class ChannelOpenError(Exception):
+    pass
+
+
+class CoroutineMock(MagicMock):
+    """Mock coroutine function, AsyncMock requires Python 3.8."""
+
+    def _get_child_mock(self, **kwargs):
+        return MagicMock(**kwargs)
+
+    def __call__(self, *args, **kwargs):
+        try:
+            result = super(CoroutineMock, self).__call__(*args, **kwargs)
+        except Exception as error:
+            exception = error
+
+            async def coroutine():
+                raise exception
+        else:
+            async def coroutine():
+                return result
+
+        return coroutine()
+
+
+class SFTPContext(object):
+    """Async context manager of an SFTP client."""
+
+    def __init__(self, sftp_client):
+        self.sftp_client = sftp_client
+
+    async def __aenter__(self):
+        return self.sftp_client
+
+    async def __aexit__(self, *args):
+        return False
+
+
+def get_mock_asyncssh():
+    """Return a mock asyncssh module with one connection."""
+    result = MagicMock()
+    result.stdout = b'test_dir\n'
+    result.stderr = b''
+    result.exit_status = 0
+
+    sftp_client = MagicMock()
+    sftp_client.put = CoroutineMock()
+    sftp_client.get = CoroutineMock()
+
+    connection = MagicMock()
+    connection.run = CoroutineMock(return_value=result)
+    connection.start_sftp_client.return_value = SFTPContext(sftp_client)
+    connection.create_process = CoroutineMock()
+    connection.get_server_host_key.return_value.public_data = b'key'
+
+    mock_asyncssh = MagicMock()
+    mock_asyncssh.PermissionDenied = PermissionDenied
+    mock_asyncssh.connect = CoroutineMock(return_value=connection)
+    return mock_asyncssh, connection, sftp_client
+
+
+@patch('img_proof.ipa_asyncssh.asyncssh')
+def test_asyncssh_client(mock_asyncssh_module):
+    """Test the asyncssh client with the ipa_utils SSH functions."""
+    mock_asyncssh, connection, sftp_client = get_mock_asyncssh()
+    mock_asyncssh_module.connect = mock_asyncssh.connect
+    mock_asyncssh_module.PermissionDenied = PermissionDenied
+    cache = {}
+
+    with NamedTemporaryFile() as key:
+        client = ipa_utils.get_ssh_client(
+            '10.0.0.1',
+            key.name,
+            timeout=10,
+            cache=cache,
+            backend='asyncssh'
+        )
+
+        assert cache == {'10.0.0.1': client}
+        assert mock_asyncssh.connect.call_args[0] == ('10.0.0.1',)
+        assert mock_asyncssh.connect.call_args[1]['client_keys'] == [
+            key.name
+        ]
+
+    assert ipa_utils.execute_ssh_command(client, 'ls') == 'test_dir\n'
+    connection.run.assert_called_with('ls', check=False, encoding=None)
+
+    stdin, stdout, stderr = client.exec_command('ls')
+    assert stdout.channel.recv_exit_status() == 0
+
+    connection.run.return_value.stderr = b'Not found!'
+    with pytest.raises(IpaSSHException) as error:
+        ipa_utils.execute_ssh_command(client, 'ls missing')
+
+    assert str(error.value) == 'test_dir\nNot found!'
+
+    ipa_utils.put_file(client, 'local.py', 'remote.py')
+    sftp_client.put.assert_called_once_with('local.py', 'remote.py')
+
+    ipa_utils.get_file(client, 'remote.log', 'local.log')
+    sftp_client.get.assert_called_once_with('remote.log', 'local.log')
+
+    assert ipa_utils.get_host_key_fingerprint(client) == \
+        b'3c6e0b8a9c15224a8228b9a98ca1531d'
+
+    # Commands run without waiting raise if the session fails
+    session = client.get_transport().open_session()
+    session.exec_command('reboot')
+    connection.create_process.assert_called_once_with('reboot')
+
+    connection.create_process.side_effect = ChannelOpenError('Closed')
+    with pytest.raises(ChannelOpenError):
+        session.exec_command('reboot')
+
+    ipa_utils.clear_cache(cache=cache)
+    assert cache == {}
+
+
+@patch('img_proof.ipa_asyncssh.asyncssh')
+@patch('img_proof.ipa_utils.time')
+def test_asyncssh_authentication_failed(mock_time, mock_asyncssh_module):
+    """Test asyncssh permission denied is an authentication failure."""
+    mock_asyncssh_module.PermissionDenied = PermissionDenied
+    mock_asyncssh_module.connect = CoroutineMock(
+        side_effect=PermissionDenied('Permission denied')
+    )
+
+    with NamedTemporaryFile() as key:
+        with pytest.raises(AuthenticationException):
+            ipa_utils.establish_ssh_connection(
+                '10.0.0.1',
+                key.name,
+                'root',
+                22,
+                backend='asyncssh'
+            )
+
+        assert mock_asyncssh_module.connect.call_count == 2
+
+
+@patch('img_proof.ipa_asyncssh.asyncssh', None)
+def test_asyncssh_not_installed():
+    """Test asyncssh backend requires the asyncssh package."""
+    with pytest.raises(IpaSSHException) as error:
+        ipa_utils.establish_ssh_connection(
+            '10.0.0.1',
+            'key',
+            'root',
+            22,
+            backend='asyncssh'
+        )
+
+    assert str(error.value) == \
+        'The asyncssh SSH backend requires the asyncssh package.'
+
+
+@patch('img_proof.ipa_cloud.ipa_utils.get_config_values')
+def test_cloud_ssh_backend(mock_get_config_values):
+    """Test cloud ssh backend config option."""
+    kwargs = {
+        'config': 'tests/data/config',
+        'distro_name': 'SLES',
+        'image_id': 'fakeimage',
+        'no_default_test_dirs': True,
+        'test_dirs': 'tests/data/tests',
+        'test_files': ['test_image']
+    }
+
+    mock_get_config_values.return_value = {'ssh_backend': 'asyncssh'}
+    with patch('img_proof.ipa_asyncssh.asyncssh'):
+        cloud = IpaCloud(**kwargs)
+
+    assert cloud.ssh_backend == 'asyncssh'
+    assert cloud.session.ssh_backend == 'asyncssh'
+
+    with patch('img_proof.ipa_asyncssh.asyncssh', None):
+        with pytest.raises(IpaCloudException) as error:
+            IpaCloud(**kwargs)
+
+    assert str(error.value) == \
+        'The asyncssh SSH backend requires the asyncssh package.'
+
+    mock_get_config_values.return_value = {'ssh_backend': 'libssh'}
+    with pytest.raises(IpaCloudException) as error:
+        IpaCloud(**kwargs)
+
+    assert str(error.value) == 'SSH backend: libssh, not supported.'
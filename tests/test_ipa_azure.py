@@ -25,6 +25,7 @@ import pytest
 
 from img_proof.ipa_azure import AzureCloud
 from img_proof.ipa_exceptions import AzureCloudException
+from img_proof.ipa_pool import InstancePool
 
 from unittest.mock import MagicMock, patch
 
@@ -315,8 +316,41 @@ class TestAzureProvider(object):
         provider._set_instance_ip()
         assert provider.instance_ip == '10.0.0.1'
 
-    def test_azure_start_instance(self):
+    @patch.object(AzureCloud, '_start_instance_if_stopped')
+    def test_azure_acquire_pool_instance(self, mock_start_instance, tmpdir):
+        """Test resource names are set for a pooled instance."""
+        del self.kwargs['running_instance_id']
+        self.kwargs['use_pool'] = True
+        self.kwargs['pool_file'] = str(tmpdir.join('pool.json'))
+        provider = self.helper_get_provider()
+
+        InstancePool(self.kwargs['pool_file']).add(
+            'azure',
+            provider.image_id,
+            provider.instance_type,
+            provider.region,
+            'azure-pooled'
+        )
+        assert provider._acquire_pool_instance() is True
+        assert provider.nic_name == 'azure-pooled-nic'
+
+        self.client.public_ip_addresses.get.side_effect = Exception(
+            'IP not found'
+        )
+        nic = MagicMock()
+        nic.ip_configurations[0].private_ip_address = '10.0.0.2'
+        self.client.network_interfaces.get.return_value = nic
+
+        provider._set_instance_ip()
+        assert provider.instance_ip == '10.0.0.2'
+        self.client.network_interfaces.get.assert_called_once_with(
+            'azure-pooled', 'azure-pooled-nic'
+        )
+
+    @patch.object(AzureCloud, '_get_instance_state')
+    def test_azure_start_instance(self, mock_get_instance_state):
         """Test start instance method."""
+        mock_get_instance_state.return_value = 'VM running'
         provider = self.helper_get_provider()
         provider.running_instance_id = 'img_proof-test-instance'
 
@@ -324,6 +358,9 @@ class TestAzureProvider(object):
         self.client.virtual_machines.begin_start.assert_called_once_with(
             'img_proof-test-instance', 'img_proof-test-instance'
         )
+        self.client.virtual_machines.begin_start.return_value.\
+            result.assert_called_once_with(timeout=600)
+        assert provider.instance_transitions[0]['state'] == 'VM running'
 
         # Test exception
         self.client.virtual_machines.begin_start.side_effect = Exception(
@@ -336,8 +373,10 @@ class TestAzureProvider(object):
         assert str(error.value) == 'Unable to start instance: ' \
             'Instance not found.'
 
-    def test_azure_stop_instance(self):
+    @patch.object(AzureCloud, '_get_instance_state')
+    def test_azure_stop_instance(self, mock_get_instance_state):
         """Test stop instance method."""
+        mock_get_instance_state.return_value = 'VM stopped'
         provider = self.helper_get_provider()
         provider.running_instance_id = 'img_proof-test-instance'
 
@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""img_proof result cache unit tests."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+from tempfile import TemporaryDirectory
+
+from img_proof.ipa_cache import ResultCache, get_cache_key
+
+
+class TestResultCache(object):
+    """img_proof result cache test class."""
+
+    def setup_method(self, method):
+        """Set up temp cache directory."""
+        self.cache_dir = TemporaryDirectory()
+        self.cache = ResultCache(
+            os.path.join(self.cache_dir.name, 'cache'),
+            max_size=0.001
+        )
+
+    def teardown_method(self, method):
+        """Cleanup cache directory."""
+        self.cache_dir.cleanup()
+
+    def test_cache_get_set(self):
+        """Test results are stored and returned by key."""
+        results = {'tests': [], 'summary': {'passed': 1}}
+
+        assert self.cache.get('key') is None
+
+        self.cache.set('key', results)
+        assert self.cache.get('key') == results
+
+    def test_cache_evict(self):
+        """Test least recently used entries are evicted."""
+        results = {'tests': [], 'summary': {'output': 'x' * 400}}
+
+        self.cache.set('first', results)
+        self.cache.set('second', results)
+        os.utime(self.cache._get_path('first'), (0, 0))
+        os.utime(self.cache._get_path('second'), (1, 1))
+
+        # Reading an entry marks it as recently used
+        assert self.cache.get('first') == results
+
+        self.cache.set('third', results)
+        assert self.cache.get('second') is None
+        assert self.cache.get('first') == results
+        assert self.cache.get('third') == results
+
+    def test_cache_key(self):
+        """Test cache key changes with test and conftest contents."""
+        test_dir = os.path.join(self.cache_dir.name, 'tests', 'sles')
+        os.makedirs(test_dir)
+
+        test_file = os.path.join(test_dir, 'test_sles.py')
+        conftest = os.path.join(self.cache_dir.name, 'tests', 'conftest.py')
+
+        with open(test_file, 'w') as f:
+            f.write('def test_sles():\n    pass\n')
+
+        key = get_cache_key('image', 't3.micro', test_file)
+        assert key == get_cache_key('image', 't3.micro', test_file)
+        assert key != get_cache_key('image', 't3.small', test_file)
+        assert key != get_cache_key('image2', 't3.micro', test_file)
+        assert key != get_cache_key(
+            'image', 't3.micro', test_file + '::test_sles'
+        )
+        assert key != get_cache_key(
+            'image', 't3.micro', test_file, 'not skipinbeta'
+        )
+
+        with open(conftest, 'w') as f:
+            f.write('import pytest\n')
+
+        conftest_key = get_cache_key('image', 't3.micro', test_file)
+        assert conftest_key != key
+
+        with open(test_file, 'a') as f:
+            f.write('\n')
+
+        assert get_cache_key('image', 't3.micro', test_file) != conftest_key
@@ -43,11 +43,16 @@ def test_cli_ipa_help():
     "endpoint,value",
     [('list',
       'Print a list of test files or test cases.'),
+     ('matrix',
+      'Test all image combinations in the given matrix file.'),
+     ('pool',
+      'Manage the pool of pre-launched test instances.'),
      ('results',
       'Process provided history log and results files.'),
      ('test',
       'Test image in the given framework using the supplied test files.')],
-    ids=['img_proof-list', 'img_proof-results', 'img_proof-test']
+    ids=['img_proof-list', 'img_proof-matrix', 'img_proof-pool',
+         'img_proof-results', 'img_proof-test']
 )
 def test_cli_help(endpoint, value):
     """Confirm img_proof list --help is successful."""
@@ -439,3 +444,24 @@ def test_cli_license():
     )
     assert result.exit_code == 0
     assert result.output.strip() == 'GPLv3+'
+
+
+def test_cli_pool_list():
+    """Test img_proof pool list endpoint."""
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        with open('pool.json', 'w') as f:
+            f.write(
+                '[{"cloud": "ec2", "instance_id": "i-123", '
+                '"image_id": "ami-123", "instance_type": "t3.micro", '
+                '"region": "us-west-1"}]'
+            )
+
+        result = runner.invoke(
+            main,
+            ['pool', '--pool-file', 'pool.json', 'list']
+        )
+
+    assert result.exit_code == 0
+    assert result.output == 'ec2 i-123 ami-123 t3.micro us-west-1\n'
@@ -57,6 +57,29 @@ def test_echo_results():
     cli_utils.echo_results(DATA, False, verbose=True)
 
 
+def test_echo_results_retries(capsys):
+    """Test cli utils echo results with retries in summary."""
+    data = {
+        'summary': {
+            'passed': 2, 'total': 2, 'retries': 1, 'retry_duration': 3.5
+        }
+    }
+    cli_utils.echo_results(data, True)
+
+    out, err = capsys.readouterr()
+    assert out == 'PASSED tests=2|pass=2|skip=0|fail=0|error=0' \
+        '|retries=1|retry_duration=3.50s\n'
+
+
+def test_echo_results_cached(capsys):
+    """Test cli utils echo results with cached tests in summary."""
+    data = {'summary': {'passed': 2, 'total': 2, 'cached': 1}}
+    cli_utils.echo_results(data, True)
+
+    out, err = capsys.readouterr()
+    assert out == 'PASSED tests=2|pass=2|skip=0|fail=0|error=0|cached=1\n'
+
+
 def test_cli_process_cpu_options():
     """Test process-cpu options"""
     TEST_DATA = [
@@ -24,11 +24,20 @@
 import io
 import pytest
 import os
+import shutil
+import subprocess
+import sys
 
 from img_proof import ipa_utils
+from img_proof.ipa_cache import ResultCache
 from img_proof.ipa_distro import Distro
-from img_proof.ipa_exceptions import IpaCloudException, IpaSSHException
+from img_proof.ipa_exceptions import (
+    IpaCloudException,
+    IpaSchedulerException,
+    IpaSSHException
+)
 from img_proof.ipa_cloud import IpaCloud
+from img_proof.ipa_pool import InstancePool
 
 from unittest.mock import call, MagicMock, patch
 from tempfile import TemporaryDirectory
@@ -106,9 +115,16 @@ class TestIpaCloud(object):
         assert str(error.value) == \
             'Image ID or running instance is required.'
 
+    @patch('img_proof.ipa_cloud.time')
+    @patch.object(ipa_utils, 'wait_for_ssh_banner')
     @patch.object(ipa_utils, 'get_ssh_client')
-    def test_cloud_get_ssh_client(self, mock_get_ssh_client):
+    def test_cloud_get_ssh_client(
+        self, mock_get_ssh_client, mock_wait_for_ssh_banner, mock_time
+    ):
         """Test get ssh client method."""
+        probe = {'attempts': 2, 'banner': 'SSH-2.0', 'time_to_banner': 1.5}
+        mock_wait_for_ssh_banner.return_value = probe
+        mock_time.time.side_effect = [100, 160]
         cloud = IpaCloud(**self.kwargs)
 
         cloud.instance_ip = '127.0.0.1'
@@ -121,8 +137,56 @@ class TestIpaCloud(object):
         val = cloud._get_ssh_client()
         assert val == client
         assert mock_get_ssh_client.call_count == 1
+        assert cloud.ssh_probes == [probe]
+
+        # The connection gets the time left after the banner wait
+        assert mock_wait_for_ssh_banner.call_args[1]['timeout'] == 600
+        assert mock_get_ssh_client.call_args[1]['timeout'] == 540
+
+        # No probe if connection is cached in the session
+        cloud.session.clients['127.0.0.1'] = client
+        cloud._get_ssh_client()
+        assert mock_wait_for_ssh_banner.call_count == 1
+        assert mock_get_ssh_client.call_args[1]['timeout'] == 600
+        assert mock_get_ssh_client.call_args[1]['cache'] is \
+            cloud.session.clients
+
+        cloud.session.clear_cache()
+        client.close.assert_called_once_with()
+
+    @patch('img_proof.ipa_cloud.shutil.which')
+    def test_cloud_get_testinfra_host(self, mock_which):
+        """Test testinfra host spec with and without multiplexing."""
+        mock_which.return_value = '/usr/bin/ssh'
+        cloud = IpaCloud(**self.kwargs)
+        cloud.instance_ip = '10.0.0.1'
+        assert cloud._get_testinfra_host() == '10.0.0.1'
 
-        ipa_utils.clear_cache()
+        self.kwargs['ssh_multiplex'] = True
+        cloud = IpaCloud(**self.kwargs)
+        cloud.instance_ip = '10.0.0.1'
+        assert cloud._get_testinfra_host() == \
+            'ssh://10.0.0.1?controlpersist=600'
+
+        cloud.instance_ip = '2001:db8::1'
+        assert cloud._get_testinfra_host() == \
+            'ssh://[2001:db8::1]?controlpersist=600'
+
+        # In process tests share the session client
+        cloud.session.clients['2001:db8::1'] = MagicMock()
+        assert cloud._get_testinfra_host(in_process=True) == \
+            'img-proof://[2001:db8::1]'
+        assert cloud._get_testinfra_host() == \
+            'ssh://[2001:db8::1]?controlpersist=600'
+
+        cloud.ssh_backend = 'asyncssh'
+        assert cloud._get_testinfra_host(in_process=True) == \
+            'ssh://[2001:db8::1]?controlpersist=600'
+
+        # No ssh client available
+        mock_which.return_value = None
+        cloud = IpaCloud(**self.kwargs)
+        assert not cloud.ssh_multiplex
 
     @patch('img_proof.ipa_cloud.ipa_utils.get_public_ssh_key')
     def test_cloud_get_user_data(self, mock_get_ssh_key):
@@ -207,10 +271,13 @@ class TestIpaCloud(object):
         """Test run tests method."""
         mock_pytest.return_value = 0
         mock_merge_results.return_value = None
+        mock_ipa_utils.get_config_values.return_value = {}
+        self.kwargs['order'] = 'default'
 
         cloud = IpaCloud(**self.kwargs)
 
         cloud.log_file = 'fake_file.name'
+        cloud.remote_exec = False
         cloud.terminate = True
         cloud.results['info'] = {
             'platform': 'ec2',
@@ -239,6 +306,258 @@ class TestIpaCloud(object):
             cloud._set_distro()
         assert str(error.value) == 'Distribution: BadDistro, not supported.'
 
+    @patch.object(ipa_utils, 'get_test_durations')
+    def test_cloud_order_test_files(self, mock_get_test_durations):
+        """Test test files are ordered by duration in previous runs."""
+        mock_get_test_durations.return_value = {
+            'test_image': 1,
+            'test_sles': 5
+        }
+        self.kwargs['test_files'] = [
+            'test_image',
+            'test_sles',
+            'test_soft_reboot',
+            'test_pytest_json_results'
+        ]
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.logger = MagicMock()
+        assert cloud._order_test_files(cloud.test_files) == cloud.test_files
+        assert mock_get_test_durations.call_count == 0
+
+        cloud.order = 'duration'
+        test_files = cloud._order_test_files(cloud.test_files)
+
+        assert [
+            ipa_utils.get_test_name(test_file) for test_file in test_files
+        ] == [
+            'test_sles',
+            'test_image',
+            'test_soft_reboot',
+            'test_pytest_json_results'
+        ]
+        cloud.logger.info.assert_called_once_with(
+            'Predicted test duration: 9.00s'
+        )
+
+        cloud.order = 'failed'
+        with patch.object(ipa_utils, 'get_test_failures') as mock_failures:
+            mock_failures.return_value = {'test_sles': [False, True]}
+            test_files = cloud._order_test_files(cloud.test_files)
+
+        mock_failures.assert_called_once_with(
+            cloud.history_log, 'base', 'fakeimage'
+        )
+        assert [
+            ipa_utils.get_test_name(test_file) for test_file in test_files
+        ] == [
+            'test_sles',
+            'test_image',
+            'test_soft_reboot',
+            'test_pytest_json_results'
+        ]
+
+        self.kwargs['order'] = 'random'
+        with pytest.raises(IpaCloudException) as error:
+            IpaCloud(**self.kwargs)
+
+        assert str(error.value) == 'Test order: random, not supported.'
+
+    @patch.object(IpaCloud, '_execute_test')
+    def test_cloud_cached_tests(self, mock_execute_test, tmpdir):
+        """Test passing test results are reused from the cache."""
+        mock_execute_test.return_value = (0, {
+            'tests': [{'nodeid': 'test_image.py::test', 'outcome': 'passed'}],
+            'summary': {'duration': 5, 'passed': 1, 'total': 1}
+        })
+        self.kwargs['cache'] = True
+        self.kwargs['cache_dir'] = str(tmpdir)
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.result_cache = ResultCache(cloud.cache_dir, cloud.cache_size)
+        test_file = cloud.test_files[0]
+
+        assert cloud._run_test(test_file, 'test.ssh') == 0
+        assert cloud._run_test(test_file, 'test.ssh') == 0
+        assert mock_execute_test.call_count == 1
+
+        # Beta runs select different tests
+        cloud.beta = True
+        assert cloud._run_test(test_file, 'test.ssh') == 0
+        assert mock_execute_test.call_count == 2
+        cloud.beta = False
+
+        assert cloud.results['tests'][1]['cached']
+        assert cloud.results['summary']['cached'] == 1
+        assert cloud.results['summary']['passed'] == 3
+        assert cloud.results['summary']['duration'] == 10
+
+        # Failed results are not cached
+        mock_execute_test.return_value = (1, {
+            'tests': [{'nodeid': 'test_sles.py::test', 'outcome': 'failed'}],
+            'summary': {'duration': 5, 'failed': 1, 'total': 1}
+        })
+        test_file = test_file.replace('test_image', 'test_sles')
+
+        assert cloud._run_test(test_file, 'test.ssh') == 1
+        assert cloud._run_test(test_file, 'test.ssh') == 1
+        assert mock_execute_test.call_count == 4
+
+    @patch.object(IpaCloud, '_cleanup_instance')
+    @patch.object(IpaCloud, '_execute_cached_test')
+    @patch.object(ipa_utils, 'get_host_key_fingerprint')
+    @patch.object(IpaCloud, '_get_ssh_client')
+    def test_cloud_checkpoint_resume(
+        self,
+        mock_get_ssh_client,
+        mock_get_host_key_fingerprint,
+        mock_execute_test,
+        mock_cleanup_instance
+    ):
+        """Test an interrupted test run resumes from the checkpoint."""
+        mock_get_host_key_fingerprint.return_value = b'1234'
+        passed = {
+            'tests': [{'nodeid': 'test_image.py::test', 'outcome': 'passed'}],
+            'summary': {'duration': 1, 'passed': 1, 'total': 1}
+        }
+        mock_execute_test.side_effect = [(0, passed), KeyboardInterrupt]
+        self.kwargs['test_files'] = ['test_image', 'test_sles']
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.instance_prepared = True
+        cloud.running_instance_id = 'i-123'
+        cloud.instance_ip = '10.0.0.1'
+
+        with pytest.raises(KeyboardInterrupt):
+            cloud.test_image()
+
+        assert os.path.isfile(cloud.checkpoint_file)
+        assert ipa_utils.load_json(cloud.results_file)['summary'][
+            'passed'
+        ] == 1
+
+        mock_execute_test.reset_mock()
+        mock_execute_test.side_effect = None
+        mock_execute_test.return_value = (0, passed)
+
+        resumed = IpaCloud(
+            config='tests/data/config',
+            resume=cloud.log_file,
+            ssh_multiplex=False
+        )
+        resumed.instance_prepared = True
+
+        assert resumed.distro_name == 'sles'
+        assert resumed.running_instance_id == 'i-123'
+
+        status, results = resumed.test_image()
+
+        assert status == 0
+        assert mock_execute_test.call_count == 1
+        assert mock_execute_test.call_args[0][0] == cloud.test_files[1]
+        assert results['summary']['passed'] == 2
+        assert resumed.results_file == cloud.results_file
+        assert not os.path.exists(cloud.checkpoint_file)
+
+        with pytest.raises(IpaCloudException) as error:
+            IpaCloud(config='tests/data/config', resume=cloud.log_file)
+
+        assert 'Unable to load checkpoint' in str(error.value)
+
+    @patch('img_proof.ipa_cloud.shutil.which')
+    def test_cloud_checkpoint_options(self, mock_which):
+        """Test the options of a test run are restored on resume."""
+        mock_which.return_value = '/usr/bin/ssh'
+        options = {
+            'beta': True,
+            'retry_count': 1,
+            'timeout': 300,
+            'collect_vm_info': True,
+            'order': 'duration',
+            'cache': True,
+            'cache_dir': os.path.join(self.results_dir.name, 'cache'),
+            'inject': 'tests/data/injection/test_injection.yaml',
+            'description': 'Test run',
+            'pytest_workers': True,
+            'ssh_multiplex': True,
+            'history_log': os.path.join(self.results_dir.name, 'history')
+        }
+        self.kwargs.update(options)
+        self.kwargs['test_files'] = ['test_deps_desc']
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.running_instance_id = 'i-123'
+        cloud.instance_ip = '10.0.0.1'
+        cloud.host_key_fingerprint = b'1234'
+        cloud._set_results_dir()
+        cloud._log_info()
+        cloud._save_checkpoint(cloud.test_files, 1, 0)
+
+        resumed = IpaCloud(
+            config='tests/data/config',
+            resume=cloud.results_file
+        )
+
+        for option, value in options.items():
+            assert getattr(resumed, option) == value
+
+        assert resumed.test_attributes == cloud.test_attributes
+        assert resumed.test_attributes
+
+        # The same options may be passed again
+        IpaCloud(
+            config='tests/data/config',
+            resume=cloud.results_file,
+            beta=True,
+            timeout=300
+        )
+
+        with pytest.raises(IpaCloudException) as error:
+            IpaCloud(
+                config='tests/data/config',
+                resume=cloud.results_file,
+                beta=False,
+                retry_count=3
+            )
+
+        assert str(error.value) == (
+            'Options differ from the checkpoint of the test run: '
+            'beta, retry_count'
+        )
+
+    @patch.object(IpaCloud, '_cleanup_instance')
+    @patch.object(ipa_utils, 'get_host_key_fingerprint')
+    @patch.object(IpaCloud, '_get_ssh_client')
+    def test_cloud_resume_host_key_changed(
+        self,
+        mock_get_ssh_client,
+        mock_get_host_key_fingerprint,
+        mock_cleanup_instance
+    ):
+        """Test a resumed run fails if the host key has changed."""
+        mock_get_host_key_fingerprint.return_value = b'1234'
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.running_instance_id = 'i-123'
+        cloud.instance_ip = '10.0.0.1'
+        cloud._set_results_dir()
+        cloud._log_info()
+        cloud.host_key_fingerprint = b'5678'
+        cloud._save_checkpoint(cloud.test_files, 0, 0)
+
+        resumed = IpaCloud(
+            config='tests/data/config',
+            resume=cloud.results_file,
+            ssh_multiplex=False
+        )
+        resumed.instance_prepared = True
+
+        with pytest.raises(IpaCloudException) as error:
+            resumed.test_image()
+
+        assert str(error.value) == \
+            'Host key has changed since the test run was interrupted.'
+
     @patch.object(IpaCloud, '_is_instance_running')
     @patch.object(IpaCloud, '_start_instance')
     def test_cloud_start_if_stopped(
@@ -397,6 +716,28 @@ class TestIpaCloud(object):
             client, 'python test.py'
         )
 
+    @patch.object(IpaCloud, '_launch_instance')
+    def test_cloud_dependency_cycle(self, mock_launch_instance, tmpdir):
+        """Test dependency cycles are found before launching."""
+        for name in ('test_a', 'test_b'):
+            tmpdir.join(name + '.py').write('def test():\n    pass\n')
+
+        tmpdir.join('test_cycle_desc.yaml').write(
+            'tests:\n'
+            '  - name: test_a\n'
+            '    requires: test_b\n'
+            '  - name: test_b\n'
+            '    requires: test_a\n'
+        )
+        self.kwargs['test_dirs'] = str(tmpdir)
+        self.kwargs['test_files'] = ['test_cycle_desc']
+
+        with pytest.raises(IpaSchedulerException) as error:
+            IpaCloud(**self.kwargs)
+
+        assert str(error.value).startswith('Test dependency cycle:')
+        assert mock_launch_instance.call_count == 0
+
     @patch.object(IpaCloud, 'get_console_log')
     @patch.object(IpaCloud, '_set_instance_ip')
     @patch.object(IpaCloud, '_set_image_id')
@@ -477,6 +818,86 @@ class TestIpaCloud(object):
         assert mock_hard_reboot.call_count == 1
         mock_hard_reboot.reset_mock()
 
+    @patch.object(IpaCloud, '_cleanup_instance')
+    @patch.object(IpaCloud, '_upload_tests')
+    @patch.object(IpaCloud, '_set_instance_ip')
+    @patch.object(IpaCloud, '_set_image_id')
+    @patch.object(IpaCloud, '_start_instance_if_stopped')
+    @patch.object(IpaCloud, '_get_ssh_client')
+    @patch('img_proof.ipa_utils.get_host_key_fingerprint')
+    def test_cloud_test_image_cleanup_on_error(
+        self,
+        mock_get_host_key,
+        mock_get_ssh_client,
+        mock_start_instance,
+        mock_set_image_id,
+        mock_set_instance_ip,
+        mock_upload_tests,
+        mock_cleanup_instance
+    ):
+        """Test the instance is cleaned up if testing fails."""
+        mock_get_host_key.return_value = b'04820482'
+        mock_upload_tests.side_effect = IpaCloudException('Upload failed!')
+        self.kwargs['running_instance_id'] = 'fakeinstance'
+        self.kwargs['remote_exec'] = True
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.ssh_private_key_file = 'tests/data/ida_test'
+        cloud.ssh_user = 'root'
+        cloud.session = MagicMock()
+
+        with pytest.raises(IpaCloudException, match='Upload failed!'):
+            cloud.test_image()
+
+        mock_cleanup_instance.assert_called_once_with(1)
+        cloud.session.close.assert_called_once_with()
+
+        # Uploaded tests are removed if testing fails
+        def upload(client):
+            cloud.remote_test_dir = 'img_proof_tests'
+
+        mock_upload_tests.side_effect = upload
+        mock_cleanup_instance.reset_mock()
+
+        with patch.object(
+            IpaCloud,
+            '_order_test_files',
+            side_effect=Exception('Order failed!')
+        ):
+            with patch(
+                'img_proof.ipa_utils.execute_ssh_command'
+            ) as mock_exec_cmd:
+                with pytest.raises(Exception, match='Order failed!'):
+                    cloud.test_image()
+
+        mock_exec_cmd.assert_called_once_with(
+            mock_get_ssh_client.return_value,
+            'rm -rf img_proof_tests'
+        )
+        assert cloud.remote_test_dir is None
+        mock_cleanup_instance.assert_called_once_with(1)
+
+        # Worker pool is closed if testing fails
+        mock_upload_tests.side_effect = None
+        mock_cleanup_instance.reset_mock()
+        cloud.remote_exec = False
+        cloud.pytest_workers = True
+        pool = MagicMock()
+
+        with patch('img_proof.ipa_cloud.PytestWorkerPool') as mock_pool:
+            mock_pool.return_value = pool
+            with patch.object(
+                IpaCloud,
+                '_order_test_files',
+                side_effect=Exception('Order failed!')
+            ):
+                with pytest.raises(Exception, match='Order failed!'):
+                    cloud.test_image()
+
+        pool.close.assert_called_once_with()
+        assert cloud.worker_pool is None
+        mock_cleanup_instance.assert_called_once_with(1)
+
     @patch('time.sleep')
     @patch.object(IpaCloud, '_set_instance_ip')
     @patch.object(IpaCloud, '_set_image_id')
@@ -645,6 +1066,382 @@ class TestIpaCloud(object):
         assert status == 1
         assert mock_run_test.call_count == 1
 
+    @patch.object(IpaCloud, '_set_instance_ip')
+    @patch.object(IpaCloud, '_set_image_id')
+    @patch.object(IpaCloud, '_start_instance_if_stopped')
+    @patch.object(IpaCloud, '_get_ssh_client')
+    @patch('img_proof.ipa_utils.get_host_key_fingerprint')
+    @patch('img_proof.ipa_utils.run_pytest_subprocess')
+    @patch.object(Distro, 'reboot')
+    def test_cloud_parallel_tests(
+        self,
+        mock_soft_reboot,
+        mock_run_pytest,
+        mock_get_host_key,
+        mock_get_ssh_client,
+        mock_start_instance,
+        mock_set_image_id,
+        mock_set_instance_ip
+    ):
+        """Test files between sync points run concurrently."""
+        def run_pytest(args):
+            nodeid = args[-1] + '::test'
+            return 0, {
+                'tests': [{'nodeid': nodeid, 'outcome': 'passed'}],
+                'summary': {'passed': 1, 'total': 1, 'duration': 1.0}
+            }, 'output'
+
+        mock_run_pytest.side_effect = run_pytest
+        mock_get_host_key.return_value = b'04820482'
+        mock_get_ssh_client.return_value = None
+        self.kwargs['running_instance_id'] = 'fakeinstance'
+        self.kwargs['test_files'] = [
+            'test_image', 'test_sles', 'test_soft_reboot',
+            'test_sles', 'test_image'
+        ]
+        self.kwargs['parallel'] = 2
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.ssh_private_key_file = 'tests/data/ida_test'
+        cloud.ssh_user = 'root'
+
+        with patch('time.sleep'):
+            status, results = cloud.test_image()
+
+        assert status == 0
+        assert mock_run_pytest.call_count == 4
+        assert mock_soft_reboot.call_count == 1
+        assert [test['nodeid'] for test in results['tests']] == [
+            'tests/data/tests/test_image.py::test',
+            'tests/data/tests/test_sles.py::test',
+            'test_soft_reboot',
+            'tests/data/tests/test_sles.py::test',
+            'tests/data/tests/test_image.py::test'
+        ]
+        assert results['summary']['passed'] == 5
+
+    @patch.object(IpaCloud, '_set_instance_ip')
+    @patch.object(IpaCloud, '_set_image_id')
+    @patch.object(IpaCloud, '_start_instance_if_stopped')
+    @patch.object(IpaCloud, '_get_ssh_client')
+    @patch('img_proof.ipa_utils.get_host_key_fingerprint')
+    @patch('img_proof.ipa_cloud.PytestWorkerPool')
+    def test_cloud_pytest_workers(
+        self,
+        mock_worker_pool,
+        mock_get_host_key,
+        mock_get_ssh_client,
+        mock_start_instance,
+        mock_set_image_id,
+        mock_set_instance_ip
+    ):
+        """Test pytest sessions run in the worker pool."""
+        def run_pytest(args):
+            nodeid = args[-1] + '::test'
+            return 0, {
+                'tests': [{'nodeid': nodeid, 'outcome': 'passed'}],
+                'summary': {'passed': 1, 'total': 1, 'duration': 1.0}
+            }, 'Worker output'
+
+        pool = MagicMock()
+        pool.run.side_effect = run_pytest
+        mock_worker_pool.return_value = pool
+        mock_get_host_key.return_value = b'04820482'
+        mock_get_ssh_client.return_value = None
+        self.kwargs['running_instance_id'] = 'fakeinstance'
+        self.kwargs['test_files'] = ['test_image', 'test_sles']
+        self.kwargs['parallel'] = 2
+        self.kwargs['pytest_workers'] = True
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.ssh_private_key_file = 'tests/data/ida_test'
+        cloud.ssh_user = 'root'
+
+        status, results = cloud.test_image()
+
+        assert status == 0
+        mock_worker_pool.assert_called_once_with(2, 20, 1024, 3600)
+        assert pool.run.call_count == 2
+        pool.close.assert_called_once_with()
+        assert cloud.worker_pool is None
+        assert results['summary']['passed'] == 2
+
+        with open(cloud.log_file) as log_file:
+            assert 'Worker output' in log_file.read()
+
+    @patch.object(IpaCloud, '_execute_test')
+    def test_cloud_scheduled_tests(self, mock_execute_test):
+        """Test concurrent tests wait on required tests."""
+        started = []
+
+        def execute_test(test, ssh_config, isolated):
+            started.append(test)
+            return 0, {'tests': [{'nodeid': test, 'outcome': 'passed'}]}
+
+        mock_execute_test.side_effect = execute_test
+        self.kwargs['test_files'] = ['test_deps_desc']
+        self.kwargs['parallel'] = 2
+
+        cloud = IpaCloud(**self.kwargs)
+        assert cloud.test_files == [
+            'tests/data/tests/test_image.py',
+            'tests/data/tests/test_sles.py'
+        ]
+
+        with patch.object(IpaCloud, '_merge_results') as mock_merge_results:
+            status = cloud._run_tests_concurrently(
+                cloud.test_files, 'ssh_config'
+            )
+
+        assert status == 0
+        assert started == [
+            'tests/data/tests/test_sles.py',
+            'tests/data/tests/test_image.py'
+        ]
+        assert [
+            merge[0][0]['tests'][0]['nodeid']
+            for merge in mock_merge_results.call_args_list
+        ] == cloud.test_files
+
+    @patch.object(IpaCloud, '_set_instance_ip')
+    @patch.object(IpaCloud, '_set_image_id')
+    @patch.object(IpaCloud, '_start_instance_if_stopped')
+    @patch.object(IpaCloud, '_get_ssh_client')
+    @patch('img_proof.ipa_utils.get_host_key_fingerprint')
+    @patch.object(IpaCloud, '_run_pytest')
+    def test_cloud_batch_tests(
+        self,
+        mock_run_pytest,
+        mock_get_host_key,
+        mock_get_ssh_client,
+        mock_start_instance,
+        mock_set_image_id,
+        mock_set_instance_ip
+    ):
+        """Test files between sync points run in a single session."""
+        mock_run_pytest.return_value = (1, {
+            'tests': [
+                {
+                    'nodeid': 'tests/data/tests/test_image.py::test_image',
+                    'outcome': 'passed'
+                }
+            ],
+            'collectors': [
+                {'nodeid': '', 'outcome': 'passed'},
+                {
+                    'nodeid': 'tests/data/tests/test_sles.py',
+                    'outcome': 'failed',
+                    'longrepr': 'ImportError'
+                }
+            ],
+            'summary': {'passed': 1, 'total': 1, 'duration': 1.0}
+        })
+        mock_get_host_key.return_value = b'04820482'
+        mock_get_ssh_client.return_value = None
+        self.kwargs['running_instance_id'] = 'fakeinstance'
+        self.kwargs['test_files'] = ['test_image', 'test_sles']
+        self.kwargs['batch'] = True
+        self.kwargs['retry_count'] = 1
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.ssh_private_key_file = 'tests/data/ida_test'
+        cloud.ssh_user = 'root'
+
+        status, results = cloud.test_image()
+
+        assert status == 1
+        assert mock_run_pytest.call_count == 1
+
+        cmds = mock_run_pytest.call_args[0][0]
+        assert '--continue-on-collection-errors' in cmds
+        assert cmds[-2:] == [
+            'tests/data/tests/test_image.py',
+            'tests/data/tests/test_sles.py'
+        ]
+
+        assert results['tests'][1]['nodeid'] == \
+            'tests/data/tests/test_sles.py'
+        assert results['tests'][1]['outcome'] == 'error'
+        assert results['summary']['error'] == 1
+        assert results['summary']['total'] == 2
+
+    @pytest.mark.parametrize(
+        "parallel,started",
+        [(1, False), (2, True)],
+        ids=['in-process', 'parallel']
+    )
+    @patch('img_proof.ipa_cloud.shutil.which')
+    @patch('img_proof.ipa_cloud.ipa_utils.start_ssh_master')
+    @patch.object(IpaCloud, '_set_instance_ip')
+    @patch.object(IpaCloud, '_set_image_id')
+    @patch.object(IpaCloud, '_start_instance_if_stopped')
+    @patch.object(IpaCloud, '_get_ssh_client')
+    @patch('img_proof.ipa_utils.get_host_key_fingerprint')
+    @patch.object(IpaCloud, '_run_pytest')
+    def test_cloud_ssh_master(
+        self,
+        mock_run_pytest,
+        mock_get_host_key,
+        mock_get_ssh_client,
+        mock_start_instance,
+        mock_set_image_id,
+        mock_set_instance_ip,
+        mock_start_ssh_master,
+        mock_which,
+        parallel,
+        started
+    ):
+        """Test the master connection is only opened when needed."""
+        mock_run_pytest.return_value = (0, {
+            'tests': [{'nodeid': 'test_image', 'outcome': 'passed'}],
+            'summary': {'passed': 1, 'total': 1, 'duration': 1.0}
+        })
+        mock_get_host_key.return_value = b'04820482'
+        mock_get_ssh_client.return_value = None
+        mock_which.return_value = '/usr/bin/ssh'
+        self.kwargs['running_instance_id'] = 'fakeinstance'
+        self.kwargs['ssh_multiplex'] = True
+        self.kwargs['parallel'] = parallel
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.ssh_private_key_file = 'tests/data/ida_test'
+        cloud.ssh_user = 'root'
+        cloud.instance_ip = '10.0.0.1'
+        cloud.session.clients['10.0.0.1'] = MagicMock()
+
+        status, results = cloud.test_image()
+
+        assert status == 0
+        assert mock_start_ssh_master.called == started
+
+    @patch.object(IpaCloud, '_run_tests_concurrently')
+    def test_cloud_parallel_batches(self, mock_run_tests_concurrently):
+        """Test parallel batches keep conflicting tests together."""
+        mock_run_tests_concurrently.return_value = 0
+        self.kwargs['batch'] = True
+        self.kwargs['parallel'] = 2
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.test_attributes = {
+            'test_a': {'conflicts': ['etc-hosts']},
+            'test_c': {'conflicts': ['etc-hosts']}
+        }
+
+        assert cloud._run_test_batch(
+            ['test_a', 'test_b', 'test_c', 'test_d'], 'test.ssh'
+        ) == 0
+        mock_run_tests_concurrently.assert_called_once_with(
+            [['test_a', 'test_c'], ['test_b', 'test_d']], 'test.ssh'
+        )
+
+    def test_cloud_retry_failed_tests(self):
+        """Test only the failed tests are re-run."""
+        self.kwargs['retry_count'] = 3
+
+        cloud = IpaCloud(**self.kwargs)
+        cloud.instance_ip = '127.0.0.1'
+        cloud.log_file = os.path.join(self.results_dir.name, 'retry.log')
+
+        result, results = cloud._execute_test(
+            'tests/data/tests/test_pytest_json_results.py',
+            'test.ssh',
+            isolated=True
+        )
+
+        assert result == 1
+        assert results['summary']['passed'] == 2
+        assert results['summary']['failed'] == 1
+        assert results['summary']['total'] == 3
+        assert results['summary']['retries'] == 2
+        assert results['summary']['retry_duration'] > 0
+
+        failed = [
+            test for test in results['tests'] if test['outcome'] == 'failed'
+        ]
+        assert failed[0]['nodeid'].endswith('::test_failing')
+        assert failed[0]['retries'] == 2
+
+        with open(cloud.log_file) as log_file:
+            output = log_file.read()
+
+        # Passing tests are only run once
+        assert output.count('test_passing PASSED') == 1
+        assert output.count('test_failing FAILED') == 3
+
+    def test_cloud_merge_retry_report(self):
+        """Test retry outcome replaces original outcome per node."""
+        report = {
+            'root': '/tests',
+            'tests': [
+                {'nodeid': 'test_a.py::test_a', 'outcome': 'passed'},
+                {'nodeid': 'test_a.py::test_b', 'outcome': 'failed'}
+            ],
+            'collectors': [
+                {'nodeid': 'test_a.py', 'outcome': 'passed'},
+                {'nodeid': 'test_c.py', 'outcome': 'failed'}
+            ],
+            'summary': {
+                'passed': 1, 'failed': 1, 'total': 2,
+                'collected': 2, 'duration': 2.0
+            }
+        }
+        retry_report = {
+            'tests': [
+                {'nodeid': 'test_a.py::test_b', 'outcome': 'passed'},
+                {'nodeid': 'test_c.py::test_c', 'outcome': 'passed'}
+            ],
+            'collectors': [{'nodeid': 'test_c.py', 'outcome': 'passed'}],
+            'summary': {'passed': 2, 'total': 2, 'duration': 1.0}
+        }
+
+        assert IpaCloud._get_failed_nodeids(report) == [
+            '/tests/test_a.py::test_b',
+            '/tests/test_c.py'
+        ]
+
+        report = IpaCloud._merge_retry_report(report, retry_report)
+
+        assert report['summary'] == {
+            'passed': 3, 'total': 3, 'collected': 2, 'duration': 3.0
+        }
+        assert report['tests'][1]['retries'] == 1
+        assert report['tests'][2]['nodeid'] == 'test_c.py::test_c'
+        assert report['collectors'][1]['outcome'] == 'passed'
+        assert IpaCloud._get_failed_nodeids(report) == []
+
+    @patch.object(IpaCloud, '_start_instance_if_stopped')
+    @patch.object(IpaCloud, '_terminate_instance')
+    def test_cloud_acquire_pool_instance(
+        self,
+        mock_terminate_instance,
+        mock_start_instance
+    ):
+        """Test instance acquired from the instance pool."""
+        self.kwargs['use_pool'] = True
+        self.kwargs['pool_file'] = os.path.join(
+            self.results_dir.name, 'pool.json'
+        )
+        self.kwargs['region'] = 'us-west-1'
+
+        cloud = IpaCloud(**self.kwargs)
+        assert cloud._acquire_pool_instance() is False
+
+        pool = InstancePool(self.kwargs['pool_file'])
+        pool.add('base', 'fakeimage', None, 'us-west-1', 'i-1')
+        pool.add('base', 'fakeimage', None, 'us-west-1', 'i-2')
+
+        assert cloud._acquire_pool_instance() is True
+        assert cloud.running_instance_id == 'i-1'
+        assert mock_start_instance.call_count == 1
+
+        mock_start_instance.side_effect = Exception('Not found!')
+        cloud.running_instance_id = None
+
+        assert cloud._acquire_pool_instance() is False
+        assert cloud.running_instance_id is None
+        assert mock_terminate_instance.call_count == 1
+        assert pool.list_entries() == []
+
     @patch.object(IpaCloud, '_get_instance_state')
     @patch('time.sleep')
     def test_cloud_wait_on_instance(self,
@@ -657,6 +1454,22 @@ class TestIpaCloud(object):
         cloud = IpaCloud(**self.kwargs)
         cloud._wait_on_instance('Stopped')
         assert mock_get_instance_state.call_count == 1
+        assert mock_sleep.call_count == 0
+        assert cloud.instance_transitions[0]['state'] == 'Stopped'
+
+        # Test native waiter is used before polling state
+        waiter = MagicMock()
+        cloud._wait_on_instance('Stopped', timeout=30, waiter=waiter)
+        waiter.assert_called_once_with(30)
+        assert len(cloud.instance_transitions) == 2
+
+        mock_get_instance_state.return_value = 'Running'
+
+        with pytest.raises(IpaCloudException) as error:
+            cloud._wait_on_instance('Stopped', timeout=0)
+
+        assert str(error.value) == \
+            'Instance has not arrived at the given state: Stopped'
 
     @patch.object(IpaCloud, '_get_ssh_client')
     def test_collect_vm_info(self, mock_get_ssh_client):
@@ -687,3 +1500,69 @@ class TestIpaCloud(object):
             'Collecting basic info about VM'
         )
         assert mock_get_ssh_client.call_count == 1
+
+    def test_cloud_remote_exec(self, tmpdir):
+        """Test tests uploaded and run on the instance in remote mode."""
+        home = str(tmpdir)
+
+        def run(command):
+            process = subprocess.run(
+                command,
+                shell=True,
+                cwd=home,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            stdout = MagicMock()
+            stdout.read.return_value = process.stdout
+            stdout.channel.recv_exit_status.return_value = process.returncode
+            stderr = MagicMock()
+            stderr.read.return_value = process.stderr
+            return None, stdout, stderr
+
+        sftp = MagicMock()
+        sftp.put.side_effect = lambda src, dest: shutil.copy(
+            src, os.path.join(home, dest)
+        )
+        sftp.get.side_effect = lambda src, dest: shutil.copy(
+            os.path.join(home, src), dest
+        )
+
+        client = MagicMock()
+        client.exec_command.side_effect = lambda command, **kwargs: run(
+            command.replace('python3', sys.executable)
+        )
+        client.open_sftp.return_value = sftp
+
+        self.kwargs['remote_exec'] = True
+        cloud = IpaCloud(**self.kwargs)
+        cloud.log_file = os.path.join(home, 'test.log')
+
+        with patch.object(IpaCloud, '_get_ssh_client') as mock_client:
+            mock_client.return_value = client
+            cloud._upload_tests(client)
+
+            assert os.path.isfile(os.path.join(
+                home, cloud.remote_test_dir, 'tests0', 'test_image.py'
+            ))
+            assert not os.path.exists(
+                os.path.join(home, cloud.remote_test_dir + '.tar.gz')
+            )
+
+            result, results = cloud._execute_test(
+                'tests/data/tests/test_image.py', None
+            )
+
+            assert result == 0
+            assert results['summary']['passed'] == 1
+            assert results['tests'][0]['nodeid'] == \
+                'tests0/test_image.py::test_image'
+
+            remote_test_dir = cloud.remote_test_dir
+            cloud._remove_remote_tests()
+
+        assert not os.path.exists(os.path.join(home, remote_test_dir))
+        assert cloud.remote_test_dir is None
+
+        with open(cloud.log_file) as log_file:
+            assert '1 passed' in log_file.read()
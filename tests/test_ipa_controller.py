@@ -21,14 +21,29 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+import os
+import time
+
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
 from pytest import raises
-from unittest.mock import patch
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
 
-from img_proof.ipa_controller import collect_tests
+from img_proof.ipa_controller import collect_tests, fill_pool, reap_pool
 from img_proof.ipa_controller import test_image as controller_test_image
+from img_proof.ipa_controller import \
+    test_image_shards as controller_test_image_shards
+from img_proof.ipa_controller import \
+    test_images as controller_test_images
+from img_proof.ipa_controller import \
+    test_images_pipelined as controller_test_images_pipelined
 from img_proof.ipa_exceptions import IpaControllerException
 from img_proof.ipa_cloud import IpaCloud
 from img_proof.ipa_gce import GCECloud
+from img_proof.ipa_pool import InstancePool
 
 
 @patch('img_proof.ipa_controller.os')
@@ -140,3 +155,349 @@ def test_controller_aliyun_image(mock_test_image):
     )
 
     assert status == 0
+
+
+def test_controller_fill_and_reap_pool():
+    """Test instance pool is filled and reaped."""
+    instance_ids = iter(['fake-1', 'fake-2', 'fake-3'])
+
+    def launch(cloud):
+        cloud.running_instance_id = next(instance_ids)
+
+    kwargs = {
+        'config': 'tests/data/config',
+        'distro': 'sles',
+        'ip_address': '10.0.0.1',
+        'no_default_test_dirs': True,
+        'ssh_private_key_file': 'tests/data/ida_test',
+        'ssh_user': 'root',
+        'test_dirs': 'tests/data/tests'
+    }
+
+    with TemporaryDirectory() as pool_dir:
+        pool_file = os.path.join(pool_dir, 'pool.json')
+
+        with patch(
+            'img_proof.ipa_ssh.SSHCloud._launch_instance',
+            autospec=True
+        ) as mock_launch:
+            mock_launch.side_effect = launch
+            launched = fill_pool(
+                2, ttl=60, pool_file=pool_file, cloud_name='ssh', **kwargs
+            )
+
+            assert launched == ['fake-1', 'fake-2']
+
+            # Pool is already full
+            assert fill_pool(
+                2, pool_file=pool_file, cloud_name='ssh', **kwargs
+            ) == []
+
+        pool = InstancePool(pool_file)
+        entries = pool.list_entries()
+        assert len(entries) == 2
+        assert entries[0]['distro'] == 'sles'
+
+        with patch(
+            'img_proof.ipa_ssh.SSHCloud._terminate_instance'
+        ) as mock_terminate:
+            # Nothing has expired
+            assert reap_pool('ssh', pool_file=pool_file, **kwargs) == []
+
+            terminated = reap_pool(
+                'ssh', pool_file=pool_file, reap_all=True, **kwargs
+            )
+
+        assert terminated == ['fake-1', 'fake-2']
+        assert mock_terminate.call_count == 2
+        assert pool.list_entries() == []
+
+
+@patch('img_proof.ipa_controller.ProcessPoolExecutor', ThreadPoolExecutor)
+@patch.object(IpaCloud, 'test_image', autospec=True)
+def test_controller_test_image_shards(mock_test_image, tmp_path):
+    """Test test files are split across shards and results merged."""
+    def test(cloud):
+        if 'test_sles' in cloud.test_files[-1]:
+            raise Exception('Launch failed!')
+
+        tests = [
+            {'nodeid': test_file, 'outcome': 'passed'}
+            for test_file in cloud.test_files
+        ]
+        return 0, {
+            'info': {'instance': 'i-123', 'log_file': 'test.log'},
+            'tests': tests,
+            'summary': {'duration': 2, 'passed': 1, 'total': 1}
+        }
+
+    mock_test_image.side_effect = test
+
+    status, results = controller_test_image(
+        cloud_name='ec2',
+        config='tests/data/config',
+        cloud_config='tests/ec2/.ec2utils.conf',
+        distro='sles',
+        history_log=str(tmp_path / '.history'),
+        image_id='fakeimage',
+        no_default_test_dirs=True,
+        results_dir=str(tmp_path),
+        ssh_private_key_file='tests/data/ida_test',
+        ssh_key_name='test-key',
+        account='awstest',
+        test_dirs='tests/data/tests',
+        tests=['test_image', 'test_soft_reboot', 'test_sles'],
+        shards=2
+    )
+
+    assert status == 1
+
+    shards = results['info']['shards']
+    assert [shard['tests'] for shard in shards] == [
+        ['tests/data/tests/test_image.py'],
+        ['test_soft_reboot', 'tests/data/tests/test_sles.py']
+    ]
+    assert shards[0]['instance'] == 'i-123'
+    assert shards[1]['error'] == 'Exception: Launch failed!'
+
+    assert len(results['tests']) == 1
+    assert results['summary']['passed'] == 1
+    assert results['summary']['error'] == 1
+    assert results['summary']['total'] == 1
+
+    results_file = results['info']['results_file']
+    assert results_file.startswith(
+        str(tmp_path / 'ec2' / 'fakeimage' / 'shards')
+    )
+    assert json.load(open(results_file)) == results
+
+    # A single shard is tested as usual
+    mock_test_image.side_effect = None
+    mock_test_image.return_value = (0, {})
+
+    status, results = controller_test_image(
+        cloud_name='ec2',
+        config='tests/data/config',
+        cloud_config='tests/ec2/.ec2utils.conf',
+        distro='sles',
+        image_id='fakeimage',
+        no_default_test_dirs=True,
+        ssh_private_key_file='tests/data/ida_test',
+        ssh_key_name='test-key',
+        account='awstest',
+        test_dirs='tests/data/tests',
+        tests=['test_image'],
+        shards=2
+    )
+
+    assert status == 0
+    assert results == {}
+
+
+@patch('img_proof.ipa_controller.ProcessPoolExecutor', ThreadPoolExecutor)
+@patch.object(IpaCloud, '_execute_cached_test', autospec=True)
+@patch.object(IpaCloud, 'test_image', autospec=True)
+def test_controller_test_image_shards_attributes(
+    mock_test_image, mock_execute_test, tmp_path
+):
+    """Test shards schedule parallel tests with their attributes."""
+    test_dir = tmp_path / 'tests'
+    test_dir.mkdir()
+
+    for name in ('test_a', 'test_b', 'test_c', 'test_d'):
+        (test_dir / '{0}.py'.format(name)).write_text(
+            'def test_pass():\n    pass\n'
+        )
+
+    (test_dir / 'test_hosts_desc.yaml').write_text(
+        'tests:\n'
+        '  - name: test_a\n'
+        '    requires: test_b\n'
+        '    conflicts: etc-hosts\n'
+        '  - test_b\n'
+        '  - name: test_c\n'
+        '    requires: test_b\n'
+        '    conflicts: etc-hosts\n'
+        '  - test_d\n'
+    )
+
+    lock = threading.Lock()
+    running = set()
+    overlaps = []
+    conflicting = {'test_a.py', 'test_c.py'}
+
+    def execute(cloud, test, ssh_config, isolated=False):
+        name = os.path.basename(test)
+
+        with lock:
+            if name in conflicting and running & conflicting:
+                overlaps.append(name)
+
+            running.add(name)
+
+        time.sleep(0.1)
+
+        with lock:
+            running.discard(name)
+
+        return 0, {
+            'tests': [{'nodeid': test, 'outcome': 'passed'}],
+            'summary': {'duration': 1, 'passed': 1, 'total': 1}
+        }
+
+    def test(cloud):
+        status = cloud._run_tests_concurrently(cloud.test_files, 'test.ssh')
+        return status, {
+            'info': {},
+            'tests': cloud.results['tests'],
+            'summary': {'passed': len(cloud.results['tests'])}
+        }
+
+    mock_execute_test.side_effect = execute
+    mock_test_image.side_effect = test
+
+    status, results = controller_test_image(
+        cloud_name='ec2',
+        config='tests/data/config',
+        cloud_config='tests/ec2/.ec2utils.conf',
+        distro='sles',
+        history_log=str(tmp_path / '.history'),
+        image_id='fakeimage',
+        no_default_test_dirs=True,
+        results_dir=str(tmp_path),
+        ssh_private_key_file='tests/data/ida_test',
+        ssh_key_name='test-key',
+        account='awstest',
+        test_dirs=str(test_dir),
+        tests=['test_hosts_desc'],
+        parallel=2,
+        shards=2
+    )
+
+    assert status == 0
+    assert [
+        [os.path.basename(test) for test in shard['tests']]
+        for shard in results['info']['shards']
+    ] == [['test_b.py', 'test_a.py', 'test_c.py'], ['test_d.py']]
+    assert results['summary']['passed'] == 4
+
+    # Conflicting tests in the same shard do not run at the same time
+    assert overlaps == []
+
+
+def test_controller_test_image_shards_running_instance():
+    """Test an exception is raised if shards use an instance."""
+    cloud = MagicMock()
+    cloud.cloud = 'ec2'
+    cloud.running_instance_id = 'i-123'
+
+    with raises(IpaControllerException):
+        controller_test_image_shards(cloud, 2, {})
+
+
+@patch('img_proof.ipa_controller.ProcessPoolExecutor', ThreadPoolExecutor)
+@patch('img_proof.ipa_controller.get_cloud')
+def test_controller_test_images(mock_get_cloud):
+    """Test images yielded in the order the runs finish."""
+    first_done = threading.Event()
+
+    def make_cloud(image_id):
+        cloud = MagicMock()
+
+        def test():
+            if image_id == 'image-1':
+                # Finishes after image-2
+                first_done.wait(10)
+            elif image_id == 'image-3':
+                raise Exception('Broken!')
+
+            return 0, {'summary': {'passed': 1}}
+
+        cloud.test_image.side_effect = test
+        return cloud
+
+    mock_get_cloud.side_effect = lambda **spec: make_cloud(spec['image_id'])
+    specs = [{'image_id': 'image-%d' % num} for num in (1, 2, 3)]
+
+    results = {}
+    for spec, status, result in controller_test_images(specs, max_workers=3):
+        results[spec['image_id']] = status, result
+
+        if spec['image_id'] == 'image-2':
+            assert 'image-1' not in results
+            first_done.set()
+
+    assert results['image-1'] == (0, {'summary': {'passed': 1}})
+    assert results['image-2'] == (0, {'summary': {'passed': 1}})
+    assert results['image-3'][0] == 1
+    assert results['image-3'][1]['error'] == 'Exception: Broken!'
+
+
+@patch('img_proof.ipa_controller.get_cloud')
+def test_controller_test_images_pipelined(mock_get_cloud):
+    """Test images are tested in order while next instances launch."""
+    events = []
+
+    def make_cloud(image_id, fail=False):
+        cloud = MagicMock()
+        cloud.cleanup = None
+
+        def prepare():
+            if fail:
+                raise Exception('Launch failed!')
+            events.append(('prepare', image_id))
+            cloud.instance_prepared = True
+
+        def test():
+            events.append(('test', image_id))
+            return 0, {'summary': {'passed': 1}}
+
+        cloud.prepare_instance.side_effect = prepare
+        cloud.test_image.side_effect = test
+        return cloud
+
+    clouds = {
+        'image-1': make_cloud('image-1'),
+        'image-2': make_cloud('image-2', fail=True),
+        'image-3': make_cloud('image-3')
+    }
+    mock_get_cloud.side_effect = lambda **spec: clouds[spec['image_id']]
+    specs = [{'image_id': image_id} for image_id in sorted(clouds)]
+
+    results = list(controller_test_images_pipelined(specs, max_in_flight=2))
+
+    assert [spec['image_id'] for spec, _, _ in results] == [
+        'image-1', 'image-2', 'image-3'
+    ]
+    assert results[0][1] == 0
+    assert results[1][1] == 1
+    assert results[1][2]['error'] == 'Exception: Launch failed!'
+    assert results[2][1] == 0
+
+    # The third instance launches only once the first is tested
+    assert events.index(('test', 'image-1')) < \
+        events.index(('prepare', 'image-3'))
+
+
+@patch('img_proof.ipa_controller.get_cloud')
+def test_controller_test_images_pipelined_abandoned(mock_get_cloud):
+    """Test launched instances terminated if generator is closed."""
+    clouds = [MagicMock(cleanup=None), MagicMock(cleanup=None)]
+    for cloud in clouds:
+        cloud.instance_prepared = True
+        cloud.test_image.return_value = (0, {})
+
+    mock_get_cloud.side_effect = clouds
+    pipeline = controller_test_images_pipelined(
+        [{'image_id': 'image-1'}, {'image_id': 'image-2'}]
+    )
+
+    next(pipeline)
+    pipeline.close()
+
+    assert clouds[0]._terminate_instance.call_count == 0
+    assert clouds[1]._terminate_instance.call_count == 1
+    assert clouds[1].test_image.call_count == 0
+
+    with raises(IpaControllerException):
+        next(controller_test_images_pipelined([], max_in_flight=0))
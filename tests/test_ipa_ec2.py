@@ -24,8 +24,11 @@
 import boto3
 import pytest
 
+from botocore.exceptions import WaiterError
+
 from img_proof.ipa_ec2 import EC2Cloud
 from img_proof.ipa_exceptions import EC2CloudException
+from img_proof.ipa_pool import InstancePool
 
 from unittest.mock import MagicMock, patch
 
@@ -72,7 +75,7 @@ class TestEC2Provider(object):
         assert str(error.value) == msg
         self.kwargs['cloud_config'] = 'tests/ec2/.ec2utils.conf'
 
-    @patch.object(boto3, 'resource')
+    @patch.object(boto3.session, 'Session')
     def test_ec2_bad_connection(self, mock_boto3):
         """Test an exception is raised if boto3 unable to connect."""
         mock_boto3.side_effect = Exception('ERROR!')
@@ -178,6 +181,38 @@ class TestEC2Provider(object):
         assert instance.instance_id == provider.running_instance_id
         assert resource.create_instances.call_count == 1
 
+    @patch.object(EC2Cloud, '_connect')
+    def test_ec2_get_state_waiter(self, mock_connect):
+        """Test ec2 provider uses boto3 waiters for instance states."""
+        waiter = MagicMock()
+        resource = MagicMock()
+        resource.meta.client.get_waiter.return_value = waiter
+        mock_connect.return_value = resource
+
+        provider = EC2Cloud(**self.kwargs)
+        provider.running_instance_id = 'i-123456789'
+
+        assert provider._get_state_waiter('pending') is None
+
+        provider._get_state_waiter('running')(600)
+        resource.meta.client.get_waiter.assert_called_once_with(
+            'instance_running'
+        )
+        waiter.wait.assert_called_once_with(
+            InstanceIds=['i-123456789'],
+            WaiterConfig={'Delay': 5, 'MaxAttempts': 120}
+        )
+
+        waiter.wait.side_effect = WaiterError(
+            'InstanceStopped', 'Max attempts exceeded', {}
+        )
+
+        with pytest.raises(EC2CloudException) as error:
+            provider._get_state_waiter('stopped')(10)
+
+        assert 'Instance has not arrived at the given state: stopped' \
+            in str(error.value)
+
     @patch.object(EC2Cloud, '_get_instance')
     def test_ec2_set_image_id(self, mock_get_instance):
         """Test ec2 provider set image id method."""
@@ -191,6 +226,34 @@ class TestEC2Provider(object):
         assert provider.image_id == instance.image_id
         assert mock_get_instance.call_count == 1
 
+    @patch.object(EC2Cloud, '_start_instance_if_stopped')
+    @patch.object(EC2Cloud, '_get_instance')
+    def test_ec2_acquire_pool_instance(
+        self, mock_get_instance, mock_start_instance, tmpdir
+    ):
+        """Test setting the IP of a pooled instance."""
+        self.kwargs['use_pool'] = True
+        self.kwargs['pool_file'] = str(tmpdir.join('pool.json'))
+        provider = EC2Cloud(**self.kwargs)
+
+        InstancePool(self.kwargs['pool_file']).add(
+            'ec2',
+            provider.image_id,
+            provider.instance_type,
+            provider.region,
+            'i-pooled'
+        )
+        assert provider._acquire_pool_instance() is True
+        assert provider.running_instance_id == 'i-pooled'
+
+        instance = MagicMock()
+        instance.network_interfaces = []
+        instance.public_ip_address = '10.0.0.3'
+        mock_get_instance.return_value = instance
+
+        provider._set_instance_ip()
+        assert provider.instance_ip == '10.0.0.3'
+
     @patch.object(EC2Cloud, '_get_instance')
     def test_ec2_set_instance_ip(self, mock_get_instance):
         """Test ec2 provider set image id method."""
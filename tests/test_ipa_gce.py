@@ -25,6 +25,7 @@ import pytest
 
 from img_proof.ipa_gce import GCECloud
 from img_proof.ipa_exceptions import GCECloudException
+from img_proof.ipa_pool import InstancePool
 
 from unittest.mock import MagicMock, patch
 
@@ -440,6 +441,33 @@ class TestGCECloud(object):
 
         assert self.cloud.instance_ip == '10.0.0.0'
 
+    @patch.object(GCECloud, '_start_instance_if_stopped')
+    @patch.object(GCECloud, '_get_instance')
+    def test_gce_acquire_pool_instance(
+        self, mock_get_instance, mock_start_instance, tmpdir
+    ):
+        """Test setting the IP of a pooled instance."""
+        self.cloud.use_pool = True
+        self.cloud.pool_file = str(tmpdir.join('pool.json'))
+
+        InstancePool(self.cloud.pool_file).add(
+            'gce',
+            self.cloud.image_id,
+            self.cloud.instance_type,
+            self.cloud.region,
+            'gce-pooled'
+        )
+        assert self.cloud._acquire_pool_instance() is True
+        assert self.cloud.running_instance_id == 'gce-pooled'
+
+        interface = MagicMock()
+        interface.network_i_p = '10.0.0.4'
+        interface.access_configs = []
+        mock_get_instance.return_value.network_interfaces = [interface]
+
+        self.cloud._set_instance_ip()
+        assert self.cloud.instance_ip == '10.0.0.4'
+
     @patch.object(GCECloud, '_wait_on_instance')
     def test_gce_start_instance(self, mock_wait_on_instance):
         """Test gce start instance method."""
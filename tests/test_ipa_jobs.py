@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""img_proof job store unit tests."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+
+import pytest
+
+from tempfile import TemporaryDirectory
+
+from img_proof.ipa_exceptions import IpaJobStoreException
+from img_proof.ipa_jobs import JobStore, get_job_checkpoint
+
+
+def test_job_store():
+    """Test adding, updating and listing jobs."""
+    with TemporaryDirectory() as store_dir:
+        store_file = os.path.join(store_dir, 'img_proof', 'jobs.db')
+        store = JobStore(store_file)
+
+        store.add({
+            'id': 'abc',
+            'status': 'queued',
+            'options': {'cloud_name': 'ec2'},
+            'submitted': 1
+        })
+        store.add({
+            'id': 'def',
+            'status': 'queued',
+            'options': {'cloud_name': 'gce'},
+            'submitted': 2
+        })
+
+        # A second store on the same file sees the same jobs
+        JobStore(store_file).update(
+            'abc',
+            status='passed',
+            results={'summary': {'passed': 1}}
+        )
+
+        job = store.get('abc')
+        assert job['status'] == 'passed'
+        assert job['options'] == {'cloud_name': 'ec2'}
+        assert job['results'] == {'summary': {'passed': 1}}
+        assert job['instance_id'] is None
+        assert store.get('fake') is None
+
+        assert [job['id'] for job in store.list_jobs()] == ['abc', 'def']
+        assert [job['id'] for job in store.list_jobs('queued')] == ['def']
+
+        with pytest.raises(IpaJobStoreException) as error:
+            store.update('abc', fake=1)
+
+        assert str(error.value) == 'Invalid job columns: fake'
+
+        with pytest.raises(IpaJobStoreException):
+            store.add({'id': 'abc', 'status': 'queued', 'options': {}})
+
+
+def test_get_job_checkpoint():
+    """Test finding the newest checkpoint of a job."""
+    with TemporaryDirectory() as results_dir:
+        job = {'results_dir': results_dir, 'submitted': time.time() - 60}
+        assert get_job_checkpoint(job) is None
+
+        for name, mtime in (
+            ('1.checkpoint', time.time() - 3600),
+            ('2.checkpoint', time.time() - 30),
+            ('3.checkpoint', time.time() - 10),
+            ('4.log', time.time())
+        ):
+            path = os.path.join(results_dir, name)
+            open(path, 'w').close()
+            os.utime(path, (mtime, mtime))
+
+        assert get_job_checkpoint(job) == os.path.join(
+            results_dir, '3.checkpoint'
+        )
+
+        job['submitted'] = time.time()
+        assert get_job_checkpoint(job) is None
+
+    assert get_job_checkpoint({'results_dir': None}) is None
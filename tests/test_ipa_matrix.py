@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""img_proof matrix unit tests."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from img_proof import ipa_utils
+from img_proof.ipa_exceptions import IpaMatrixException
+from img_proof.ipa_matrix import expand_matrix, _run_combination
+from img_proof.ipa_matrix import test_matrix as matrix_test_matrix
+
+
+def test_expand_matrix():
+    """Test matrix expansion with exclude."""
+    spec = ipa_utils.get_yaml_config('tests/data/matrix/matrix.yaml')
+    combinations = expand_matrix(spec)
+
+    assert len(combinations) == 3
+    assert combinations[0]['cloud_name'] == 'ec2'
+    assert combinations[0]['distro'] == 'sles'
+    assert combinations[0]['image_id'] == 'ami-123456'
+    assert combinations[0]['region'] == 'us-west-1'
+    assert combinations[0]['instance_type'] == 't3.micro'
+    assert 'max_workers' not in combinations[0]
+
+    for kwargs in combinations:
+        assert not (
+            kwargs['image_id'] == 'ami-654321' and
+            kwargs['region'] == 'eu-central-1'
+        )
+
+
+@pytest.mark.parametrize(
+    "spec,message",
+    [(['ec2'], 'Matrix spec must be a mapping.'),
+     ({'distro': 'sles'}, 'Matrix spec requires a cloud.'),
+     ({'cloud': 'ec2', 'fake': 1}, 'Invalid matrix spec option: fake'),
+     ({'cloud': 'ec2', 'matrix': {'fake': [1]}},
+      'Invalid matrix option: fake'),
+     ({'cloud': 'ec2', 'matrix': ['image_id']},
+      'Matrix section must be a mapping of option to values.')],
+    ids=['not-dict', 'no-cloud', 'bad-option', 'bad-matrix-option',
+         'bad-matrix']
+)
+def test_expand_matrix_invalid(spec, message):
+    """Test matrix expansion exceptions."""
+    with pytest.raises(IpaMatrixException) as error:
+        expand_matrix(spec)
+
+    assert str(error.value) == message
+
+
+@patch('img_proof.ipa_matrix.test_image')
+def test_run_combination(mock_test_image):
+    """Test a single combination run collects results info."""
+    mock_test_image.return_value = (
+        0,
+        {
+            'summary': {'passed': 1, 'total': 1},
+            'info': {
+                'instance': 'i-123456',
+                'log_file': 'fake.log',
+                'results_file': 'fake.results'
+            }
+        }
+    )
+
+    run = _run_combination(0, {'cloud_name': 'ec2', 'image_id': 'ami-1'})
+
+    assert run['status'] == 0
+    assert run['instance'] == 'i-123456'
+    assert run['results_file'] == 'fake.results'
+    assert run['summary']['passed'] == 1
+
+    mock_test_image.side_effect = Exception('Broken!')
+    run = _run_combination(0, {'cloud_name': 'ec2', 'image_id': 'ami-1'})
+
+    assert run['status'] == 1
+    assert run['error'] == 'Exception: Broken!'
+
+
+@patch('img_proof.ipa_matrix.ProcessPoolExecutor', ThreadPoolExecutor)
+@patch('img_proof.ipa_matrix.test_image')
+def test_matrix(mock_test_image):
+    """Test matrix run writes aggregated results file."""
+    mock_test_image.side_effect = [
+        (0, {'summary': {'passed': 1}, 'info': {}}),
+        (1, {'summary': {'failed': 1}, 'info': {}}),
+        (0, {'summary': {'passed': 1}, 'info': {}})
+    ]
+
+    with TemporaryDirectory() as results_dir:
+        results_file = os.path.join(results_dir, 'matrix', 'test.results')
+        status, results = matrix_test_matrix(
+            'tests/data/matrix/matrix.yaml',
+            results_file=results_file
+        )
+
+        with open(results_file) as f:
+            data = json.load(f)
+
+    assert status == 1
+    assert mock_test_image.call_count == 3
+    assert data['summary']['total'] == 3
+    assert data['summary']['passed'] == 2
+    assert data['summary']['failed'] == 1
+    assert data['info']['max_workers'] == 2
+    assert [run['image_id'] for run in data['runs']] == [
+        'ami-123456', 'ami-123456', 'ami-654321'
+    ]
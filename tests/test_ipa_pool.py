@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""img_proof instance pool unit tests."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+import pytest
+
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from img_proof.ipa_exceptions import IpaPoolException
+from img_proof.ipa_pool import InstancePool
+
+
+class TestInstancePool(object):
+    """img_proof instance pool test class."""
+
+    def setup_method(self, method):
+        """Set up temp pool file."""
+        self.pool_dir = TemporaryDirectory()
+        self.pool = InstancePool(
+            os.path.join(self.pool_dir.name, 'pool', 'pool.json')
+        )
+
+    def teardown_method(self, method):
+        """Cleanup pool file."""
+        self.pool_dir.cleanup()
+
+    def test_pool_acquire(self):
+        """Test matching instances are acquired oldest first."""
+        self.pool.add('ec2', 'ami-1', 't3.micro', 'us-west-1', 'i-1')
+        self.pool.add('ec2', 'ami-1', 't3.micro', 'us-west-1', 'i-2')
+        self.pool.add('ec2', 'ami-2', 't3.micro', 'us-west-1', 'i-3')
+
+        assert self.pool.count('ec2', 'ami-1', 't3.micro', 'us-west-1') == 2
+        assert self.pool.acquire(
+            'ec2', 'ami-1', 't3.micro', 'us-west-1'
+        ) == 'i-1'
+        assert self.pool.acquire(
+            'ec2', 'ami-1', 't3.micro', 'us-west-1'
+        ) == 'i-2'
+        assert self.pool.acquire(
+            'ec2', 'ami-1', 't3.micro', 'us-west-1'
+        ) is None
+        assert self.pool.acquire(
+            'gce', 'ami-2', 't3.micro', 'us-west-1'
+        ) is None
+
+        entries = self.pool.list_entries()
+        assert len(entries) == 1
+        assert entries[0]['instance_id'] == 'i-3'
+
+    @patch('img_proof.ipa_pool.time.time')
+    def test_pool_expired(self, mock_time):
+        """Test expired instances are not acquired."""
+        mock_time.return_value = 1000
+        self.pool.add('ec2', 'ami-1', None, 'us-west-1', 'i-1', ttl=60)
+        self.pool.add('ec2', 'ami-1', None, 'us-west-1', 'i-2')
+
+        mock_time.return_value = 1100
+        expired = self.pool.get_expired()
+        assert [entry['instance_id'] for entry in expired] == ['i-1']
+        assert self.pool.get_expired('gce') == []
+
+        assert self.pool.acquire('ec2', 'ami-1', None, 'us-west-1') == 'i-2'
+        assert self.pool.acquire('ec2', 'ami-1', None, 'us-west-1') is None
+
+        self.pool.remove('i-1')
+        assert self.pool.list_entries() == []
+
+    def test_pool_invalid_file(self):
+        """Test exception raised if pool file is invalid."""
+        os.makedirs(os.path.dirname(self.pool.pool_file))
+        with open(self.pool.pool_file, 'w') as f:
+            f.write('{not json')
+
+        with pytest.raises(IpaPoolException):
+            self.pool.list_entries()
@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""img_proof test scheduler unit tests."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from img_proof.ipa_exceptions import IpaSchedulerException
+from img_proof.ipa_scheduler import TestScheduler, sort_test_files
+
+
+def get_ready(scheduler):
+    """Return the names of the tests which are ready."""
+    return [test for index, test in scheduler.get_ready()]
+
+
+def test_scheduler_flat_tests():
+    """Test tests without attributes run up to max workers at once."""
+    scheduler = TestScheduler(['a', 'b', 'c'], max_workers=2)
+
+    assert get_ready(scheduler) == ['a', 'b']
+    assert get_ready(scheduler) == []
+
+    scheduler.finish(1)
+    assert get_ready(scheduler) == ['c']
+
+    scheduler.finish(0)
+    scheduler.finish(2)
+    assert scheduler.is_done()
+
+
+def test_scheduler_requires_and_conflicts():
+    """Test required tests run first and conflicts never overlap."""
+    attributes = {
+        'a': {'requires': ['c'], 'conflicts': [], 'exclusive': False},
+        'b': {'requires': [], 'conflicts': ['hosts'], 'exclusive': False},
+        'd': {'requires': [], 'conflicts': ['hosts'], 'exclusive': False},
+        'e': {'requires': ['missing'], 'conflicts': [], 'exclusive': False}
+    }
+    scheduler = TestScheduler(
+        ['a', 'b', 'c', 'd', 'e'], attributes, max_workers=4
+    )
+
+    assert get_ready(scheduler) == ['b', 'c', 'e']
+
+    scheduler.finish(2)
+    assert get_ready(scheduler) == ['a']
+
+    scheduler.finish(1)
+    assert get_ready(scheduler) == ['d']
+
+
+def test_scheduler_exclusive():
+    """Test exclusive test waits for running tests and runs alone."""
+    attributes = {
+        'b': {'requires': [], 'conflicts': [], 'exclusive': True}
+    }
+    scheduler = TestScheduler(['a', 'b', 'c'], attributes, max_workers=3)
+
+    assert get_ready(scheduler) == ['a']
+
+    scheduler.finish(0)
+    assert get_ready(scheduler) == ['b']
+    assert get_ready(scheduler) == []
+
+    scheduler.finish(1)
+    assert get_ready(scheduler) == ['c']
+
+
+def test_scheduler_lists():
+    """Test lists of test files have the attributes of their files."""
+    attributes = {
+        'b': {'conflicts': ['hosts']},
+        'c': {'exclusive': True},
+        'e': {'requires': ['c']},
+        'f': {'conflicts': ['hosts']}
+    }
+    scheduler = TestScheduler(
+        [['a', 'b'], ['c'], ['d', 'e'], ['f']], attributes, max_workers=4
+    )
+
+    assert get_ready(scheduler) == [['a', 'b']]
+
+    scheduler.finish(0)
+    assert get_ready(scheduler) == [['c']]
+
+    scheduler.finish(1)
+    assert get_ready(scheduler) == [['d', 'e'], ['f']]
+
+
+def test_scheduler_cycle():
+    """Test exception raised for dependency cycles."""
+    attributes = {
+        '/tests/a.py': {'requires': ['/tests/b.py']},
+        '/tests/b.py': {'requires': ['/tests/a.py']}
+    }
+
+    with pytest.raises(IpaSchedulerException) as error:
+        TestScheduler(['/tests/a.py', '/tests/b.py'], attributes)
+
+    assert str(error.value) == 'Test dependency cycle: a.py -> b.py -> a.py'
+
+
+def test_scheduler_sort_test_files():
+    """Test required tests are moved first between sync points."""
+    attributes = {'a': {'requires': ['b', 'c']}}
+    test_files = ['a', 'b', 'test_soft_reboot', 'c', ['d', 'e']]
+
+    assert sort_test_files(test_files, attributes) == [
+        'b', 'a', 'test_soft_reboot', 'c', ['d', 'e']
+    ]
@@ -0,0 +1,445 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""img_proof server unit tests."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import http.client
+import json
+import os
+import socket
+import stat
+import threading
+import time
+
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from img_proof.ipa_exceptions import IpaServerException
+from img_proof.ipa_jobs import JobStore
+from img_proof.ipa_server import JobManager, JobServer, JobUnixServer
+
+
+@pytest.fixture
+def manager():
+    """Job manager with a thread pool instead of worker processes."""
+    with patch('img_proof.ipa_server.ProcessPoolExecutor', ThreadPoolExecutor):
+        manager = JobManager(max_workers=1)
+        yield manager
+        manager.shutdown()
+
+
+@pytest.mark.parametrize(
+    "kwargs,message",
+    [(['ec2'], 'Job must be a json object.'),
+     ({'cloud_name': 'ec2', 'fake': 1}, 'Invalid job options: fake'),
+     ({'image_id': 'ami-123'}, 'Job requires a cloud_name.')],
+    ids=['not-dict', 'invalid-option', 'no-cloud']
+)
+def test_job_manager_submit_invalid(manager, kwargs, message):
+    """Test job submission with invalid options."""
+    with pytest.raises(IpaServerException) as error:
+        manager.submit(kwargs)
+
+    assert str(error.value) == message
+
+
+@patch('img_proof.ipa_server.test_image')
+def test_job_manager_jobs(mock_test_image, manager):
+    """Test job results, listing and watching."""
+    mock_test_image.side_effect = [
+        (0, {'summary': {'passed': 1}}),
+        (1, {'summary': {'failed': 1}}),
+        Exception('Broken!')
+    ]
+
+    jobs = [
+        manager.submit({'cloud_name': 'ec2', 'image_id': image_id})
+        for image_id in ('ami-1', 'ami-2', 'ami-3')
+    ]
+
+    job = manager.get(jobs[0]['id'], wait=10)
+    assert job['status'] == 'passed'
+    assert job['exit_status'] == 0
+    assert job['results']['summary']['passed'] == 1
+
+    statuses = [job['status'] for job in manager.watch(jobs[1]['id'])]
+    assert statuses[-1] == 'failed'
+
+    job = manager.get(jobs[2]['id'], wait=10)
+    assert job['status'] == 'error'
+    assert job['error'] == 'Exception: Broken!'
+
+    listed = manager.list_jobs()
+    assert [job['id'] for job in listed] == [job['id'] for job in jobs]
+    assert 'results' not in listed[0]
+
+    mock_test_image.assert_any_call(cloud_name='ec2', image_id='ami-1')
+
+    with pytest.raises(IpaServerException) as error:
+        manager.get('123')
+
+    assert str(error.value) == 'Job not found: 123'
+
+
+@patch('img_proof.ipa_server.test_image')
+def test_job_manager_cancel(mock_test_image, manager):
+    """Test cancelling a queued job."""
+    event = threading.Event()
+
+    def run(**kwargs):
+        event.wait(10)
+        return 0, {}
+
+    mock_test_image.side_effect = run
+
+    running = manager.submit({'cloud_name': 'ec2'})
+    queued = manager.submit({'cloud_name': 'ec2'})
+
+    assert manager.cancel(queued['id'])
+    assert manager.get(queued['id'])['status'] == 'cancelled'
+
+    event.set()
+    assert manager.get(running['id'], wait=10)['status'] == 'passed'
+    assert not manager.cancel(running['id'])
+
+
+@patch('img_proof.ipa_server.test_image')
+def test_job_manager_running(mock_test_image):
+    """Test jobs are running only once a worker starts them."""
+    started = threading.Event()
+    event = threading.Event()
+
+    def run(**kwargs):
+        started.set()
+        event.wait(10)
+        return 0, {}
+
+    mock_test_image.side_effect = run
+
+    with patch('img_proof.ipa_server.ProcessPoolExecutor',
+               ThreadPoolExecutor):
+        manager = JobManager(max_workers=1)
+
+    try:
+        running = manager.submit({'cloud_name': 'ec2'})
+        queued = manager.submit({'cloud_name': 'ec2'})
+        assert started.wait(10)
+
+        end = time.time() + 10
+        while manager.get(running['id'])['status'] != 'running':
+            assert time.time() < end
+            time.sleep(0.01)
+
+        job = manager.get(running['id'])
+        assert job['started']
+
+        # Process pool futures are running once sent to a worker queue
+        manager.futures[queued['id']].running = lambda: True
+        assert manager.get(queued['id'])['status'] == 'queued'
+
+        event.set()
+        assert manager.get(queued['id'], wait=10)['status'] == 'passed'
+    finally:
+        event.set()
+        manager.shutdown()
+
+
+@patch('img_proof.ipa_server.get_cloud')
+def test_job_manager_store(mock_get_cloud):
+    """Test jobs are saved with their instance in the store."""
+    cloud = MagicMock()
+    cloud.checkpoint = None
+    cloud.running_instance_id = 'i-123'
+    cloud._get_results_dir.return_value = '/results/ec2/ami-123/i-123'
+    cloud.log_file = '/results/ec2/ami-123/i-123/1.log'
+    cloud.results_file = '/results/ec2/ami-123/i-123/1.results'
+    cloud.test_image.return_value = (0, {'summary': {'passed': 1}})
+    mock_get_cloud.return_value = cloud
+
+    with TemporaryDirectory() as store_dir, \
+            patch('img_proof.ipa_server.ProcessPoolExecutor',
+                  ThreadPoolExecutor):
+        store = JobStore(os.path.join(store_dir, 'jobs.db'))
+        manager = JobManager(max_workers=1, store=store)
+
+        try:
+            job = manager.submit({'cloud_name': 'ec2'})
+            assert manager.get(job['id'], wait=10)['status'] == 'passed'
+        finally:
+            manager.shutdown()
+
+        stored = store.get(job['id'])
+        assert stored['status'] == 'passed'
+        assert stored['instance_id'] == 'i-123'
+        assert stored['results_dir'] == '/results/ec2/ami-123/i-123'
+        assert stored['results_file'] == cloud.results_file
+        assert stored['results'] == {'summary': {'passed': 1}}
+        assert stored['started']
+
+        # Finished jobs are loaded by a new manager
+        manager = JobManager(max_workers=1, store=JobStore(store.store_file))
+        try:
+            assert manager.get(job['id'])['status'] == 'passed'
+            assert not manager.cancel(job['id'])
+        finally:
+            manager.shutdown()
+
+
+@patch('img_proof.ipa_server.get_cloud')
+@patch('img_proof.ipa_server.test_image')
+def test_job_manager_recover(mock_test_image, mock_get_cloud):
+    """Test recovery of jobs interrupted by a restart."""
+    mock_test_image.return_value = (0, {'summary': {'passed': 1}})
+    cloud = MagicMock()
+    cloud.checkpoint = {'results_file': '/results/1.results'}
+    cloud.running_instance_id = 'i-1'
+    cloud.log_file = '/results/1.log'
+    cloud.results_file = '/results/1.results'
+    cloud.test_image.return_value = (0, {'summary': {'passed': 1}})
+    mock_get_cloud.return_value = cloud
+
+    with TemporaryDirectory() as store_dir:
+        results_dir = os.path.join(store_dir, 'results')
+        os.makedirs(results_dir)
+        checkpoint = os.path.join(results_dir, '1.checkpoint')
+        open(checkpoint, 'w').close()
+
+        store = JobStore(os.path.join(store_dir, 'jobs.db'))
+        now = time.time() - 60
+        jobs = [
+            ('queued', {'cloud_name': 'ec2', 'shards': 2}, None, None),
+            ('running', {'cloud_name': 'ec2'}, 'i-1', results_dir),
+            ('running', {'cloud_name': 'ec2'}, 'i-2', store_dir),
+            ('running', {'cloud_name': 'ec2', 'cleanup': False}, 'i-3', None),
+            ('running', {'cloud_name': 'ec2'}, None, None)
+        ]
+        for index, (status, options, instance_id, job_dir) in \
+                enumerate(jobs):
+            store.add({
+                'id': str(index),
+                'status': status,
+                'options': options,
+                'submitted': now + index,
+                'instance_id': instance_id,
+                'results_dir': job_dir
+            })
+
+        with patch('img_proof.ipa_server.ProcessPoolExecutor',
+                   ThreadPoolExecutor):
+            manager = JobManager(max_workers=1, store=store)
+
+        try:
+            assert manager.get('0', wait=10)['status'] == 'passed'
+            mock_test_image.assert_called_once_with(
+                cloud_name='ec2', shards=2
+            )
+
+            job = manager.get('1', wait=10)
+            assert job['status'] == 'passed'
+            assert job['attempts'] == 1
+            mock_get_cloud.assert_any_call(
+                cloud_name='ec2', resume=checkpoint
+            )
+
+            job = manager.get('2')
+            assert job['status'] == 'error'
+            assert job['error'] == \
+                'Job interrupted before a checkpoint was saved.'
+            mock_get_cloud.assert_any_call(
+                cloud_name='ec2', running_instance_id='i-2'
+            )
+            assert cloud._terminate_instance.call_count == 1
+
+            assert manager.get('3')['error'] == (
+                'Job interrupted before a checkpoint was saved. '
+                'Instance i-3 is still running.'
+            )
+            assert store.get('4')['status'] == 'error'
+        finally:
+            manager.shutdown()
+
+        assert store.get('1')['status'] == 'passed'
+
+
+def request(url, method='GET', data=None, token=None):
+    """Return the status code and json body of the request."""
+    body = json.dumps(data).encode() if data is not None else None
+    headers = {'Authorization': 'Bearer ' + token} if token else {}
+
+    try:
+        with urlopen(
+            Request(url, data=body, headers=headers, method=method)
+        ) as response:
+            return response.status, response.read().decode()
+    except HTTPError as error:
+        return error.code, error.read().decode()
+
+
+@patch('img_proof.ipa_server.test_image')
+def test_job_server(mock_test_image, manager):
+    """Test the REST API of the job server."""
+    mock_test_image.return_value = (0, {'summary': {'passed': 1}})
+
+    server = JobServer(('127.0.0.1', 0), manager)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    url = 'http://127.0.0.1:{}/jobs'.format(server.server_address[1])
+
+    try:
+        status, body = request(url, 'POST', {'cloud_name': 'ec2'})
+        assert status == 201
+        job_id = json.loads(body)['id']
+
+        # Payload of the example in the docs
+        status, body = request(url, 'POST', {
+            'cloud_name': 'ec2',
+            'image_id': 'ami-123456',
+            'distro': 'sles',
+            'tests': ['test_sles']
+        })
+        assert status == 201
+        assert json.loads(body)['options']['distro'] == 'sles'
+
+        status, body = request(url, 'POST', {'fake': 1})
+        assert status == 400
+        assert json.loads(body)['error'] == 'Invalid job options: fake'
+
+        status, body = request('{}/{}?wait=10'.format(url, job_id))
+        assert status == 200
+        assert json.loads(body)['status'] == 'passed'
+
+        status, body = request('{}/{}?stream=1'.format(url, job_id))
+        assert status == 200
+        lines = body.splitlines()
+        assert json.loads(lines[-1])['status'] == 'passed'
+
+        status, body = request(url)
+        assert status == 200
+        assert json.loads(body)[0]['id'] == job_id
+
+        status, body = request('{}/{}'.format(url, job_id), 'DELETE')
+        assert status == 200
+        assert json.loads(body) == {'id': job_id, 'cancelled': False}
+
+        status, body = request('{}/abc123'.format(url))
+        assert status == 404
+        assert json.loads(body)['error'] == 'Job not found: abc123'
+
+        status, body = request('{}/abc123?stream=1'.format(url))
+        assert status == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+@patch('img_proof.ipa_server.test_image')
+def test_job_server_token(mock_test_image, manager):
+    """Test requests without the server token are rejected."""
+    mock_test_image.return_value = (0, {})
+
+    server = JobServer(('127.0.0.1', 0), manager, token='secret')
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    url = 'http://127.0.0.1:{}/jobs'.format(server.server_address[1])
+
+    try:
+        for method, data in (('GET', None), ('POST', {}), ('DELETE', None)):
+            job_url = url if method != 'DELETE' else url + '/abc123'
+            status, body = request(job_url, method, data)
+            assert status == 401
+            assert json.loads(body)['error'] == 'Unauthorized.'
+
+        status, body = request(url, token='wrong')
+        assert status == 401
+        assert not manager.jobs
+
+        status, body = request(
+            url, 'POST', {'cloud_name': 'ec2'}, token='secret'
+        )
+        assert status == 201
+
+        status, body = request(url, token='secret')
+        assert status == 200
+        assert len(json.loads(body)) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection to a Unix socket."""
+
+    def __init__(self, path):
+        super(UnixHTTPConnection, self).__init__('localhost')
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+@patch('img_proof.ipa_server.test_image')
+def test_job_unix_server(mock_test_image, manager):
+    """Test the REST API on a Unix socket."""
+    mock_test_image.return_value = (0, {})
+
+    with TemporaryDirectory() as socket_dir:
+        path = os.path.join(socket_dir, 'img_proof.sock')
+        server = JobUnixServer(path, manager)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        try:
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+            connection = UnixHTTPConnection(path)
+            connection.request(
+                'POST', '/jobs', json.dumps({'cloud_name': 'ec2'})
+            )
+            response = connection.getresponse()
+            assert response.status == 201
+            job_id = json.loads(response.read())['id']
+            connection.close()
+
+            connection = UnixHTTPConnection(path)
+            connection.request('GET', '/jobs/{}?wait=10'.format(job_id))
+            response = connection.getresponse()
+            assert json.loads(response.read())['status'] == 'passed'
+            connection.close()
+
+            # A second server does not remove the socket in use
+            with pytest.raises(OSError):
+                JobUnixServer(path, manager)
+
+            assert os.path.exists(path)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        assert not os.path.exists(path)
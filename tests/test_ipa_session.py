@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""img_proof session unit tests."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import logging
+import sys
+import threading
+
+from unittest.mock import MagicMock, patch
+
+from img_proof import ipa_utils
+from img_proof.ipa_session import IpaSession
+
+
+@patch('img_proof.ipa_utils.execute_ssh_command')
+def test_session_clients(mock_exec_cmd):
+    """Test sessions do not share or close each other's clients."""
+    first = IpaSession()
+    second = IpaSession()
+
+    client = MagicMock()
+    first.clients['10.0.0.1'] = client
+    second.clients['10.0.0.1'] = MagicMock()
+
+    assert first.get_ssh_client('10.0.0.1', 'key', 'root', 10) == client
+    assert ipa_utils.CLIENT_CACHE == {}
+
+    with second:
+        pass
+
+    assert second.clients == {}
+    assert first.clients == {'10.0.0.1': client}
+    assert client.close.call_count == 0
+
+    first.clear_cache('10.0.0.1')
+    client.close.assert_called_once_with()
+
+
+def test_session_logger():
+    """Test session loggers have their own level and shared handlers."""
+    output = io.StringIO()
+    handler = logging.StreamHandler(output)
+    logger = logging.getLogger('img_proof')
+    logger.addHandler(handler)
+
+    try:
+        debug = IpaSession(logging.DEBUG)
+        quiet = IpaSession(logging.WARNING)
+
+        debug.logger.debug('Debug message')
+        quiet.logger.info('Hidden message')
+        quiet.logger.warning('Warning message')
+    finally:
+        logger.removeHandler(handler)
+
+    assert output.getvalue() == 'Debug message\nWarning message\n'
+    assert logging.getLogger('img_proof') is not debug.logger
+
+    callback = MagicMock()
+    assert IpaSession(log_callback=callback).logger is callback
+
+
+def test_session_logger_no_duplicates():
+    """Test session records are emitted once with a root handler."""
+    output = io.StringIO()
+    handler = logging.StreamHandler(output)
+    root_handler = logging.StreamHandler(output)
+    root_handler.setFormatter(logging.Formatter('ROOT %(message)s'))
+    logger = logging.getLogger('img_proof')
+    logger.addHandler(handler)
+    logging.getLogger().addHandler(root_handler)
+
+    try:
+        IpaSession().logger.info('hello')
+    finally:
+        logger.removeHandler(handler)
+        logging.getLogger().removeHandler(root_handler)
+
+    assert output.getvalue() == 'hello\n'
+
+
+def test_session_redirect_output():
+    """Test output is only redirected for the calling thread."""
+    stdout = sys.stdout
+    outputs = {}
+    ready = threading.Barrier(3)
+
+    def run(name):
+        outputs[name] = io.StringIO()
+
+        with IpaSession().redirect_output(outputs[name]):
+            ready.wait(10)
+            print('Output of %s' % name)
+            ready.wait(10)
+
+    threads = [
+        threading.Thread(target=run, args=(name,))
+        for name in ('first', 'second')
+    ]
+    for thread in threads:
+        thread.start()
+
+    ready.wait(10)
+    ready.wait(10)
+
+    for thread in threads:
+        thread.join()
+
+    assert outputs['first'].getvalue() == 'Output of first\n'
+    assert outputs['second'].getvalue() == 'Output of second\n'
+    assert sys.stdout is stdout
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""img_proof testinfra backend unit tests."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import paramiko
+import testinfra
+
+from unittest.mock import MagicMock, patch
+
+from img_proof import ipa_testinfra
+
+
+def get_mock_client(output=b'test'):
+    """Return a mock paramiko client with an active transport."""
+    channel = MagicMock()
+    channel.makefile.return_value = [output]
+    channel.makefile_stderr.return_value = []
+    channel.recv_exit_status.return_value = 0
+
+    client = MagicMock(spec=paramiko.SSHClient)
+    client.get_transport.return_value.is_active.return_value = True
+    client.get_transport.return_value.open_session.return_value = channel
+    return client
+
+
+def test_testinfra_shared_client():
+    """Test testinfra commands run on the shared client."""
+    client = get_mock_client()
+    host = testinfra.get_host('img-proof://10.0.0.10')
+
+    with ipa_testinfra.shared_client('10.0.0.10', client):
+        assert host.run('echo test').stdout == 'test'
+
+    channel = client.get_transport.return_value.open_session.return_value
+    channel.exec_command.assert_called_once_with(b'echo test')
+    assert ipa_testinfra.CLIENTS == {}
+    assert client.close.call_count == 0
+
+
+def test_testinfra_own_client():
+    """Test testinfra connects without an active shared client."""
+    client = get_mock_client(b'own')
+    host = testinfra.get_host('img-proof://10.0.0.11')
+
+    shared = get_mock_client()
+    shared.get_transport.return_value.is_active.return_value = False
+
+    with ipa_testinfra.shared_client('10.0.0.11', shared):
+        with patch('testinfra.backend.paramiko.paramiko.SSHClient') as ssh:
+            ssh.return_value = client
+            assert host.run('echo test').stdout == 'own'
+
+    assert client.connect.call_args[1]['hostname'] == '10.0.0.11'
+
+    # Only paramiko clients are shared
+    with ipa_testinfra.shared_client('10.0.0.11', MagicMock()):
+        assert ipa_testinfra.CLIENTS == {}
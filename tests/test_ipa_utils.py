@@ -21,7 +21,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import doctest
+import json
+import logging
 import os
+import socket
+import threading
 import time
 
 import paramiko
@@ -227,6 +232,47 @@ def test_utils_expand_test_files_exclude():
     assert 'tests/data/tests/test_image.py' not in expanded
 
 
+def test_utils_expand_test_files_attributes():
+    """Test expand test files with scheduling attributes."""
+    test_dirs = ['tests/data/tests']
+    names = ['test_deps_desc']
+    attributes = {}
+    expanded = ipa_utils.expand_test_files(test_dirs, names, [], attributes)
+
+    assert expanded == [
+        'tests/data/tests/test_image.py',
+        'tests/data/tests/test_sles.py'
+    ]
+    assert attributes == {
+        'tests/data/tests/test_image.py': {
+            'requires': ['tests/data/tests/test_sles.py'],
+            'conflicts': ['etc-hosts'],
+            'exclusive': False
+        },
+        'tests/data/tests/test_sles.py': {
+            'requires': [],
+            'conflicts': [],
+            'exclusive': True
+        }
+    }
+
+
+def test_utils_get_test_attributes():
+    """Test test description entries are split into name and attributes."""
+    assert ipa_utils.get_test_attributes('test_sles') == ('test_sles', None)
+
+    with pytest.raises(IpaUtilsException) as error:
+        ipa_utils.get_test_attributes({'requires': 'test_sles'})
+
+    assert str(error.value) == \
+        "Test description entry requires a name: {'requires': 'test_sles'}"
+
+    with pytest.raises(IpaUtilsException) as error:
+        ipa_utils.get_test_attributes({'name': 'test_image', 'after': 'x'})
+
+    assert str(error.value) == 'Invalid attributes for test test_image: after'
+
+
 def test_utils_test_file_not_found():
     """Test expand test file does not exist raises exception."""
     test_dirs = ['tests/data/tests']
@@ -276,6 +322,257 @@ def test_utils_expand_sync_points():
     assert expanded[3] == 'test_hard_reboot'
 
 
+def test_utils_group_test_files():
+    """Test grouping of test files between sync points."""
+    test_files = [
+        'test_a', 'test_b', 'test_hard_reboot', 'test_c',
+        'test_soft_reboot', 'test_d', 'test_e', 'test_f'
+    ]
+    assert ipa_utils.group_test_files(test_files) == [
+        ['test_a', 'test_b'],
+        'test_hard_reboot',
+        'test_c',
+        'test_soft_reboot',
+        ['test_d', 'test_e', 'test_f']
+    ]
+
+
+def test_utils_group_test_files_example():
+    """Test the group_test_files docstring example."""
+    finder = doctest.DocTestFinder()
+    runner = doctest.DocTestRunner()
+
+    for test in finder.find(
+        ipa_utils.group_test_files,
+        globs={'group_test_files': ipa_utils.group_test_files}
+    ):
+        runner.run(test)
+
+    assert runner.tries == 1
+    assert runner.failures == 0
+
+
+def test_utils_chunk_test_files():
+    """Test test files are split in contiguous chunks."""
+    test_files = ['test_a', 'test_b', 'test_c', 'test_d', 'test_e']
+
+    assert ipa_utils.chunk_test_files(test_files, 1) == [test_files]
+    assert ipa_utils.chunk_test_files(test_files, 2) == [
+        ['test_a', 'test_b', 'test_c'],
+        ['test_d', 'test_e']
+    ]
+    assert ipa_utils.chunk_test_files(['test_a'], 4) == [['test_a']]
+
+
+def test_utils_chunk_test_files_attributes():
+    """Test linked test files share a chunk and exclusive run alone."""
+    test_files = ['test_a', 'test_b', 'test_c', 'test_d', 'test_e']
+    attributes = {
+        'test_a': {'requires': ['test_c']},
+        'test_b': {'conflicts': ['etc-hosts']},
+        'test_d': {'exclusive': True},
+        'test_e': {'conflicts': ['etc-hosts']}
+    }
+
+    assert ipa_utils.chunk_test_files(test_files, 4, attributes) == [
+        ['test_a', 'test_c'],
+        ['test_b', 'test_e'],
+        ['test_d']
+    ]
+    assert ipa_utils.chunk_test_files(test_files, 1, attributes) == [
+        ['test_a', 'test_b', 'test_c', 'test_e'],
+        ['test_d']
+    ]
+
+
+def test_utils_split_test_files():
+    """Test test files are split in balanced shards."""
+    test_files = [
+        '/tests/test_a.py',
+        '/tests/test_b.py',
+        '/tests/test_c.py',
+        'test_soft_reboot',
+        '/tests/test_d.py::test_x',
+        '/tests/test_e.py'
+    ]
+    durations = {'test_a': 10, 'test_b': 4, 'test_c': 5, 'test_d': 3}
+
+    assert ipa_utils.split_test_files(test_files, 2, durations) == [
+        ['/tests/test_a.py', 'test_soft_reboot', '/tests/test_d.py::test_x'],
+        [
+            '/tests/test_b.py',
+            '/tests/test_c.py',
+            'test_soft_reboot',
+            '/tests/test_e.py'
+        ]
+    ]
+
+    # Required tests stay in the same shard
+    attributes = {'/tests/test_c.py': {'requires': ['/tests/test_a.py']}}
+    assert ipa_utils.split_test_files(
+        test_files, 2, durations, attributes
+    ) == [
+        ['/tests/test_a.py', '/tests/test_c.py'],
+        [
+            '/tests/test_b.py',
+            'test_soft_reboot',
+            '/tests/test_d.py::test_x',
+            '/tests/test_e.py'
+        ]
+    ]
+
+    assert ipa_utils.split_test_files(
+        ['/tests/test_a.py', '/tests/test_b.py', 'test_update'], 2
+    ) == [['/tests/test_a.py', 'test_update'], ['/tests/test_b.py']]
+    assert ipa_utils.split_test_files(['/tests/test_a.py'], 3) == [
+        ['/tests/test_a.py']
+    ]
+
+
+def test_utils_sort_test_segments():
+    """Test test files are sorted between sync points."""
+    test_files = [
+        'test_c', 'test_a', 'test_update', 'test_d', 'test_b', 'test_e'
+    ]
+
+    assert ipa_utils.sort_test_segments(test_files, lambda test: test) == [
+        'test_a', 'test_c', 'test_update', 'test_b', 'test_d', 'test_e'
+    ]
+
+
+def test_utils_predict_duration():
+    """Test wall clock duration is predicted for the test files."""
+    test_files = [
+        '/tests/test_a.py',
+        '/tests/test_b.py',
+        '/tests/test_c.py',
+        'test_soft_reboot',
+        '/tests/test_d.py'
+    ]
+    durations = {'test_a': 4, 'test_b': 2, 'test_c': 3}
+
+    assert ipa_utils.predict_duration(test_files, durations) == 12
+    assert ipa_utils.predict_duration(test_files, durations, 2) == 8
+    assert ipa_utils.predict_duration(test_files, {}) is None
+
+
+def test_utils_get_image_family():
+    """Test build dates are removed from image names."""
+    assert ipa_utils.get_image_family(
+        'suse-sles-15-sp5-v20231206-hvm-ssd-x86_64'
+    ) == 'suse-sles-15-sp5-hvm-ssd-x86_64'
+    assert ipa_utils.get_image_family(
+        'SUSE:sles-15-sp5:gen2:2023.12.06'
+    ) == 'SUSE:sles-15-sp5:gen2'
+    assert ipa_utils.get_image_family('ami-123456') == 'ami-123456'
+
+
+def test_utils_get_test_failures(tmp_path):
+    """Test test file outcomes are collected for the image family."""
+    history_log = str(tmp_path / '.history')
+    runs = [
+        ('ec2', 'sles-15-v20230101', {'test_a': 'failed', 'test_b': 'passed'}),
+        ('gce', 'sles-15-v20230201', {'test_a': 'passed', 'test_b': 'failed'}),
+        ('ec2', 'sles-12-v20230301', {'test_a': 'passed', 'test_b': 'failed'}),
+        ('ec2', 'sles-15-v20230401', {'test_a': 'passed', 'test_b': 'error'})
+    ]
+
+    for index, (platform, image, outcomes) in enumerate(runs):
+        log_file = str(tmp_path / '{}.log'.format(index))
+        results = {
+            'info': {'platform': platform, 'image': image},
+            'tests': [
+                {'nodeid': '/tests/{}.py::test'.format(name), 'outcome': out}
+                for name, out in outcomes.items()
+            ]
+        }
+
+        with open(log_file.replace('.log', '.results'), 'w') as f:
+            json.dump(results, f)
+
+        ipa_utils.update_history_log(history_log, test_log=log_file)
+
+    failures = ipa_utils.get_test_failures(
+        history_log, 'ec2', 'sles-15-v20230501'
+    )
+    assert failures == {'test_a': [False, True], 'test_b': [True, False]}
+
+    test_files = ['/tests/test_c.py', '/tests/test_a.py', '/tests/test_b.py']
+    assert sorted(
+        test_files,
+        key=lambda test: ipa_utils.get_test_failure_priority(test, failures)
+    ) == ['/tests/test_b.py', '/tests/test_a.py', '/tests/test_c.py']
+
+    assert ipa_utils.get_test_failures(
+        history_log, 'ec2', 'sles-15-v20230501', limit=1
+    ) == {'test_a': [False], 'test_b': [True]}
+
+
+def test_utils_get_test_name():
+    """Test test names are parsed from test file paths."""
+    assert ipa_utils.get_test_name('/tests/test_a.py') == 'test_a'
+    assert ipa_utils.get_test_name('/tests/test_a.py::test_x') == \
+        'test_a::test_x'
+    assert ipa_utils.get_test_name('test_soft_reboot') == 'test_soft_reboot'
+
+
+def test_utils_get_test_durations(tmp_path):
+    """Test test file durations are averaged from the history log."""
+    history_log = str(tmp_path / '.history')
+    runs = [
+        [('test_a.py::test_x', 1, 2), ('test_a.py::test_y', 1, 0)],
+        [('test_a.py::test_x', 1, 1), ('test_b.py::test_z', 2, 3)]
+    ]
+
+    for index, tests in enumerate(runs):
+        log_file = str(tmp_path / '{}.log'.format(index))
+        results = {
+            'tests': [
+                {
+                    'nodeid': '/tests/{}'.format(nodeid),
+                    'setup': {'duration': setup},
+                    'call': {'duration': call}
+                } for nodeid, setup, call in tests
+            ] + [{'nodeid': 'test_soft_reboot', 'outcome': 'passed'}]
+        }
+
+        with open(log_file.replace('.log', '.results'), 'w') as f:
+            json.dump(results, f)
+
+        ipa_utils.update_history_log(
+            history_log,
+            description='run',
+            test_log=log_file
+        )
+
+    ipa_utils.update_history_log(
+        history_log,
+        test_log=str(tmp_path / 'missing.log')
+    )
+
+    assert ipa_utils.get_test_durations(history_log) == {
+        'test_a': 3,
+        'test_b': 5
+    }
+    assert ipa_utils.get_test_durations(history_log, limit=1) == {
+        'test_a': 2,
+        'test_b': 5
+    }
+    assert ipa_utils.get_test_durations(str(tmp_path / 'none')) == {}
+
+
+def test_utils_run_pytest_subprocess():
+    """Test pytest run in child process returns json report."""
+    result, report, output = ipa_utils.run_pytest_subprocess(
+        ['-v', 'tests/data/tests/test_pytest_json_results.py']
+    )
+
+    assert result == 1
+    assert report['summary']['passed'] == 2
+    assert report['summary']['failed'] == 1
+    assert 'test_failing FAILED' in output
+
+
 @patch('img_proof.ipa_utils.execute_ssh_command')
 def test_utils_extract_archive(mock_exec_ssh_command):
     client = MagicMock()
@@ -403,6 +700,25 @@ def test_utils_redirect_output():
         os.remove(temp_file.name)
 
 
+def test_utils_get_logger():
+    """Test the console handler is only added once."""
+    level = logging.getLogger('img_proof').level
+    logger = ipa_utils.get_logger(logging.INFO)
+    ipa_utils.get_logger(logging.DEBUG)
+
+    handlers = [
+        handler for handler in logger.handlers
+        if getattr(handler, 'img_proof_console', False)
+    ]
+
+    assert len(handlers) == 1
+    assert handlers[0].level == logging.DEBUG
+    assert logger.level == logging.DEBUG
+
+    logger.removeHandler(handlers[0])
+    logger.setLevel(level)
+
+
 def test_utils_ssh_config_context_mgr():
     """Test ssh config context manager function."""
     with ipa_utils.ssh_config('root', 'tests/data/ida_test') as conf:
@@ -416,6 +732,51 @@ def test_utils_ssh_config_context_mgr():
     assert not os.path.isfile(conf)
 
 
+@patch('img_proof.ipa_utils.subprocess.run')
+def test_utils_ssh_config_multiplex(mock_run):
+    """Test ssh config with ControlMaster sockets."""
+    with ipa_utils.ssh_config(
+        'root', 'tests/data/ida_test', multiplex=True, control_persist=30
+    ) as conf:
+        with open(conf, 'r') as conf_file:
+            lines = conf_file.read().splitlines()
+
+        control_path = lines[4].split()[1]
+        control_dir = os.path.dirname(control_path)
+        assert lines[3] == '    ControlMaster auto'
+        assert control_path.endswith('%C')
+        assert lines[5] == '    ControlPersist 30'
+        assert os.path.isdir(control_dir)
+
+        # Fake master socket
+        open(os.path.join(control_dir, 'socket'), 'w').close()
+
+    assert not os.path.isfile(conf)
+    assert not os.path.isdir(control_dir)
+    assert mock_run.call_args[0][0] == [
+        'ssh', '-o',
+        'ControlPath={0}'.format(os.path.join(control_dir, 'socket')),
+        '-O', 'exit', 'img-proof'
+    ]
+
+
+@patch('img_proof.ipa_utils.subprocess.run')
+def test_utils_start_ssh_master(mock_run):
+    """Test start ssh master connection."""
+    mock_run.return_value.returncode = 0
+    assert ipa_utils.start_ssh_master('10.0.0.1', 'ssh_config')
+    assert mock_run.call_args[0][0] == [
+        'ssh', '-F', 'ssh_config', '-o', 'ConnectTimeout=10',
+        '10.0.0.1', 'true'
+    ]
+
+    mock_run.return_value.returncode = 255
+    assert not ipa_utils.start_ssh_master('10.0.0.1', 'ssh_config')
+
+    mock_run.side_effect = FileNotFoundError('ssh')
+    assert not ipa_utils.start_ssh_master('10.0.0.1', 'ssh_config')
+
+
 def test_utils_history_log():
     """Test utils history log function."""
     history_file = NamedTemporaryFile(delete=False)
@@ -480,6 +841,9 @@ def test_find_test_file():
     path = ipa_utils.find_test_file('test_sles::test_case', tests)
     assert path == '/path/to/test_sles.py::test_case'
 
+    path = ipa_utils.find_test_file('/path/to/test_sles.py::test_case', tests)
+    assert path == '/path/to/test_sles.py::test_case'
+
     with pytest.raises(IpaUtilsException) as error:
         ipa_utils.find_test_file('test_fake', tests)
     assert str(error.value) == (
@@ -581,3 +945,70 @@ def test_ignored():
     with pytest.raises(TypeError):
         with ipa_utils.ignored(ValueError):
             raise TypeError("This should not be ignored")
+
+
+@patch('img_proof.ipa_utils.time.sleep')
+def test_utils_poll(mock_sleep):
+    """Test poll backs off with jitter until check succeeds."""
+    check = MagicMock()
+    check.side_effect = [False, False, False, 'done']
+
+    result = ipa_utils.poll(
+        check, timeout=100, wait_period=1, max_wait_period=2, jitter=0.5
+    )
+
+    assert result == 'done'
+    assert check.call_count == 4
+
+    delays = [call[0][0] for call in mock_sleep.call_args_list]
+    assert len(delays) == 3
+    assert 0.5 <= delays[0] <= 1
+    assert 1 <= delays[1] <= 2
+    assert 1 <= delays[2] <= 2
+
+
+@patch('img_proof.ipa_utils.time.sleep')
+def test_utils_poll_timeout(mock_sleep):
+    """Test poll raises exception when timeout expires."""
+    with pytest.raises(IpaUtilsException) as error:
+        ipa_utils.poll(lambda: False, timeout=0, first_delay=5)
+
+    assert str(error.value) == 'Timed out after 0 seconds.'
+    mock_sleep.assert_called_once_with(0)
+
+
+def test_utils_wait_for_ssh_banner():
+    """Test banner probe waits for an SSH banner on the port."""
+    server = socket.socket()
+    server.bind((LOCALHOST, 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+
+    def serve():
+        conn, addr = server.accept()
+        conn.sendall(b'SSH-2.0-OpenSSH_9.6\r\n')
+        conn.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+
+    probe = ipa_utils.wait_for_ssh_banner(LOCALHOST, port=port, timeout=5)
+    thread.join()
+    server.close()
+
+    assert probe['banner'] == 'SSH-2.0-OpenSSH_9.6'
+    assert probe['attempts'] == 1
+    assert probe['time_to_banner'] < 5
+
+
+@patch('img_proof.ipa_utils.time.sleep')
+@patch('img_proof.ipa_utils.socket.create_connection')
+def test_utils_wait_for_ssh_banner_timeout(mock_connect, mock_sleep):
+    """Test banner probe raises exception if no banner received."""
+    mock_connect.side_effect = ConnectionRefusedError('Refused')
+
+    with pytest.raises(IpaSSHException) as error:
+        ipa_utils.wait_for_ssh_banner(LOCALHOST, timeout=0)
+
+    assert str(error.value) == \
+        'SSH banner not received from 127.0.0.1:22 after 1 attempts.'
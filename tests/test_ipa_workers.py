@@ -0,0 +1,137 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""img_proof pytest worker pool unit tests."""
+
+# Copyright (c) 2026 SUSE LLC. All rights reserved.
+#
+# This file is part of img_proof. img_proof provides an api and command line
+# utilities for testing images in the Public Cloud.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+
+import pytest
+
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from img_proof.ipa_exceptions import IpaWorkerException
+from img_proof.ipa_workers import PytestWorkerPool, get_rss
+
+TEST_FILE = '''
+import os
+
+
+def test_pass():
+    print('Output of test_pass')
+
+
+def test_crash():
+    if os.path.basename(__file__) == 'test_crash.py':
+        os._exit(1)
+'''
+
+
+def test_worker_pool():
+    """Test sessions run in workers which are recycled."""
+    with TemporaryDirectory() as test_dir:
+        for name in ('test_pass.py', 'test_crash.py'):
+            with open(os.path.join(test_dir, name), 'w') as test_file:
+                test_file.write(TEST_FILE)
+
+        args = ['-v', '-s', '-p', 'no:cacheprovider']
+
+        with PytestWorkerPool(1, max_sessions=2) as pool:
+            for num in range(3):
+                result, report, output = pool.run(
+                    args + [os.path.join(test_dir, 'test_pass.py')]
+                )
+
+                assert result == 0
+                assert report['summary']['passed'] == 2
+                assert 'Output of test_pass' in output
+
+            # Replaced after two sessions
+            assert pool.recycled == 1
+
+            result, report, output = pool.run(
+                args + [os.path.join(test_dir, 'test_crash.py')]
+            )
+
+            assert result == 3
+            assert report is None
+            assert output == 'Pytest worker exited with code 1.'
+            assert pool.recycled == 2
+
+            # Replaced once over the memory limit, the old worker is
+            # stopped in the background
+            pool.max_rss = 0
+            worker = pool.idle.queue[0]
+            start = time.time()
+            with patch.object(
+                worker.process, 'join', lambda timeout=None: time.sleep(2)
+            ):
+                result, report, output = pool.run(
+                    args + [os.path.join(test_dir, 'test_pass.py')]
+                )
+                duration = time.time() - start
+
+            assert result == 0
+            assert pool.recycled == 3
+            assert duration < 2
+
+        assert pool.workers == set()
+
+        with pytest.raises(IpaWorkerException) as error:
+            pool.run(args + [os.path.join(test_dir, 'test_pass.py')])
+
+        assert str(error.value) == 'Pytest worker pool is closed.'
+
+
+def test_worker_pool_timeout():
+    """Test a worker which hangs is killed and replaced."""
+    with TemporaryDirectory() as test_dir:
+        with open(os.path.join(test_dir, 'test_hang.py'), 'w') as test_file:
+            test_file.write(
+                'import time\n\n\n'
+                'def test_hang():\n'
+                '    time.sleep(60)\n'
+            )
+
+        with PytestWorkerPool(1, timeout=1) as pool:
+            worker = pool.idle.queue[0]
+            result, report, output = pool.run(
+                ['-p', 'no:cacheprovider', test_dir]
+            )
+
+            assert result == 3
+            assert report is None
+            assert output == 'Pytest session timed out after 1s.'
+            assert pool.recycled == 1
+
+            for reaper in pool.reapers:
+                reaper.join()
+
+            assert not worker.process.is_alive()
+            assert worker not in pool.workers
+
+        assert pool.workers == set()
+
+
+def test_get_rss():
+    """Test resident set size of the process."""
+    assert get_rss() > 0
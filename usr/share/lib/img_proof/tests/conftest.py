@@ -3,8 +3,61 @@ import re
 import pytest
 import xml.etree.ElementTree as ET
 
+from concurrent.futures import ThreadPoolExecutor
 from susepubliccloudinfoclient import infoserverrequests
 
+# sshd allows 10 sessions per connection by default (MaxSessions)
+MAX_CHANNELS = 8
+
+
+def get_product_version(content):
+    """
+    Return the version from the content of a product file
+    """
+    version = ''
+    try:
+        xmlroot = ET.fromstring(content)
+        version = xmlroot.find('./version').text
+    except Exception:
+        pass
+    return version
+
+
+def service_is_enabled(host, service_name, result):
+    """
+    Return True if the result of systemctl is-enabled is enabled
+
+    Unclear results are checked with the testinfra service module.
+    """
+    if result.rc == 0:
+        return True
+    if result.stdout.strip() == 'disabled':
+        return False
+    return host.service(service_name).is_enabled
+
+
+@pytest.fixture()
+def run_many(host):
+    """
+    Run independent commands at the same time and return the results
+    in order
+
+    Over SSH each command runs on a separate channel of the same
+    connection so the batch takes about one round trip.
+    """
+    def f(commands):
+        if not commands:
+            return []
+
+        # Connect before the commands run at the same time
+        getattr(host.backend, 'client', None)
+
+        with ThreadPoolExecutor(
+            max_workers=min(len(commands), MAX_CHANNELS)
+        ) as executor:
+            return list(executor.map(host.run, commands))
+    return f
+
 
 @pytest.fixture()
 def get_python_interpreter(host):
@@ -47,19 +100,30 @@ def check_cloud_register(host, get_python_interpreter):
 
 
 @pytest.fixture()
-def check_service(host):
+def check_service(host, run_many):
     def f(service_name, running=True, enabled=True):
         is_running = None
         is_enabled = None
 
-        if host.exists('systemctl'):
-            service = host.service(service_name)
+        has_systemctl, active, enabled_result = run_many([
+            'command -v systemctl',
+            'systemctl is-active {0}'.format(service_name),
+            'systemctl is-enabled {0}'.format(service_name)
+        ])
 
+        if has_systemctl.rc == 0:
             if running is not None:
-                is_running = service.is_running
+                if active.rc in (0, 3, 4):
+                    is_running = active.rc == 0
+                else:
+                    is_running = host.service(service_name).is_running
 
             if enabled is not None:
-                is_enabled = service.is_enabled
+                is_enabled = service_is_enabled(
+                    host,
+                    service_name,
+                    enabled_result
+                )
         else:
             # SystemV Init
             if running is not None:
@@ -161,21 +225,27 @@ def is_sles_sap(host, get_baseproduct):
 
 
 @pytest.fixture()
-def is_suma_server(host, get_baseproduct, get_suma_version):
+def is_suma_server(run_many):
     def f():
-        suma_server_product = ''
-        for prod_file in [
+        prod_files = [
             '/etc/products.d/SUSE-Manager-Server.prod',
             '/etc/products.d/Multi-Linux-Manager-Server.prod'
-        ]:
-            suma_server = host.file(prod_file)
-            if suma_server.exists:
+        ]
+        results = run_many(
+            ['readlink -f "/etc/products.d/baseproduct"'] +
+            ['cat -- {0}'.format(prod_file) for prod_file in prod_files]
+        )
+
+        base_product = results[0].stdout.strip()
+        suma_server_product = ''
+        suma_version = ''
+
+        for prod_file, result in zip(prod_files, results[1:]):
+            if result.rc == 0:
                 suma_server_product = prod_file
+                suma_version = get_product_version(result.stdout)
                 break
 
-        base_product = get_baseproduct()
-        suma_version = get_suma_version(suma_server_product)
-
         if suma_version and suma_version.startswith('4'):
             # For suma 4.3 baseproduct HAS to be SUMA server
             expected_products = [suma_server_product]
@@ -188,8 +258,7 @@ def is_suma_server(host, get_baseproduct, get_suma_version):
             ]
 
         return all([
-            suma_server.exists,
-            suma_server.is_file,
+            suma_server_product,
             base_product in expected_products
         ])
     return f
@@ -240,14 +309,11 @@ def is_suma(is_suma_server, is_suma_proxy):
 @pytest.fixture()
 def get_suma_version(host):
     def f(product_file):
-        version = ''
         try:
-            suma_product = host.file(product_file)
-            xmlroot = ET.fromstring(suma_product.content_string)
-            version = xmlroot.find('./version').text
+            content = host.file(product_file).content_string
         except Exception:
-            pass
-        return version
+            return ''
+        return get_product_version(content)
     return f
 
 
@@ -355,13 +421,19 @@ def confirm_license_content(host):
 
 
 @pytest.fixture()
-def is_byos(host):
+def is_byos(host, run_many):
     def f():
-        result = host.run('rpm -q cloud-regionsrv-client')
-        service = host.service('guestregister.service')
+        result, enabled = run_many([
+            'rpm -q cloud-regionsrv-client',
+            'systemctl is-enabled guestregister.service'
+        ])
         is_client_installed = result.rc == 0
 
-        if is_client_installed and service.is_enabled:
+        if is_client_installed and service_is_enabled(
+            host,
+            'guestregister.service',
+            enabled
+        ):
             return False
         else:
             return True